@@ -5,14 +5,20 @@ Aplicación principal de URNA
 Configuración de FastAPI con lifespan, templates Jinja2 y archivos estáticos
 """
 
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from starlette.middleware.sessions import SessionMiddleware
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
+from functools import cached_property
+from typing import AsyncIterator
+import asyncio
 import os
 
+from app.config import async_session_maker
+from app.services.puestos import refrescar_periodicamente
+from app.utils.auth import obtener_usuario_actual
 from app.config.startup import (
     init_db_urna,
     app_urna_abierta,
@@ -33,9 +39,14 @@ async def lifespan(app: FastAPI):
     # Startup
     app_urna_abierta()
     await init_db_urna()
+    # Resumen de la red por puesto y mesa (vista materializada)
+    refresco_puestos = asyncio.create_task(
+        refrescar_periodicamente(async_session_maker)
+    )
     app_urna_iniciada()
     yield
     # Shutdown
+    refresco_puestos.cancel()
     app_urna_cerrada()
 
 
@@ -47,24 +58,21 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     lifespan=lifespan,
+    # Usuario de la petición en request.state, con la sesión de BD de la ruta
+    dependencies=[Depends(obtener_usuario_actual)],
 )
 
-# Agregar middleware de contexto de usuario
-# IMPORTANTE: Los middlewares se ejecutan en orden INVERSO al que se agregan
-# Por lo tanto, agregamos primero UsuarioContextMiddleware y luego SessionMiddleware
-# para que SessionMiddleware se ejecute ANTES y configure request.session
+# Middleware de sesión y contexto de usuario
+# Incluye el SessionMiddleware de Starlette (cookie firmada) para que
+# /static y /salud no decodifiquen la sesión
 from app.middleware import UsuarioContextMiddleware  # noqa: E402
 
-app.add_middleware(UsuarioContextMiddleware)
-
-# Configurar SessionMiddleware para autenticación
-# Este se ejecutará PRIMERO (antes que UsuarioContextMiddleware)
 SECRET_KEY = os.getenv("SECRET_KEY")
 if not SECRET_KEY:
     raise ValueError("SECRET_KEY no está configurada en las variables de entorno")
 
 app.add_middleware(
-    SessionMiddleware,
+    UsuarioContextMiddleware,
     secret_key=SECRET_KEY,
     session_cookie="urna_session",
     max_age=86400,  # 24 horas en segundos
@@ -125,6 +133,59 @@ class CustomJinja2Templates(Jinja2Templates):
         # Llamar al padre con la firma correcta (request, name, context)
         return super().TemplateResponse(request, name, context, **kwargs)
 
+    # Tamaño mínimo (en caracteres) de cada bloque enviado al navegador
+    TAMANO_BLOQUE_STREAM = 4096
+
+    @cached_property
+    def env_async(self):
+        """
+        Copia del entorno Jinja2 en modo asíncrono (comparte loader, filtros
+        y globales) para poder iterar fuentes asíncronas en las plantillas
+        """
+        return self.env.overlay(enable_async=True)
+
+    def TemplateStream(
+        self, name: str, context: dict, status_code: int = 200
+    ) -> StreamingResponse:
+        """
+        Renderiza la plantilla por partes con generate_async() y la envía
+        como respuesta chunked: el encabezado de la página sale antes de
+        que terminen de leerse las filas y la memoria no crece con ellas.
+
+        El contexto puede contener iteradores asíncronos (ej. filas leídas
+        de un cursor de la base de datos). Firma: (name, context).
+        """
+        request = context.get("request")
+        if not request:
+            raise ValueError(
+                "Request es requerido en el contexto para CustomJinja2Templates"
+            )
+
+        # Inyectar usuario desde request.state si existe
+        if not context.get("usuario"):
+            context["usuario"] = getattr(request.state, "usuario", None)
+
+        plantilla = self.env_async.get_template(name)
+        return StreamingResponse(
+            self._agrupar(plantilla.generate_async(context)),
+            status_code=status_code,
+            media_type="text/html",
+        )
+
+    async def _agrupar(self, fragmentos: AsyncIterator[str]) -> AsyncIterator[str]:
+        """Junta los fragmentos de Jinja en bloques para no enviar miles de chunks"""
+        bloque = []
+        tamano = 0
+        async for fragmento in fragmentos:
+            bloque.append(fragmento)
+            tamano += len(fragmento)
+            if tamano >= self.TAMANO_BLOQUE_STREAM:
+                yield "".join(bloque)
+                bloque = []
+                tamano = 0
+        if bloque:
+            yield "".join(bloque)
+
 
 templates = CustomJinja2Templates(directory="app/templates")
 
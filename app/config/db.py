@@ -10,6 +10,8 @@ from typing import AsyncGenerator
 import os
 from dotenv import load_dotenv
 
+from app.config.ddl import aplicar_ddl
+
 # Cargar variables de entorno
 load_dotenv()
 
@@ -35,9 +37,10 @@ async_session_maker = async_sessionmaker(
 
 
 async def crear_tablas():
-    """Crear todas las tablas en la base de datos"""
+    """Crear tablas, extensiones e índices en la base de datos"""
     async with motor_async.begin() as conexion:
         await conexion.run_sync(SQLModel.metadata.create_all)
+        await aplicar_ddl(conexion)
 
 
 async def obtener_sesion() -> AsyncGenerator[AsyncSession, None]:
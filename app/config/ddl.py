@@ -0,0 +1,674 @@
+# ./app/config/ddl.py
+
+"""
+Sentencias DDL específicas de PostgreSQL
+
+SQLModel.metadata.create_all solo crea tablas e índices simples. Aquí se
+declaran las extensiones, funciones e índices por expresión que la
+aplicación necesita. Todas las sentencias son idempotentes, de modo que
+pueden ejecutarse en cada arranque en desarrollo o con
+script/aplicar_ddl.py en producción.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+# Búsqueda de votantes: trigramas sobre el nombre normalizado sin tildes
+# y prefijos sobre cédula/teléfono (ver app/services/busqueda.py)
+SENTENCIAS_BUSQUEDA = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() no es IMMUTABLE; la versión con diccionario explícito
+    # envuelta en una función IMMUTABLE sí puede usarse en índices
+    """
+    CREATE OR REPLACE FUNCTION urna_normalizar(texto text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, texto)) $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION urna_nombre_busqueda(nombres text, apellidos text)
+    RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    AS $$ SELECT urna_normalizar(coalesce(nombres, '') || ' ' || coalesce(apellidos, '')) $$
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_usuario_nombre_trgm ON usuario
+    USING gin (urna_nombre_busqueda(nombres, apellidos) gin_trgm_ops)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_usuario_identificacion_prefijo ON usuario
+    (identificacion varchar_pattern_ops)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_usuario_telefono_prefijo ON usuario
+    (telefono varchar_pattern_ops)
+    """,
+]
+
+# Índices declarados en los modelos: create_all solo los crea junto con
+# una tabla nueva, así que en una base existente se agregan aquí
+SENTENCIAS_INDICES = [
+    # Listado paginado por cursor (app/services/listado.py). Igual que en el
+    # modelo: el orden DESC del listado lo da el recorrido hacia atrás. Las
+    # bases que recibieron la versión DESC la reemplazan
+    """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM pg_indexes
+            WHERE schemaname = current_schema()
+              AND indexname = 'ix_usuario_fecha_registro_identificacion'
+              AND indexdef LIKE '%DESC%'
+        ) THEN
+            DROP INDEX ix_usuario_fecha_registro_identificacion;
+        END IF;
+    END
+    $$
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_usuario_fecha_registro_identificacion
+    ON usuario (fecha_registro, identificacion)
+    """,
+    # Referidos directos y conteo de hijos por fila (app/routes/votantes.py)
+    "CREATE INDEX IF NOT EXISTS ix_usuario_asignado_a ON usuario (asignado_a)",
+]
+
+# Tope de niveles para los recorridos recursivos de la jerarquía: una red
+# real no se acerca a este valor, pero una fila corrupta no puede hacer
+# girar una consulta sin fin
+PROFUNDIDAD_MAXIMA_RED = 64
+
+# Clave del candado consultivo que serializa los cambios de la jerarquía
+# (la de app/services/puestos.py es 0x55524E41)
+CANDADO_JERARQUIA = 0x55524E4A
+
+# Jerarquía de reclutamiento: la tabla de cierre usuario_red y las métricas
+# por usuario (ver app/models/jerarquia.py) se mantienen con triggers sobre
+# usuario. Cada cambio solo toca la cadena de ancestros afectada: la
+# profundidad de un ancestro sale de sus conteos en usuario_red_nivel, no de
+# recorrer su red.
+SENTENCIAS_JERARQUIA = [
+    # Cada trigger toma este candado antes de leer la tabla de cierre: dos
+    # transacciones concurrentes no pueden validar cada una su cambio
+    # contra una red que la otra está modificando (A bajo B y B bajo A
+    # pasarían las dos la revisión de ciclos). Se libera al terminar la
+    # transacción; las sentencias siguientes ven lo que la otra confirmó.
+    f"""
+    CREATE OR REPLACE FUNCTION urna_bloquear_jerarquia() RETURNS void
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        PERFORM pg_advisory_xact_lock({CANDADO_JERARQUIA});
+    END
+    $$
+    """,
+    # Nadie puede ser su propio referente. Los ciclos más largos los
+    # rechaza urna_red_reasignar. NOT VALID: no revisa filas existentes
+    # (ver detectar_ciclos en app/services/jerarquia.py)
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_constraint WHERE conname = 'ck_usuario_no_autoasignado'
+        ) THEN
+            ALTER TABLE usuario ADD CONSTRAINT ck_usuario_no_autoasignado
+            CHECK (asignado_a IS NULL OR asignado_a <> identificacion) NOT VALID;
+        END IF;
+    END
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION urna_red_insertar() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        PERFORM urna_bloquear_jerarquia();
+        INSERT INTO usuario_red (ancestro, descendiente, profundidad)
+        VALUES (NEW.identificacion, NEW.identificacion, 0);
+        INSERT INTO usuario_red_metricas (identificacion, total_red, niveles_profundidad)
+        VALUES (NEW.identificacion, 0, 0);
+
+        IF NEW.asignado_a IS NOT NULL THEN
+            INSERT INTO usuario_red (ancestro, descendiente, profundidad)
+            SELECT ancestro, NEW.identificacion, profundidad + 1
+            FROM usuario_red
+            WHERE descendiente = NEW.asignado_a;
+
+            UPDATE usuario_red_metricas m
+            SET total_red = m.total_red + 1,
+                niveles_profundidad = GREATEST(m.niveles_profundidad, r.profundidad)
+            FROM usuario_red r
+            WHERE r.descendiente = NEW.identificacion
+              AND r.profundidad > 0
+              AND m.identificacion = r.ancestro;
+
+            INSERT INTO usuario_red_rol (ancestro, rol, cantidad)
+            SELECT ancestro, NEW.rol, 1
+            FROM usuario_red
+            WHERE descendiente = NEW.identificacion AND profundidad > 0
+            ON CONFLICT (ancestro, rol)
+            DO UPDATE SET cantidad = usuario_red_rol.cantidad + 1;
+
+            INSERT INTO usuario_red_nivel (ancestro, profundidad, cantidad)
+            SELECT ancestro, profundidad, 1
+            FROM usuario_red
+            WHERE descendiente = NEW.identificacion AND profundidad > 0
+            ON CONFLICT (ancestro, profundidad)
+            DO UPDATE SET cantidad = usuario_red_nivel.cantidad + 1;
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION urna_red_reasignar() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    DECLARE
+        tamano integer;
+        alto integer;
+        roles rolusuario[];
+        cantidades integer[];
+        niveles integer[];
+        conteos integer[];
+        previos varchar[];
+    BEGIN
+        -- urna_mover_red() ya actualizó todo en bloque
+        IF current_setting('urna.mover_red', true) = 'on' THEN
+            RETURN NULL;
+        END IF;
+
+        PERFORM urna_bloquear_jerarquia();
+
+        -- Un usuario no puede quedar debajo de alguien de su propia red
+        IF NEW.asignado_a IS NOT NULL AND EXISTS (
+            SELECT 1 FROM usuario_red
+            WHERE ancestro = NEW.identificacion AND descendiente = NEW.asignado_a
+        ) THEN
+            RAISE EXCEPTION 'Reasignación inválida: % pertenece a la red de %',
+                NEW.asignado_a, NEW.identificacion
+                USING ERRCODE = 'check_violation';
+        END IF;
+
+        -- Tamaño, altura y roles del subárbol que se mueve (el usuario
+        -- cuenta con su rol anterior; urna_red_cambiar_rol corrige después)
+        SELECT count(*), max(profundidad) INTO tamano, alto
+        FROM usuario_red WHERE ancestro = NEW.identificacion;
+
+        SELECT array_agg(rol), array_agg(cantidad) INTO roles, cantidades
+        FROM (
+            SELECT CASE WHEN u.identificacion = NEW.identificacion
+                        THEN OLD.rol ELSE u.rol END AS rol,
+                   count(*)::integer AS cantidad
+            FROM usuario_red sub
+            INNER JOIN usuario u ON u.identificacion = sub.descendiente
+            WHERE sub.ancestro = NEW.identificacion
+            GROUP BY 1
+        ) conteo;
+
+        -- Descendientes del subárbol por nivel, contando desde el usuario
+        SELECT array_agg(profundidad), array_agg(cantidad) INTO niveles, conteos
+        FROM (
+            SELECT profundidad, count(*)::integer AS cantidad
+            FROM usuario_red
+            WHERE ancestro = NEW.identificacion
+            GROUP BY profundidad
+        ) conteo;
+
+        SELECT coalesce(array_agg(ancestro), '{}') INTO previos
+        FROM usuario_red
+        WHERE descendiente = NEW.identificacion AND profundidad > 0;
+
+        -- Descontar el subárbol en los ancestros anteriores
+        UPDATE usuario_red_metricas m
+        SET total_red = m.total_red - tamano
+        WHERE m.identificacion = ANY(previos);
+
+        UPDATE usuario_red_rol r
+        SET cantidad = r.cantidad - s.cantidad
+        FROM unnest(roles, cantidades) AS s(rol, cantidad)
+        WHERE r.ancestro = ANY(previos)
+          AND r.rol = s.rol;
+
+        UPDATE usuario_red_nivel n
+        SET cantidad = n.cantidad - s.cantidad
+        FROM usuario_red sup
+        CROSS JOIN unnest(niveles, conteos) AS s(nivel, cantidad)
+        WHERE sup.descendiente = NEW.identificacion
+          AND sup.profundidad > 0
+          AND n.ancestro = sup.ancestro
+          AND n.profundidad = sup.profundidad + s.nivel;
+
+        -- Desconectar el subárbol de sus ancestros anteriores
+        DELETE FROM usuario_red r
+        USING usuario_red sub
+        WHERE sub.ancestro = NEW.identificacion
+          AND r.descendiente = sub.descendiente
+          AND r.ancestro = ANY(previos);
+
+        -- La profundidad de los ancestros anteriores puede bajar: es su
+        -- nivel más profundo que sigue con descendientes
+        DELETE FROM usuario_red_nivel
+        WHERE ancestro = ANY(previos) AND cantidad = 0;
+
+        UPDATE usuario_red_metricas m
+        SET niveles_profundidad = coalesce((
+            SELECT max(n.profundidad) FROM usuario_red_nivel n
+            WHERE n.ancestro = m.identificacion
+        ), 0)
+        WHERE m.identificacion = ANY(previos);
+
+        -- Conectarlo debajo del nuevo referente
+        IF NEW.asignado_a IS NOT NULL THEN
+            INSERT INTO usuario_red (ancestro, descendiente, profundidad)
+            SELECT sup.ancestro, sub.descendiente, sup.profundidad + sub.profundidad + 1
+            FROM usuario_red sup
+            CROSS JOIN usuario_red sub
+            WHERE sup.descendiente = NEW.asignado_a
+              AND sub.ancestro = NEW.identificacion;
+
+            UPDATE usuario_red_metricas m
+            SET total_red = m.total_red + tamano,
+                niveles_profundidad = GREATEST(
+                    m.niveles_profundidad, sup.profundidad + 1 + alto
+                )
+            FROM usuario_red sup
+            WHERE sup.descendiente = NEW.asignado_a
+              AND m.identificacion = sup.ancestro;
+
+            INSERT INTO usuario_red_rol (ancestro, rol, cantidad)
+            SELECT sup.ancestro, s.rol, s.cantidad
+            FROM usuario_red sup
+            CROSS JOIN unnest(roles, cantidades) AS s(rol, cantidad)
+            WHERE sup.descendiente = NEW.asignado_a
+            ON CONFLICT (ancestro, rol)
+            DO UPDATE SET cantidad = usuario_red_rol.cantidad + EXCLUDED.cantidad;
+
+            INSERT INTO usuario_red_nivel (ancestro, profundidad, cantidad)
+            SELECT sup.ancestro, sup.profundidad + 1 + s.nivel, s.cantidad
+            FROM usuario_red sup
+            CROSS JOIN unnest(niveles, conteos) AS s(nivel, cantidad)
+            WHERE sup.descendiente = NEW.asignado_a
+            ON CONFLICT (ancestro, profundidad)
+            DO UPDATE SET cantidad = usuario_red_nivel.cantidad + EXCLUDED.cantidad;
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    # Mueve en bloque una red completa bajo otro referente: el usuario con su
+    # red (incluir = true) o solo sus referidos directos con sus redes
+    # (cuando el usuario sale de la campaña). Hace con una sentencia por
+    # paso lo que urna_red_reasignar haría una vez por cada referido.
+    # Con solicitante, origen (sin ser él mismo) y destino deben estar en su
+    # red: se revisa aquí, bajo el candado, y no con la caché del proceso.
+    # La versión anterior no tenía solicitante; se borra para que la
+    # llamada con tres argumentos no sea ambigua.
+    "DROP FUNCTION IF EXISTS urna_mover_red(varchar, varchar, boolean)",
+    """
+    CREATE OR REPLACE FUNCTION urna_mover_red(
+        origen varchar, destino varchar, incluir boolean,
+        solicitante varchar DEFAULT NULL
+    ) RETURNS integer
+    LANGUAGE plpgsql AS $$
+    DECLARE
+        raices varchar[];
+        tamano integer;
+        alto integer;
+        roles rolusuario[];
+        cantidades integer[];
+        niveles integer[];
+        conteos integer[];
+        previos varchar[];
+    BEGIN
+        PERFORM urna_bloquear_jerarquia();
+
+        IF solicitante IS NOT NULL AND NOT (
+            EXISTS (
+                SELECT 1 FROM usuario_red
+                WHERE ancestro = solicitante AND descendiente = origen
+                  AND profundidad > 0
+            ) AND EXISTS (
+                SELECT 1 FROM usuario_red
+                WHERE ancestro = solicitante AND descendiente = destino
+            )
+        ) THEN
+            RAISE EXCEPTION '% no puede mover la red de % bajo %',
+                solicitante, origen, destino
+                USING ERRCODE = 'insufficient_privilege';
+        END IF;
+
+        IF NOT EXISTS (SELECT 1 FROM usuario WHERE identificacion = destino) THEN
+            RAISE EXCEPTION 'El referente % no existe', destino
+                USING ERRCODE = 'foreign_key_violation';
+        END IF;
+
+        IF incluir THEN
+            raices := ARRAY[origen];
+        ELSE
+            SELECT coalesce(array_agg(identificacion), '{}') INTO raices
+            FROM usuario WHERE asignado_a = origen;
+        END IF;
+
+        IF cardinality(raices) = 0 OR (NOT incluir AND origen = destino) THEN
+            RETURN 0;
+        END IF;
+
+        IF EXISTS (
+            SELECT 1 FROM usuario_red
+            WHERE ancestro = ANY(raices) AND descendiente = destino
+        ) THEN
+            RAISE EXCEPTION 'Reasignación inválida: % pertenece a la red que se mueve',
+                destino
+                USING ERRCODE = 'check_violation';
+        END IF;
+
+        -- Todas las raíces comparten referente: sus ancestros son los de
+        -- origen (incluido origen si solo se mueven sus referidos)
+        SELECT count(*), max(profundidad) INTO tamano, alto
+        FROM usuario_red WHERE ancestro = ANY(raices);
+
+        SELECT array_agg(rol), array_agg(cantidad) INTO roles, cantidades
+        FROM (
+            SELECT u.rol, count(*)::integer AS cantidad
+            FROM usuario_red sub
+            INNER JOIN usuario u ON u.identificacion = sub.descendiente
+            WHERE sub.ancestro = ANY(raices)
+            GROUP BY u.rol
+        ) conteo;
+
+        -- Descendientes por nivel, contando desde cada raíz
+        SELECT array_agg(profundidad), array_agg(cantidad) INTO niveles, conteos
+        FROM (
+            SELECT profundidad, count(*)::integer AS cantidad
+            FROM usuario_red
+            WHERE ancestro = ANY(raices)
+            GROUP BY profundidad
+        ) conteo;
+
+        SELECT coalesce(array_agg(ancestro), '{}') INTO previos
+        FROM usuario_red
+        WHERE descendiente = origen AND (profundidad > 0 OR NOT incluir);
+
+        UPDATE usuario_red_metricas m
+        SET total_red = m.total_red - tamano
+        WHERE m.identificacion = ANY(previos);
+
+        UPDATE usuario_red_rol r
+        SET cantidad = r.cantidad - s.cantidad
+        FROM unnest(roles, cantidades) AS s(rol, cantidad)
+        WHERE r.ancestro = ANY(previos)
+          AND r.rol = s.rol;
+
+        -- Las raíces están un nivel debajo de origen si solo se mueven
+        -- sus referidos
+        UPDATE usuario_red_nivel n
+        SET cantidad = n.cantidad - s.cantidad
+        FROM usuario_red sup
+        CROSS JOIN unnest(niveles, conteos) AS s(nivel, cantidad)
+        WHERE sup.descendiente = origen
+          AND (sup.profundidad > 0 OR NOT incluir)
+          AND n.ancestro = sup.ancestro
+          AND n.profundidad = sup.profundidad + s.nivel
+              + CASE WHEN incluir THEN 0 ELSE 1 END;
+
+        DELETE FROM usuario_red r
+        USING usuario_red sub
+        WHERE sub.ancestro = ANY(raices)
+          AND r.descendiente = sub.descendiente
+          AND r.ancestro = ANY(previos);
+
+        DELETE FROM usuario_red_nivel
+        WHERE ancestro = ANY(previos) AND cantidad = 0;
+
+        UPDATE usuario_red_metricas m
+        SET niveles_profundidad = coalesce((
+            SELECT max(n.profundidad) FROM usuario_red_nivel n
+            WHERE n.ancestro = m.identificacion
+        ), 0)
+        WHERE m.identificacion = ANY(previos);
+
+        -- El trigger por fila no debe repetir el trabajo
+        PERFORM set_config('urna.mover_red', 'on', true);
+        UPDATE usuario
+        SET asignado_a = destino, fecha_actualizacion = now()
+        WHERE identificacion = ANY(raices);
+        PERFORM set_config('urna.mover_red', 'off', true);
+
+        INSERT INTO usuario_red (ancestro, descendiente, profundidad)
+        SELECT sup.ancestro, sub.descendiente, sup.profundidad + sub.profundidad + 1
+        FROM usuario_red sup
+        CROSS JOIN usuario_red sub
+        WHERE sup.descendiente = destino
+          AND sub.ancestro = ANY(raices);
+
+        UPDATE usuario_red_metricas m
+        SET total_red = m.total_red + tamano,
+            niveles_profundidad = GREATEST(
+                m.niveles_profundidad, sup.profundidad + 1 + alto
+            )
+        FROM usuario_red sup
+        WHERE sup.descendiente = destino
+          AND m.identificacion = sup.ancestro;
+
+        INSERT INTO usuario_red_rol (ancestro, rol, cantidad)
+        SELECT sup.ancestro, s.rol, s.cantidad
+        FROM usuario_red sup
+        CROSS JOIN unnest(roles, cantidades) AS s(rol, cantidad)
+        WHERE sup.descendiente = destino
+        ON CONFLICT (ancestro, rol)
+        DO UPDATE SET cantidad = usuario_red_rol.cantidad + EXCLUDED.cantidad;
+
+        INSERT INTO usuario_red_nivel (ancestro, profundidad, cantidad)
+        SELECT sup.ancestro, sup.profundidad + 1 + s.nivel, s.cantidad
+        FROM usuario_red sup
+        CROSS JOIN unnest(niveles, conteos) AS s(nivel, cantidad)
+        WHERE sup.descendiente = destino
+        ON CONFLICT (ancestro, profundidad)
+        DO UPDATE SET cantidad = usuario_red_nivel.cantidad + EXCLUDED.cantidad;
+
+        RETURN tamano;
+    END
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION urna_red_cambiar_rol() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        PERFORM urna_bloquear_jerarquia();
+        UPDATE usuario_red_rol r
+        SET cantidad = r.cantidad - 1
+        FROM usuario_red sup
+        WHERE sup.descendiente = NEW.identificacion
+          AND sup.profundidad > 0
+          AND r.ancestro = sup.ancestro
+          AND r.rol = OLD.rol;
+
+        INSERT INTO usuario_red_rol (ancestro, rol, cantidad)
+        SELECT ancestro, NEW.rol, 1
+        FROM usuario_red
+        WHERE descendiente = NEW.identificacion AND profundidad > 0
+        ON CONFLICT (ancestro, rol)
+        DO UPDATE SET cantidad = usuario_red_rol.cantidad + 1;
+        RETURN NULL;
+    END
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION urna_red_eliminar() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        PERFORM urna_bloquear_jerarquia();
+        -- BEFORE DELETE: la tabla de cierre aún tiene las filas del usuario
+        UPDATE usuario_red_nivel n
+        SET cantidad = n.cantidad - 1
+        FROM usuario_red r
+        WHERE r.descendiente = OLD.identificacion
+          AND r.profundidad > 0
+          AND n.ancestro = r.ancestro
+          AND n.profundidad = r.profundidad;
+
+        DELETE FROM usuario_red_nivel n
+        USING usuario_red r
+        WHERE r.descendiente = OLD.identificacion
+          AND r.profundidad > 0
+          AND n.ancestro = r.ancestro
+          AND n.cantidad = 0;
+
+        UPDATE usuario_red_metricas m
+        SET total_red = m.total_red - 1,
+            niveles_profundidad = coalesce((
+                SELECT max(n.profundidad) FROM usuario_red_nivel n
+                WHERE n.ancestro = m.identificacion
+            ), 0)
+        FROM usuario_red r
+        WHERE r.descendiente = OLD.identificacion
+          AND r.profundidad > 0
+          AND m.identificacion = r.ancestro;
+
+        UPDATE usuario_red_rol rr
+        SET cantidad = rr.cantidad - 1
+        FROM usuario_red r
+        WHERE r.descendiente = OLD.identificacion
+          AND r.profundidad > 0
+          AND rr.ancestro = r.ancestro
+          AND rr.rol = OLD.rol;
+        RETURN OLD;
+    END
+    $$
+    """,
+    "DROP TRIGGER IF EXISTS tr_usuario_red_insertar ON usuario",
+    """
+    CREATE TRIGGER tr_usuario_red_insertar
+    AFTER INSERT ON usuario
+    FOR EACH ROW EXECUTE FUNCTION urna_red_insertar()
+    """,
+    # Los triggers AFTER del mismo evento se disparan en orden alfabético:
+    # tr_usuario_red_reasignar corre antes que tr_usuario_red_rol
+    "DROP TRIGGER IF EXISTS tr_usuario_red_reasignar ON usuario",
+    """
+    CREATE TRIGGER tr_usuario_red_reasignar
+    AFTER UPDATE OF asignado_a ON usuario
+    FOR EACH ROW
+    WHEN (OLD.asignado_a IS DISTINCT FROM NEW.asignado_a)
+    EXECUTE FUNCTION urna_red_reasignar()
+    """,
+    "DROP TRIGGER IF EXISTS tr_usuario_red_rol ON usuario",
+    """
+    CREATE TRIGGER tr_usuario_red_rol
+    AFTER UPDATE OF rol ON usuario
+    FOR EACH ROW
+    WHEN (OLD.rol IS DISTINCT FROM NEW.rol)
+    EXECUTE FUNCTION urna_red_cambiar_rol()
+    """,
+    "DROP TRIGGER IF EXISTS tr_usuario_red_eliminar ON usuario",
+    """
+    CREATE TRIGGER tr_usuario_red_eliminar
+    BEFORE DELETE ON usuario
+    FOR EACH ROW EXECUTE FUNCTION urna_red_eliminar()
+    """,
+    # Carga inicial para bases que ya tenían usuarios (solo si está vacía).
+    # El camino y el tope de niveles evitan girar sobre un ciclo existente
+    f"""
+    INSERT INTO usuario_red (ancestro, descendiente, profundidad)
+    WITH RECURSIVE red AS (
+        SELECT identificacion AS ancestro, identificacion AS descendiente,
+               0 AS profundidad, ARRAY[identificacion::text] AS camino
+        FROM usuario
+
+        UNION ALL
+
+        SELECT r.ancestro, u.identificacion, r.profundidad + 1,
+               r.camino || u.identificacion::text
+        FROM usuario u
+        INNER JOIN red r ON u.asignado_a = r.descendiente
+        WHERE NOT u.identificacion::text = ANY(r.camino)
+          AND r.profundidad < {PROFUNDIDAD_MAXIMA_RED}
+    )
+    SELECT ancestro, descendiente, profundidad FROM red
+    WHERE NOT EXISTS (SELECT 1 FROM usuario_red)
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO usuario_red_metricas (identificacion, total_red, niveles_profundidad)
+    SELECT ancestro, count(*) FILTER (WHERE profundidad > 0), max(profundidad)
+    FROM usuario_red
+    WHERE NOT EXISTS (SELECT 1 FROM usuario_red_metricas)
+    GROUP BY ancestro
+    """,
+    """
+    INSERT INTO usuario_red_rol (ancestro, rol, cantidad)
+    SELECT r.ancestro, u.rol, count(*)
+    FROM usuario_red r
+    INNER JOIN usuario u ON u.identificacion = r.descendiente
+    WHERE r.profundidad > 0
+      AND NOT EXISTS (SELECT 1 FROM usuario_red_rol)
+    GROUP BY r.ancestro, u.rol
+    """,
+    """
+    INSERT INTO usuario_red_nivel (ancestro, profundidad, cantidad)
+    SELECT ancestro, profundidad, count(*)
+    FROM usuario_red
+    WHERE profundidad > 0
+      AND NOT EXISTS (SELECT 1 FROM usuario_red_nivel)
+    GROUP BY ancestro, profundidad
+    """,
+]
+
+# Resumen por puesto y mesa de la red de cada usuario (ver
+# app/services/puestos.py). Es una vista materializada: se refresca en
+# segundo plano con REFRESH ... CONCURRENTLY, que necesita un índice único
+# sobre columnas simples (por eso lugar y mesa vacíos se guardan como '')
+SENTENCIAS_RESUMENES = [
+    """
+    CREATE MATERIALIZED VIEW IF NOT EXISTS usuario_red_puesto AS
+    SELECT r.ancestro,
+           coalesce(u.lugar_votacion, '') AS lugar_votacion,
+           coalesce(u.mesa_votacion, '') AS mesa_votacion,
+           count(*) AS cantidad,
+           sum(u.calidad_score) AS suma_calidad
+    FROM usuario_red r
+    INNER JOIN usuario u ON u.identificacion = r.descendiente
+    WHERE r.profundidad > 0
+    GROUP BY 1, 2, 3
+    """,
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS ux_usuario_red_puesto
+    ON usuario_red_puesto (ancestro, lugar_votacion, mesa_votacion)
+    """,
+    # Cuándo se refrescó la vista por última vez (una sola fila): con
+    # varios workers, el que llega dentro del intervalo no la recalcula
+    """
+    CREATE TABLE IF NOT EXISTS usuario_red_puesto_refresco (
+        id boolean PRIMARY KEY DEFAULT true CHECK (id),
+        refrescado_en timestamptz NOT NULL
+    )
+    """,
+    """
+    INSERT INTO usuario_red_puesto_refresco (refrescado_en)
+    VALUES ('-infinity') ON CONFLICT (id) DO NOTHING
+    """,
+]
+
+# Los votantes se registran sin credenciales (password NULL): se asignan
+# al invitarlos a iniciar sesión (ver asignar_credenciales en
+# app/utils/auth.py)
+SENTENCIAS_CREDENCIALES = [
+    "ALTER TABLE usuario ALTER COLUMN password DROP NOT NULL",
+]
+
+SENTENCIAS_DDL = [
+    *SENTENCIAS_BUSQUEDA,
+    *SENTENCIAS_INDICES,
+    *SENTENCIAS_JERARQUIA,
+    *SENTENCIAS_RESUMENES,
+    *SENTENCIAS_CREDENCIALES,
+]
+
+
+async def aplicar_ddl(conexion: AsyncConnection) -> None:
+    """
+    Ejecuta todas las sentencias DDL en orden
+
+    Args:
+        conexion: Conexión asíncrona dentro de una transacción
+    """
+    for sentencia in SENTENCIAS_DDL:
+        await conexion.execute(text(sentencia))
@@ -1,79 +1,98 @@
 # ./app/middleware/usuario_context.py
 
 """
-Middleware para inyectar el usuario autenticado en el contexto de todos los templates
+Middleware de sesión: cierre por inactividad y valor por defecto de
+request.state.usuario para los templates (el usuario lo resuelve
+obtener_usuario_actual en app/utils/auth.py)
+
+Es un middleware ASGI puro: BaseHTTPMiddleware envolvía cada respuesta en
+una tarea y un stream intermedio, con costo en cada petición y sin
+streaming real para TemplateStream. Además incluye el SessionMiddleware
+de Starlette para poder saltarlo: /static y /salud van directo a la
+aplicación, sin decodificar la cookie ni tocar la sesión.
 """
 
-from typing import Callable
 import os
 import time
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from typing import Any
+
+from starlette.middleware.sessions import SessionMiddleware
 from starlette.responses import RedirectResponse
-from sqlmodel import select
+from starlette.types import ASGIApp, Receive, Scope, Send
 
-from app.config import obtener_sesion
-from app.models import Usuario
+# Rutas que no necesitan sesión ni usuario
+PREFIJOS_SIN_SESION = ("/static/",)
+RUTAS_SIN_SESION = frozenset({"/static", "/salud"})
 
 
-class UsuarioContextMiddleware(BaseHTTPMiddleware):
+def requiere_sesion(path: str) -> bool:
     """
-    Middleware que inyecta el usuario autenticado en request.state
-    para que esté disponible en todos los templates Jinja2
+    Indica si la ruta pasa por la sesión y el cierre por inactividad
+
+    Args:
+        path: Ruta de la petición
+
+    Returns:
+        False para archivos estáticos y la verificación de salud
     """
+    return not (path in RUTAS_SIN_SESION or path.startswith(PREFIJOS_SIN_SESION))
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """
-        Procesa cada request para agregar el usuario al contexto
 
+class UsuarioContextMiddleware:
+    """
+    Middleware ASGI que maneja la sesión del usuario (cookie firmada y
+    cierre por inactividad) y deja request.state.usuario en None por
+    defecto para que esté disponible en todos los templates Jinja2
+    """
+
+    def __init__(self, app: ASGIApp, **opciones_sesion: Any) -> None:
+        """
         Args:
-            request: Request de FastAPI
-            call_next: Siguiente middleware/handler
+            app: Aplicación ASGI siguiente
+            **opciones_sesion: Argumentos de SessionMiddleware (secret_key,
+                session_cookie, max_age, same_site, https_only)
+        """
+        self.app = app
+        # idle_timeout cierra la sesion si el usuario no ha hecho nada
+        # durante los segundos expresados en SESSION_IDLE_TIMEOUT_SECONDS
+        self.idle_timeout = int(os.getenv("SESSION_IDLE_TIMEOUT_SECONDS", "2700"))
+        self.con_sesion = SessionMiddleware(self.contexto, **opciones_sesion)
 
-        Returns:
-            Response procesada
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Decide si la petición pasa por la sesión; el cuerpo de la
+        respuesta (incluido el streaming) llega sin tocar al servidor
         """
-        request.state.usuario = None
+        if scope["type"] not in ("http", "websocket") or not requiere_sesion(
+            scope["path"]
+        ):
+            await self.app(scope, receive, send)
+            return
+        await self.con_sesion(scope, receive, send)
+
+    async def contexto(self, scope: Scope, receive: Receive, send: Send) -> None:
         """
-        idle_timeout se encarga de cerrar la sesion
-        si el usuario no ha hecho nada, durante los
-        segundos expresados en  idle_timeout.
+        Procesa la petición ya con scope["session"] cargado
+
+        Args:
+            scope: Scope ASGI
+            receive: Canal de entrada
+            send: Canal de salida (el de SessionMiddleware)
         """
-        idle_timeout = int(os.getenv("SESSION_IDLE_TIMEOUT_SECONDS", "2700"))
-        path = request.url.path
-        excluded = path.startswith("/static") or path.startswith("/auth/login")
+        scope.setdefault("state", {})["usuario"] = None
+
+        sesion = scope["session"]
         now = int(time.time())
-        last = request.session.get("ultimo_uso")
-
-        if last and now - last > idle_timeout:
-            request.session.clear()
-            if not excluded:
-                return RedirectResponse(url="/auth/login", status_code=303)
-
-        usuario_id = request.session.get("usuario_id")
-
-        if usuario_id:
-            try:
-                # Obtener sesión de base de datos
-                async for sesion in obtener_sesion():
-                    # Buscar usuario en base de datos
-                    statement = select(Usuario).where(
-                        Usuario.identificacion == usuario_id
-                    )
-                    resultado = await sesion.execute(statement)
-                    usuario = resultado.scalar_one_or_none()
-
-                    if usuario:
-                        request.state.usuario = usuario
-
-                    break  # Solo necesitamos una iteración
-            except Exception:
-                # Si hay algún error, simplemente dejamos usuario como None
-                # Esto evita que errores de BD rompan toda la aplicación
-                pass
-
-        if usuario_id:
-            request.session["ultimo_uso"] = now
-
-        response = await call_next(request)
-        return response
+        last = sesion.get("ultimo_uso")
+
+        if last and now - last > self.idle_timeout:
+            sesion.clear()
+            if scope["type"] == "http" and not scope["path"].startswith("/auth/login"):
+                respuesta = RedirectResponse(url="/auth/login", status_code=303)
+                await respuesta(scope, receive, send)
+                return
+
+        if sesion.get("usuario_id"):
+            sesion["ultimo_uso"] = now
+
+        await self.app(scope, receive, send)
@@ -5,5 +5,14 @@ Modelos de base de datos
 """
 
 from .usuario import Usuario, RolUsuario, TipoSexo
+from .jerarquia import UsuarioRed, UsuarioRedMetricas, UsuarioRedRol, UsuarioRedNivel
 
-__all__ = ["Usuario", "RolUsuario", "TipoSexo"]
+__all__ = [
+    "Usuario",
+    "RolUsuario",
+    "TipoSexo",
+    "UsuarioRed",
+    "UsuarioRedMetricas",
+    "UsuarioRedRol",
+    "UsuarioRedNivel",
+]
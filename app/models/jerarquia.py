@@ -0,0 +1,144 @@
+# ./app/models/jerarquia.py
+
+"""
+Tabla de cierre (closure table) de la pirámide de reclutamiento
+
+Una fila por cada par (ancestro, descendiente) del árbol definido por
+usuario.asignado_a, incluida la fila de cada usuario consigo mismo
+(profundidad 0). La mantienen los triggers de app/config/ddl.py en cada
+inserción o reasignación, así que nunca se escribe desde Python.
+
+- ¿X es descendiente de Y?  -> búsqueda por la clave (Y, X)
+- Toda la red de Y          -> rango de la clave que empieza por Y
+- Cadena de jefes de X      -> índice (descendiente, profundidad)
+
+usuario_red_metricas, usuario_red_rol y usuario_red_nivel guardan los
+totales de la red de cada usuario para leerlos sin recorrer su subárbol.
+"""
+
+from sqlmodel import SQLModel, Field
+import sqlalchemy as sa
+
+from app.models.usuario import RolUsuario
+
+
+class UsuarioRed(SQLModel, table=True):
+    """Relación ancestro -> descendiente con la distancia entre ambos"""
+
+    __tablename__ = "usuario_red"
+    __table_args__ = (
+        sa.Index("ix_usuario_red_descendiente", "descendiente", "profundidad"),
+    )
+
+    ancestro: str = Field(
+        sa_column=sa.Column(
+            sa.String(10),
+            sa.ForeignKey("usuario.identificacion", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        description="Identificación del ancestro (reclutador directo o indirecto)",
+    )
+
+    descendiente: str = Field(
+        sa_column=sa.Column(
+            sa.String(10),
+            sa.ForeignKey("usuario.identificacion", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        description="Identificación del descendiente",
+    )
+
+    profundidad: int = Field(
+        sa_column=sa.Column(sa.Integer, nullable=False),
+        description="Niveles entre ancestro y descendiente (0 = el mismo usuario)",
+    )
+
+
+class UsuarioRedMetricas(SQLModel, table=True):
+    """
+    Métricas acumuladas de la red de cada usuario
+
+    Las actualizan los mismos triggers que usuario_red, recorriendo solo la
+    cadena de ancestros del usuario creado, reasignado o eliminado.
+    """
+
+    __tablename__ = "usuario_red_metricas"
+
+    identificacion: str = Field(
+        sa_column=sa.Column(
+            sa.String(10),
+            sa.ForeignKey("usuario.identificacion", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        description="Usuario raíz de la red",
+    )
+
+    total_red: int = Field(
+        default=0,
+        sa_column=sa.Column(sa.Integer, nullable=False, server_default="0"),
+        description="Cantidad de descendientes directos e indirectos",
+    )
+
+    niveles_profundidad: int = Field(
+        default=0,
+        sa_column=sa.Column(sa.Integer, nullable=False, server_default="0"),
+        description="Distancia al descendiente más lejano (0 = sin red)",
+    )
+
+
+class UsuarioRedRol(SQLModel, table=True):
+    """Cantidad de descendientes de cada usuario por rol"""
+
+    __tablename__ = "usuario_red_rol"
+
+    ancestro: str = Field(
+        sa_column=sa.Column(
+            sa.String(10),
+            sa.ForeignKey("usuario.identificacion", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        description="Usuario raíz de la red",
+    )
+
+    rol: RolUsuario = Field(
+        sa_column=sa.Column(sa.Enum(RolUsuario), primary_key=True),
+        description="Rol de los descendientes contados",
+    )
+
+    cantidad: int = Field(
+        default=0,
+        sa_column=sa.Column(sa.Integer, nullable=False, server_default="0"),
+        description="Descendientes con ese rol",
+    )
+
+
+class UsuarioRedNivel(SQLModel, table=True):
+    """
+    Cantidad de descendientes de cada usuario por nivel
+
+    Permite recalcular niveles_profundidad cuando una rama sale de la red
+    (el nivel más profundo con cantidad > 0) sin recorrer el subárbol. Los
+    triggers borran los niveles que quedan en cero.
+    """
+
+    __tablename__ = "usuario_red_nivel"
+
+    ancestro: str = Field(
+        sa_column=sa.Column(
+            sa.String(10),
+            sa.ForeignKey("usuario.identificacion", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        description="Usuario raíz de la red",
+    )
+
+    profundidad: int = Field(
+        sa_column=sa.Column(sa.Integer, primary_key=True, autoincrement=False),
+        description="Nivel contado (1 = referidos directos)",
+    )
+
+    cantidad: int = Field(
+        default=0,
+        sa_column=sa.Column(sa.Integer, nullable=False, server_default="0"),
+        description="Descendientes en ese nivel",
+    )
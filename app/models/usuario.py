@@ -39,6 +39,22 @@ class Usuario(SQLModel, table=True):
     Cada fila es una persona en la pirámide electoral
     """
 
+    __table_args__ = (
+        # Clave de ordenamiento del listado paginado por cursor
+        sa.Index(
+            "ix_usuario_fecha_registro_identificacion",
+            "fecha_registro",
+            "identificacion",
+        ),
+        # Referidos directos de un usuario (árbol y conteo de hijos)
+        sa.Index("ix_usuario_asignado_a", "asignado_a"),
+        # Nadie es su propio referente (ciclos largos: ver app/config/ddl.py)
+        sa.CheckConstraint(
+            "asignado_a IS NULL OR asignado_a <> identificacion",
+            name="ck_usuario_no_autoasignado",
+        ),
+    )
+
     # Identificación - PRIMARY KEY
     identificacion: str = Field(
         primary_key=True,
@@ -94,8 +110,10 @@ class Usuario(SQLModel, table=True):
     )
 
     # Autenticación
-    password: str = Field(
-        description="Contraseña hasheada (bcrypt/argon2) - NUNCA en texto plano"
+    # None = sin credenciales (votantes registrados que no inician sesión)
+    password: Optional[str] = Field(
+        default=None,
+        description="Contraseña hasheada (bcrypt/argon2) - NUNCA en texto plano",
     )
 
     # Métricas
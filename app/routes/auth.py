@@ -13,7 +13,8 @@ from app.config import obtener_sesion
 from app.models import Usuario
 from app import templates as jinja_templates
 from app.utils.auth import (
-    verificar_password,
+    verificar_password_async,
+    tiene_credenciales,
     guardar_usuario_en_sesion,
     limpiar_sesion,
 )
@@ -45,7 +46,10 @@ async def procesar_login(
     usuario = resultado.scalar_one_or_none()
 
     # Validar credenciales
-    if not usuario or not verificar_password(password, usuario.password):
+    # Sin credenciales asignadas no puede iniciar sesión (no se llama a bcrypt)
+    if not tiene_credenciales(usuario) or not await verificar_password_async(
+        password, usuario.password
+    ):
         return jinja_templates.TemplateResponse(
             "auth/login.html",
             {
@@ -1,14 +1,14 @@
 # ./app/routes/index.py
 
 """
-Rutas principales de la aplicación (index y salud)
+Rutas principales de la aplicación (index, salud y métricas)
 """
 
-from fastapi import APIRouter, Request, Depends
+from fastapi import APIRouter, Request, Depends, HTTPException
 from fastapi.responses import HTMLResponse
 from app import templates as jinja_templates
-from app.utils.auth import requerir_autenticacion
-from app.models import Usuario
+from app.utils.auth import requerir_autenticacion, metricas_password
+from app.models import RolUsuario, Usuario
 
 router = APIRouter()
 
@@ -30,6 +30,21 @@ async def verificar_salud():
     }
 
 
+@router.get("/metricas")
+async def ver_metricas(usuario: Usuario = Depends(requerir_autenticacion)):
+    """
+    Métricas internas de este worker (JSON), solo para el Estratega
+
+    /salud no las muestra porque no requiere autenticación
+    """
+    if usuario.rol != RolUsuario.ESTRATEGA:
+        raise HTTPException(status_code=403, detail="No autorizado")
+    return {
+        # Cola de bcrypt (login y registro)
+        "password": dict(metricas_password),
+    }
+
+
 @router.get("/dashboard", response_class=HTMLResponse)
 async def dashboard(
     request: Request, usuario: Usuario = Depends(requerir_autenticacion)
@@ -6,14 +6,43 @@ Rutas para gestión de votantes
 
 from fastapi import APIRouter, Depends, Request, Form
 from fastapi.responses import HTMLResponse, RedirectResponse
+from functools import partial
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 import sqlalchemy as sa
 
 from app.config import obtener_sesion
-from app.models import Usuario, RolUsuario, TipoSexo
+from app.models import (
+    Usuario,
+    UsuarioRed,
+    UsuarioRedMetricas,
+    UsuarioRedRol,
+    RolUsuario,
+    TipoSexo,
+)
 from app import templates as jinja_templates
-from app.utils.auth import requerir_autenticacion, hashear_password
+from app.utils.auth import requerir_autenticacion
+from app.services.listado import (
+    normalizar_limite,
+    paginar_votantes,
+    transmitir_votantes,
+)
+from app.services.filtros import parsear_filtros, compilar_filtros
+from app.services.conteo import contar_votantes, invalidar_conteos
+from app.services.perfil import cargar_perfil
+from app.services.ancestros import obtener_ancestros
+from app.services.arbol import PROFUNDIDAD_MAXIMA, cargar_subarbol
+from app.services.autorizacion import invalidar_red, puede_ver_perfil
+from app.services.puestos import INTERVALO_REFRESCO, resumen_puestos
+from app.services.ranking import CRITERIOS_RANKING, TOP_RANKING, obtener_ranking
+from app.services.reasignacion import mover_red
+from app.services.jerarquia import MOTOR_JERARQUIA
+from app.services.sugerencias import (
+    CACHE_SUGERENCIAS,
+    LIMITE_SUGERENCIAS_DEFECTO,
+    LIMITE_SUGERENCIAS_MAXIMO,
+    sugerir_votantes,
+)
 import secrets
 
 router = APIRouter(prefix="/votantes", tags=["Votantes"])
@@ -24,54 +53,151 @@ async def listar_votantes(
     request: Request, sesion: AsyncSession = Depends(obtener_sesion)
 ):
     """
-    Lista todos los votantes/usuarios del sistema
+    Lista los votantes/usuarios del sistema, una página a la vez.
+
+    Parámetros de consulta:
+    - q: texto de búsqueda con la sintaxis "campo: valor" de filters.js
+    - after / before: cursores de navegación entre páginas
+    - limite: tamaño de página
     """
     q = request.query_params.get("q", "").strip()
+    after = request.query_params.get("after") or None
+    before = request.query_params.get("before") or None
+    limite = normalizar_limite(request.query_params.get("limite"))
 
-    if q:
-        pattern = f"%{q}%"
-        statement = (
-            select(Usuario)
-            .where(
-                sa.or_(
-                    Usuario.nombres.ilike(pattern),
-                    Usuario.apellidos.ilike(pattern),
-                    Usuario.identificacion.like(pattern),
-                    Usuario.telefono.like(pattern),
-                )
-            )
-            .order_by(Usuario.fecha_registro.desc())
-        )
-    else:
-        statement = select(Usuario).order_by(Usuario.fecha_registro.desc())
-    resultado = await sesion.execute(statement)
-    votantes = resultado.scalars().all()
+    # Filtros "campo: valor" y tokens libres, resueltos en PostgreSQL
+    consulta = parsear_filtros(q)
+    condiciones = compilar_filtros(consulta)
 
-    ids_referentes = list(
-        {v.asignado_a for v in votantes if getattr(v, "asignado_a", None)}
-    )
-    referentes = {}
-    if ids_referentes:
-        ref_stmt = select(Usuario).where(Usuario.identificacion.in_(ids_referentes))
-        ref_res = await sesion.execute(ref_stmt)
-        ref_users = ref_res.scalars().all()
-        referentes = {u.identificacion: u for u in ref_users}
+    try:
+        if before:
+            # Retroceder requiere invertir la página: se lee completa
+            pagina = await paginar_votantes(
+                sesion, condiciones, before=before, limite=limite
+            )
+        else:
+            pagina = transmitir_votantes(
+                sesion, condiciones, after=after, limite=limite
+            )
+    except ValueError:
+        # Cursor manipulado o vencido: volver a la primera página
+        pagina = transmitir_votantes(sesion, condiciones, limite=limite)
 
     messages = request.session.pop("flash_messages", [])
 
-    return jinja_templates.TemplateResponse(
+    # Las filas se envían a medida que se leen de la base de datos
+    return jinja_templates.TemplateStream(
         "votantes/listar.html",
         {
             "request": request,
-            "votantes": votantes,
-            "total": len(votantes),
+            "votantes": pagina.votantes,
             "messages": messages,
             "q": q,
-            "referentes": referentes,
+            "pagina": pagina,
+            "filtro_error": consulta.error,
+            # Se evalúa en el pie de la tabla, después de enviar las filas
+            "contar_total": partial(contar_votantes, sesion, q, condiciones),
         },
     )
 
 
+@router.get("/buscar")
+async def buscar_votantes_api(
+    request: Request, sesion: AsyncSession = Depends(obtener_sesion)
+):
+    """
+    API JSON de búsqueda mientras se escribe (sin recargar el listado).
+
+    Parámetros de consulta:
+    - q: texto de búsqueda con la sintaxis "campo: valor" de filters.js
+    - limite: máximo de resultados (por defecto 10, máximo 50)
+
+    Returns:
+        JSON con q normalizado, error de sintaxis y los resultados
+    """
+    limite = normalizar_limite(
+        request.query_params.get("limite"),
+        defecto=LIMITE_SUGERENCIAS_DEFECTO,
+        maximo=LIMITE_SUGERENCIAS_MAXIMO,
+    )
+    return await sugerir_votantes(
+        sesion,
+        request.query_params.get("q", ""),
+        limite=limite,
+        usuario_id=request.session.get("usuario_id"),
+    )
+
+
+@router.get("/puestos", response_class=HTMLResponse)
+async def ver_puestos_red(
+    request: Request,
+    sesion: AsyncSession = Depends(obtener_sesion),
+    usuario: Usuario = Depends(requerir_autenticacion),
+):
+    """
+    Personas de la red del usuario por puesto y mesa de votación, con su
+    calidad promedio (ver app/services/puestos.py).
+    """
+    return jinja_templates.TemplateResponse(
+        "votantes/puestos.html",
+        {
+            "request": request,
+            "puestos": await resumen_puestos(sesion, usuario.identificacion),
+            "intervalo": INTERVALO_REFRESCO,
+        },
+    )
+
+
+@router.get("/puestos/datos")
+async def obtener_puestos_api(
+    sesion: AsyncSession = Depends(obtener_sesion),
+    usuario: Usuario = Depends(requerir_autenticacion),
+):
+    """
+    API JSON del resumen por puesto y mesa de la red del usuario.
+
+    Returns:
+        JSON con los puestos ordenados por cantidad y sus mesas
+    """
+    return {
+        "identificacion": usuario.identificacion,
+        "puestos": await resumen_puestos(sesion, usuario.identificacion),
+    }
+
+
+@router.get("/ranking")
+async def obtener_ranking_api(
+    request: Request,
+    sesion: AsyncSession = Depends(obtener_sesion),
+    usuario: Usuario = Depends(requerir_autenticacion),
+):
+    """
+    API JSON con el ranking de Líderes y Jefes de Zona (solo Estrategas).
+
+    Parámetros de consulta:
+    - criterio: "red" (tamaño de la red, por defecto) o "calidad" (promedio,
+      solo redes de MINIMO_RED_CALIDAD personas o más)
+    - limite: puestos a mostrar (por defecto 20, máximo 100)
+
+    Returns:
+        JSON con el criterio y el ranking (ver app/services/ranking.py)
+    """
+    from fastapi import HTTPException
+
+    if usuario.rol != RolUsuario.ESTRATEGA:
+        raise HTTPException(status_code=403, detail="No autorizado")
+
+    criterio = request.query_params.get("criterio", "red")
+    if criterio not in CRITERIOS_RANKING:
+        criterio = "red"
+    limite = normalizar_limite(request.query_params.get("limite"), defecto=TOP_RANKING)
+
+    return {
+        "criterio": criterio,
+        "ranking": await obtener_ranking(sesion, k=limite, criterio=criterio),
+    }
+
+
 @router.get("/nuevo", response_class=HTMLResponse)
 async def nuevo_votante_form(
     request: Request, usuario: Usuario = Depends(requerir_autenticacion)
@@ -194,9 +320,6 @@ async def crear_nuevo_votante(
             status_code=400,
         )
 
-    random_password = secrets.token_urlsafe(12)
-    password_hash = hashear_password(random_password)
-
     sexo_enum = None
     if sexo in [s.value for s in TipoSexo]:
         sexo_enum = TipoSexo(sexo)
@@ -214,12 +337,19 @@ async def crear_nuevo_votante(
         mesa_votacion=mesa_votacion,
         rol=RolUsuario.VOTANTE,
         asignado_a=usuario.identificacion,
-        password=password_hash,
+        # Sin credenciales: se asignan si luego se le invita a iniciar sesión
+        password=None,
     )
 
     try:
         sesion.add(nuevo)
         await sesion.commit()
+        CACHE_SUGERENCIAS.limpiar()
+        invalidar_conteos()
+        invalidar_red([usuario.identificacion])
+        MOTOR_JERARQUIA.registrar(
+            nuevo.identificacion, nuevo.asignado_a, nuevo.rol, nuevo.calidad_score
+        )
         request.session.pop("csrf_token", None)
         request.session.setdefault("flash_messages", []).append(
             "Votante creado correctamente"
@@ -267,34 +397,25 @@ async def verificar_permiso_ver_perfil(
         return True
 
     # Caso 2: Verificar si el perfil es un referido descendente
-    from sqlalchemy import text
-
-    query = text("""
-        WITH RECURSIVE red_descendente AS (
-            SELECT identificacion, 1 as nivel
-            FROM usuario
-            WHERE asignado_a = :id_autenticado
-            
-            UNION ALL
-            
-            SELECT u.identificacion, r.nivel + 1
-            FROM usuario u
-            INNER JOIN red_descendente r ON u.asignado_a = r.identificacion
+    # (red del usuario en caché, ver app/services/autorizacion.py)
+    permitido = await puede_ver_perfil(
+        sesion, identificacion_perfil, identificacion_autenticado
+    )
+    if permitido is not None:
+        return permitido
+
+    # Red demasiado grande para la caché: búsqueda por la clave primaria
+    # de la tabla de cierre
+    query = sa.select(
+        sa.exists().where(
+            UsuarioRed.ancestro == identificacion_autenticado,
+            UsuarioRed.descendiente == identificacion_perfil,
+            UsuarioRed.profundidad > 0,
         )
-        SELECT EXISTS(
-            SELECT 1 FROM red_descendente 
-            WHERE identificacion = :id_perfil
-        ) as tiene_permiso
-    """)
-
-    resultado = await sesion.execute(
-        query,
-        {
-            "id_autenticado": identificacion_autenticado,
-            "id_perfil": identificacion_perfil,
-        },
     )
 
+    resultado = await sesion.execute(query)
+
     return resultado.scalar() or False
 
 
@@ -312,44 +433,55 @@ async def obtener_referidos_directos_agrupados(
         Diccionario con referidos agrupados por rol
     """
     from collections import defaultdict
-    from sqlmodel import func
+    from sqlalchemy.orm import aliased
+
+    # Cantidad de referidos de cada referido, en la misma consulta
+    # (subconsulta correlacionada sobre ix_usuario_asignado_a)
+    hijo = aliased(Usuario, name="hijo")
+    total_referidos = (
+        sa.select(sa.func.count())
+        .where(hijo.asignado_a == Usuario.identificacion)
+        .correlate(Usuario)
+        .scalar_subquery()
+        .label("total_referidos")
+    )
 
-    # Consultar referidos directos
+    # Consultar referidos directos (solo las columnas que se muestran)
     statement = (
-        select(Usuario)
+        sa.select(
+            Usuario.identificacion,
+            Usuario.nombres,
+            Usuario.apellidos,
+            Usuario.rol,
+            Usuario.mesa_votacion,
+            Usuario.lugar_votacion,
+            Usuario.telefono,
+            total_referidos,
+        )
         .where(Usuario.asignado_a == identificacion)
         .order_by(Usuario.rol, Usuario.fecha_registro.desc())
     )
 
     resultado = await sesion.execute(statement)
-    referidos = resultado.scalars().all()
 
     # Agrupar por rol
     agrupados = defaultdict(list)
-    for ref in referidos:
+    for ref in resultado.all():
         agrupados[ref.rol.value].append(
             {
                 "identificacion": ref.identificacion,
-                "nombre_completo": ref.nombre_completo,
+                "nombre_completo": f"{ref.nombres} {ref.apellidos}",
                 "nombres": ref.nombres,
                 "apellidos": ref.apellidos,
                 "rol": ref.rol.value,
                 "mesa_votacion": ref.mesa_votacion,
                 "lugar_votacion": ref.lugar_votacion,
                 "telefono": ref.telefono,
-                "tiene_referidos": False,  # Se actualiza después
+                "total_referidos": ref.total_referidos,
+                "tiene_referidos": ref.total_referidos > 0,
             }
         )
 
-    # Verificar cuáles tienen referidos (para mostrar ícono de expandir)
-    for rol_grupo in agrupados.values():
-        for persona in rol_grupo:
-            count_query = select(func.count(Usuario.identificacion)).where(
-                Usuario.asignado_a == persona["identificacion"]
-            )
-            count_result = await sesion.execute(count_query)
-            persona["tiene_referidos"] = count_result.scalar() > 0
-
     return dict(agrupados)
 
 
@@ -357,7 +489,11 @@ async def obtener_metricas_red_completa(
     sesion: AsyncSession, identificacion: str
 ) -> dict:
     """
-    Calcula métricas de toda la red descendente usando CTE recursiva.
+    Lee las métricas de toda la red descendente.
+
+    Los totales se guardan por usuario en usuario_red_metricas y
+    usuario_red_rol, y los triggers los actualizan al crear o reasignar
+    votantes, así que leerlos no depende del tamaño de la red.
 
     Args:
         sesion: Sesión de base de datos
@@ -366,39 +502,34 @@ async def obtener_metricas_red_completa(
     Returns:
         Diccionario con métricas de la red completa
     """
-    from sqlalchemy import text
-
-    query = text("""
-        WITH RECURSIVE red_completa AS (
-            SELECT identificacion, rol, 1 as nivel
-            FROM usuario
-            WHERE asignado_a = :id_raiz
-            
-            UNION ALL
-            
-            SELECT u.identificacion, u.rol, r.nivel + 1
-            FROM usuario u
-            INNER JOIN red_completa r ON u.asignado_a = r.identificacion
+    query = (
+        sa.select(
+            UsuarioRedMetricas.total_red,
+            UsuarioRedMetricas.niveles_profundidad,
+            UsuarioRedRol.rol,
+            UsuarioRedRol.cantidad,
+        )
+        .outerjoin(
+            UsuarioRedRol,
+            sa.and_(
+                UsuarioRedRol.ancestro == UsuarioRedMetricas.identificacion,
+                UsuarioRedRol.cantidad > 0,
+            ),
         )
-        SELECT 
-            COUNT(*) as total,
-            MAX(nivel) as niveles_profundidad,
-            rol,
-            COUNT(*) as cantidad
-        FROM red_completa
-        GROUP BY rol
-    """)
-
-    resultado = await sesion.execute(query, {"id_raiz": identificacion})
-    filas = resultado.fetchall()
+        .where(UsuarioRedMetricas.identificacion == identificacion)
+        .order_by(UsuarioRedRol.rol)
+    )
+
+    resultado = await sesion.execute(query)
+    filas = resultado.all()
 
     if not filas:
         return {"total_red": 0, "niveles_profundidad": 0, "por_rol": {}}
 
     return {
-        "total_red": sum(f.cantidad for f in filas),
-        "niveles_profundidad": max((f.niveles_profundidad for f in filas), default=0),
-        "por_rol": {f.rol: f.cantidad for f in filas},
+        "total_red": filas[0].total_red,
+        "niveles_profundidad": filas[0].niveles_profundidad,
+        "por_rol": {f.rol.value: f.cantidad for f in filas if f.rol is not None},
     }
 
 
@@ -420,45 +551,43 @@ async def ver_perfil_votante(
     Control de acceso:
     - El usuario puede ver su propio perfil
     - El usuario puede ver perfiles de sus referidos descendentes
+
+    Permiso, usuario, referente, referidos y métricas se leen en una sola
+    consulta (ver app/services/perfil.py).
     """
-    # Verificar permiso
-    tiene_permiso = await verificar_permiso_ver_perfil(
+    # Permiso desde la caché de la red; si no alcanza, se verifica
+    # dentro de la misma consulta del perfil
+    permitido = await puede_ver_perfil(
         sesion, identificacion, usuario_autenticado.identificacion
     )
-
-    if not tiene_permiso:
-        request.session.setdefault("flash_messages", []).append(
-            "No tienes permiso para ver este perfil"
+    perfil = None
+    if permitido is not False:
+        perfil = await cargar_perfil(
+            sesion, identificacion, usuario_autenticado.identificacion, permitido
         )
-        return RedirectResponse(url="/votantes/", status_code=303)
 
-    # Obtener usuario
-    usuario = await sesion.get(Usuario, identificacion)
-    if not usuario:
+    # Dentro de la red del usuario, la fila faltante es un usuario borrado;
+    # si el permiso se verificaba en la consulta, se trata como sin permiso
+    if perfil is None and permitido:
         request.session.setdefault("flash_messages", []).append("Usuario no encontrado")
         return RedirectResponse(url="/votantes/", status_code=303)
 
-    # Obtener referidos directos agrupados por rol
-    referidos_agrupados = await obtener_referidos_directos_agrupados(
-        sesion, identificacion
-    )
-
-    # Obtener métricas de red completa
-    metricas = await obtener_metricas_red_completa(sesion, identificacion)
-
-    # Obtener referente (si tiene)
-    referente = None
-    if usuario.asignado_a:
-        referente = await sesion.get(Usuario, usuario.asignado_a)
+    if not perfil or not perfil.permitido:
+        request.session.setdefault("flash_messages", []).append(
+            "No tienes permiso para ver este perfil"
+        )
+        return RedirectResponse(url="/votantes/", status_code=303)
 
     return jinja_templates.TemplateResponse(
         "votantes/ver.html",
         {
             "request": request,
-            "usuario": usuario,
-            "referidos_agrupados": referidos_agrupados,
-            "metricas": metricas,
-            "referente": referente,
+            "usuario": perfil.usuario,
+            "referidos_agrupados": perfil.referidos_agrupados,
+            "metricas": perfil.metricas,
+            "referente": perfil.referente,
+            "ancestros": perfil.ancestros,
+            "identificacion_autenticado": usuario_autenticado.identificacion,
         },
     )
 
@@ -466,6 +595,7 @@ async def ver_perfil_votante(
 @router.get("/{identificacion}/referidos")
 async def obtener_referidos_api(
     identificacion: str,
+    request: Request,
     sesion: AsyncSession = Depends(obtener_sesion),
     usuario_autenticado: Usuario = Depends(requerir_autenticacion),
 ):
@@ -473,40 +603,131 @@ async def obtener_referidos_api(
     API JSON para obtener referidos directos de un usuario.
     Usado para carga dinámica al expandir nodos en el árbol.
 
+    Parámetros de consulta:
+    - depth: niveles a devolver anidados (por defecto 1, máximo
+      PROFUNDIDAD_MAXIMA); ver app/services/arbol.py
+
     Returns:
         JSON con referidos agrupados por rol
     """
-    # Verificar permiso
-    tiene_permiso = await verificar_permiso_ver_perfil(
+    from fastapi import HTTPException
+
+    profundidad = normalizar_limite(
+        request.query_params.get("depth"), defecto=1, maximo=PROFUNDIDAD_MAXIMA
+    )
+    if profundidad > 1:
+        subarbol = None
+        if await verificar_permiso_ver_perfil(
+            sesion, identificacion, usuario_autenticado.identificacion
+        ):
+            subarbol = await cargar_subarbol(sesion, identificacion, profundidad)
+        if not subarbol:
+            raise HTTPException(status_code=403, detail="No autorizado")
+        return subarbol
+
+    permitido = await puede_ver_perfil(
         sesion, identificacion, usuario_autenticado.identificacion
     )
+    perfil = None
+    if permitido is not False:
+        perfil = await cargar_perfil(
+            sesion, identificacion, usuario_autenticado.identificacion, permitido
+        )
 
-    if not tiene_permiso:
-        from fastapi import HTTPException
-
-        raise HTTPException(status_code=403, detail="No autorizado")
-
-    # Obtener usuario
-    usuario = await sesion.get(Usuario, identificacion)
-    if not usuario:
-        from fastapi import HTTPException
-
+    # Dentro de la red del usuario, la fila faltante es un usuario borrado;
+    # si el permiso se verificaba en la consulta, se trata como sin permiso
+    if perfil is None and permitido:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
-    # Obtener referidos agrupados
-    referidos_por_rol = await obtener_referidos_directos_agrupados(
-        sesion, identificacion
-    )
+    if not perfil or not perfil.permitido:
+        raise HTTPException(status_code=403, detail="No autorizado")
 
-    # Obtener métricas
-    metricas = await obtener_metricas_red_completa(sesion, identificacion)
+    referidos_por_rol = perfil.referidos_agrupados
 
     return {
         "identificacion": identificacion,
-        "nombre_completo": usuario.nombre_completo,
+        "nombre_completo": perfil.usuario.nombre_completo,
         "referidos_por_rol": referidos_por_rol,
         "total_referidos_directos": sum(
             len(personas) for personas in referidos_por_rol.values()
         ),
-        "total_red_completa": metricas["total_red"],
+        "total_red_completa": perfil.metricas["total_red"],
+    }
+
+
+@router.get("/{identificacion}/ancestros")
+async def obtener_ancestros_api(
+    identificacion: str,
+    sesion: AsyncSession = Depends(obtener_sesion),
+    usuario_autenticado: Usuario = Depends(requerir_autenticacion),
+):
+    """
+    API JSON con la cadena de referentes de un usuario hasta la raíz.
+    Usado para el breadcrumb jerárquico del perfil.
+
+    Returns:
+        JSON con los ancestros, del más lejano (Estratega) al referente directo
+    """
+    from fastapi import HTTPException
+
+    if not await verificar_permiso_ver_perfil(
+        sesion, identificacion, usuario_autenticado.identificacion
+    ):
+        raise HTTPException(status_code=403, detail="No autorizado")
+
+    return {
+        "identificacion": identificacion,
+        "ancestros": await obtener_ancestros(sesion, identificacion),
     }
+
+
+@router.post("/{identificacion}/reasignar")
+async def reasignar_red_api(
+    identificacion: str,
+    request: Request,
+    destino: str = Form(...),
+    incluir: bool = Form(False),
+    csrf_token: str = Form(...),
+    sesion: AsyncSession = Depends(obtener_sesion),
+    usuario: Usuario = Depends(requerir_autenticacion),
+):
+    """
+    Mueve la red de un usuario bajo otro referente (ver
+    app/services/reasignacion.py).
+
+    Formulario:
+    - destino: identificación del nuevo referente
+    - incluir: si es verdadero se mueve también al usuario; si no, solo
+      sus referidos directos con sus redes (el usuario sale de la campaña)
+    - csrf_token: token de la sesión
+
+    Ambos usuarios deben pertenecer a la red de quien hace el cambio. Lo
+    revisa urna_mover_red contra la tabla de cierre, en la misma
+    transacción que el cambio (no la caché de redes del proceso).
+
+    Returns:
+        JSON con la cantidad de personas movidas
+    """
+    from fastapi import HTTPException
+
+    if usuario.rol not in [
+        RolUsuario.JEFE_DE_ZONA,
+        RolUsuario.COORDINADOR,
+        RolUsuario.ESTRATEGA,
+    ]:
+        raise HTTPException(status_code=403, detail="No autorizado")
+
+    expected_csrf = request.session.get("csrf_token")
+    if not expected_csrf or csrf_token != expected_csrf:
+        raise HTTPException(status_code=400, detail="Solicitud inválida (CSRF)")
+
+    try:
+        movidos = await mover_red(
+            sesion, identificacion, destino, incluir, usuario.identificacion
+        )
+    except PermissionError:
+        raise HTTPException(status_code=403, detail="No autorizado")
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+    return {"origen": identificacion, "destino": destino, "movidos": movidos}
@@ -0,0 +1,36 @@
+# ./app/services/__init__.py
+
+"""
+Servicios de consulta y lógica de negocio sobre la base de datos
+"""
+
+from .autorizacion import puede_ver_perfil, invalidar_red
+from .busqueda import buscar_votantes, normalizar
+from .filtros import ConsultaFiltros, parsear_filtros, compilar_filtros
+from .jerarquia import GrafoJerarquia, MOTOR_JERARQUIA
+from .listado import (
+    PaginaVotantes,
+    codificar_cursor,
+    decodificar_cursor,
+    normalizar_limite,
+    paginar_votantes,
+)
+from .sugerencias import sugerir_votantes
+
+__all__ = [
+    "puede_ver_perfil",
+    "invalidar_red",
+    "buscar_votantes",
+    "normalizar",
+    "ConsultaFiltros",
+    "parsear_filtros",
+    "compilar_filtros",
+    "GrafoJerarquia",
+    "MOTOR_JERARQUIA",
+    "PaginaVotantes",
+    "codificar_cursor",
+    "decodificar_cursor",
+    "normalizar_limite",
+    "paginar_votantes",
+    "sugerir_votantes",
+]
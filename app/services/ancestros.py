@@ -0,0 +1,155 @@
+# ./app/services/ancestros.py
+
+"""
+Cadena de referentes de un usuario (breadcrumb hasta el Estratega)
+
+La cadena completa sale de la tabla de cierre usuario_red en una sola
+lectura por el índice (descendiente, profundidad), sin subir por
+asignado_a un nivel a la vez. Como cambia muy poco, se guarda por
+usuario en CACHE_ANCESTROS; la vista de perfil la trae dentro de su
+consulta compuesta y deja la caché lista para la API.
+"""
+
+from typing import Any, Optional
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSON, aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models import Usuario, UsuarioRed, RolUsuario
+from app.utils.cache import CacheTTL
+
+# Cadenas por identificación; se limpia al reasignar votantes
+CACHE_ANCESTROS = CacheTTL(ttl=600, maximo=4096)
+
+
+def _ancestro(
+    identificacion: str, nombres: str, apellidos: str, rol: Any, nivel: int
+) -> dict[str, Any]:
+    """Elemento de la cadena en el formato de la API"""
+    # Desde JSON llega el nombre del miembro del enum (ej. JEFE_DE_ZONA)
+    if isinstance(rol, str) and rol in RolUsuario.__members__:
+        rol = RolUsuario[rol]
+    return {
+        "identificacion": identificacion,
+        "nombre_completo": f"{nombres} {apellidos}",
+        "nombres": nombres,
+        "apellidos": apellidos,
+        "rol": rol.value if rol else None,
+        "nivel": nivel,
+    }
+
+
+def consulta_ancestros(identificacion: str) -> sa.Select:
+    """
+    SELECT de la cadena de referentes, del más lejano al directo
+
+    Args:
+        identificacion: ID del usuario
+    """
+    ancestro = aliased(Usuario, name="ancestro")
+    return (
+        sa.select(
+            ancestro.identificacion,
+            ancestro.nombres,
+            ancestro.apellidos,
+            ancestro.rol,
+            UsuarioRed.profundidad,
+        )
+        .join(ancestro, ancestro.identificacion == UsuarioRed.ancestro)
+        .where(
+            UsuarioRed.descendiente == identificacion,
+            UsuarioRed.profundidad > 0,
+        )
+        .order_by(UsuarioRed.profundidad.desc())
+    )
+
+
+def subconsulta_ancestros(descendiente: Any) -> Any:
+    """
+    La misma cadena como arreglo JSON, para componerla en otra consulta
+
+    Args:
+        descendiente: Columna con la identificación del usuario
+
+    Returns:
+        Subconsulta escalar correlacionada
+    """
+    ancestro = aliased(Usuario, name="ancestro")
+    persona = sa.func.json_build_object(
+        "identificacion",
+        ancestro.identificacion,
+        "nombres",
+        ancestro.nombres,
+        "apellidos",
+        ancestro.apellidos,
+        "rol",
+        ancestro.rol,
+        "nivel",
+        UsuarioRed.profundidad,
+    )
+    return (
+        sa.select(
+            sa.func.json_agg(
+                aggregate_order_by(persona, UsuarioRed.profundidad.desc()),
+                type_=JSON,
+            )
+        )
+        .join(ancestro, ancestro.identificacion == UsuarioRed.ancestro)
+        .where(UsuarioRed.descendiente == descendiente, UsuarioRed.profundidad > 0)
+        .correlate_except(UsuarioRed, ancestro)
+        .scalar_subquery()
+    )
+
+
+def guardar_ancestros(
+    identificacion: str, filas: Optional[list[dict[str, Any]]]
+) -> list[dict[str, Any]]:
+    """
+    Convierte la cadena leída como JSON y la deja en la caché
+
+    Args:
+        identificacion: ID del usuario
+        filas: Resultado de subconsulta_ancestros (None si no tiene)
+
+    Returns:
+        Cadena en el formato de la API
+    """
+    cadena = [
+        _ancestro(
+            f["identificacion"], f["nombres"], f["apellidos"], f["rol"], f["nivel"]
+        )
+        for f in filas or []
+    ]
+    CACHE_ANCESTROS.guardar(identificacion, cadena)
+    return cadena
+
+
+async def obtener_ancestros(
+    sesion: AsyncSession, identificacion: str
+) -> list[dict[str, Any]]:
+    """
+    Cadena de referentes de un usuario (desde la caché si está)
+
+    Args:
+        sesion: Sesión de base de datos
+        identificacion: ID del usuario
+
+    Returns:
+        Lista del referente más lejano (la raíz) al directo
+    """
+    cadena = CACHE_ANCESTROS.obtener(identificacion)
+    if cadena is None:
+        resultado = await sesion.execute(consulta_ancestros(identificacion))
+        cadena = [
+            _ancestro(f.identificacion, f.nombres, f.apellidos, f.rol, f.profundidad)
+            for f in resultado.all()
+        ]
+        CACHE_ANCESTROS.guardar(identificacion, cadena)
+    return cadena
+
+
+def invalidar_ancestros() -> None:
+    """Descarta las cadenas guardadas (llamar después de reasignar)"""
+    CACHE_ANCESTROS.limpiar()
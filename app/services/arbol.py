@@ -0,0 +1,190 @@
+# ./app/services/arbol.py
+
+"""
+Subárbol de referidos de varios niveles en una sola consulta
+
+El árbol de votantes/ver.html pedía /votantes/{id}/referidos una vez por
+nodo expandido. Con ?depth=N la API devuelve los siguientes N niveles
+anidados, leídos de la tabla de cierre usuario_red (un único SELECT, sin
+recursión), para que la vista precargue lo que el usuario va a abrir.
+
+Los niveles se incluyen completos o no se incluyen: si el siguiente nivel
+haría superar MAXIMO_NODOS, se corta ahí y esos nodos quedan con
+referidos_por_rol = None (la vista los pide al expandirlos). El primer
+nivel siempre se incluye, como en la API de un nivel. El corte sale de
+los conteos por nivel de usuario_red_nivel, así que los niveles que no
+se devuelven no se leen.
+"""
+
+from typing import Any, Optional
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models import Usuario, UsuarioRed, UsuarioRedMetricas, UsuarioRedNivel
+
+PROFUNDIDAD_MAXIMA = 5
+MAXIMO_NODOS = 500
+
+
+def consulta_subarbol(
+    identificacion: str, profundidad: int, maximo: int = MAXIMO_NODOS
+) -> sa.Select:
+    """
+    Arma el SELECT del subárbol acotado
+
+    Args:
+        identificacion: ID de la raíz
+        profundidad: Niveles bajo la raíz
+        maximo: Máximo de nodos (sin contar la raíz)
+
+    Returns:
+        SELECT ordenado por nivel, rol y fecha de registro
+    """
+    # Nivel de corte: el último cuyo acumulado de nodos no supera el máximo
+    # (el primero siempre), leído de los conteos por nivel antes de tocar
+    # a ninguna persona
+    niveles = (
+        sa.select(
+            UsuarioRedNivel.profundidad,
+            sa.func.sum(UsuarioRedNivel.cantidad)
+            .over(order_by=UsuarioRedNivel.profundidad)
+            .label("acumulado"),
+        )
+        .where(
+            UsuarioRedNivel.ancestro == identificacion,
+            UsuarioRedNivel.profundidad <= profundidad,
+        )
+        .subquery("niveles")
+    )
+    corte = sa.select(
+        sa.func.greatest(
+            sa.func.coalesce(
+                sa.func.max(niveles.c.profundidad).filter(
+                    niveles.c.acumulado <= maximo
+                ),
+                0,
+            ),
+            1,
+        )
+    ).scalar_subquery()
+
+    hijo = aliased(Usuario, name="hijo")
+    total_hijos = (
+        sa.select(sa.func.count())
+        .where(hijo.asignado_a == Usuario.identificacion)
+        .correlate(Usuario)
+        .scalar_subquery()
+    )
+
+    # El join con usuario y el conteo de hijos solo corren para los niveles
+    # que se devuelven
+    return (
+        sa.select(
+            UsuarioRed.profundidad,
+            Usuario.identificacion,
+            Usuario.asignado_a,
+            Usuario.nombres,
+            Usuario.apellidos,
+            Usuario.rol,
+            Usuario.mesa_votacion,
+            Usuario.lugar_votacion,
+            Usuario.telefono,
+            Usuario.fecha_registro,
+            total_hijos.label("total_referidos"),
+            sa.func.coalesce(UsuarioRedMetricas.total_red, 0).label("total_red"),
+        )
+        .join(Usuario, Usuario.identificacion == UsuarioRed.descendiente)
+        .outerjoin(
+            UsuarioRedMetricas,
+            UsuarioRedMetricas.identificacion == UsuarioRed.descendiente,
+        )
+        .where(
+            UsuarioRed.ancestro == identificacion,
+            UsuarioRed.profundidad <= sa.func.least(profundidad, corte),
+        )
+        .order_by(
+            UsuarioRed.profundidad,
+            Usuario.rol,
+            Usuario.fecha_registro.desc(),
+        )
+    )
+
+
+def _persona(fila: Any) -> dict[str, Any]:
+    """Nodo en el formato de la API de referidos"""
+    return {
+        "identificacion": fila.identificacion,
+        "nombre_completo": f"{fila.nombres} {fila.apellidos}",
+        "nombres": fila.nombres,
+        "apellidos": fila.apellidos,
+        "rol": fila.rol.value,
+        "mesa_votacion": fila.mesa_votacion,
+        "lugar_votacion": fila.lugar_votacion,
+        "telefono": fila.telefono,
+        "total_referidos": fila.total_referidos,
+        "tiene_referidos": fila.total_referidos > 0,
+        "total_red": fila.total_red,
+        "referidos_por_rol": None,
+    }
+
+
+async def cargar_subarbol(
+    sesion: AsyncSession,
+    identificacion: str,
+    profundidad: int,
+    maximo: int = MAXIMO_NODOS,
+) -> Optional[dict[str, Any]]:
+    """
+    Obtiene el subárbol anidado de un usuario (el permiso se verifica antes)
+
+    Args:
+        sesion: Sesión de base de datos
+        identificacion: ID de la raíz
+        profundidad: Niveles bajo la raíz
+        maximo: Máximo de nodos
+
+    Returns:
+        Diccionario con la forma de /votantes/{id}/referidos, donde cada
+        persona trae sus propios referidos_por_rol (None si no se cargaron),
+        o None si el usuario no existe
+    """
+    resultado = await sesion.execute(
+        consulta_subarbol(identificacion, profundidad, maximo)
+    )
+    filas = resultado.all()
+    if not filas or filas[0].profundidad != 0:
+        return None
+
+    raiz = filas[0]
+    nivel_cargado = filas[-1].profundidad
+    nodos = {}
+    # Ordenadas por nivel: cada referente aparece antes que sus referidos,
+    # y dentro del nivel por rol y fecha (el orden de inserción se conserva)
+    for fila in filas:
+        persona = _persona(fila)
+        # Los nodos del último nivel cargado no traen sus referidos
+        if fila.profundidad < nivel_cargado:
+            persona["referidos_por_rol"] = {}
+        nodos[fila.identificacion] = persona
+        if fila.profundidad > 0:
+            nodos[fila.asignado_a]["referidos_por_rol"].setdefault(
+                persona["rol"], []
+            ).append(persona)
+
+    referidos_por_rol = nodos[raiz.identificacion]["referidos_por_rol"] or {}
+    return {
+        "identificacion": raiz.identificacion,
+        "nombre_completo": f"{raiz.nombres} {raiz.apellidos}",
+        "referidos_por_rol": referidos_por_rol,
+        "total_referidos_directos": raiz.total_referidos,
+        "total_red_completa": raiz.total_red,
+        "profundidad": nivel_cargado,
+        "truncado": nivel_cargado < profundidad
+        and any(
+            fila.total_referidos > 0
+            for fila in filas
+            if fila.profundidad == nivel_cargado
+        ),
+    }
@@ -0,0 +1,137 @@
+# ./app/services/autorizacion.py
+
+"""
+Caché de autorización: la red descendente de cada usuario autenticado
+
+Explorar el árbol pide permiso en cada clic ("¿X es de mi red?"). La
+primera vez se lee la red completa del usuario desde usuario_red y se
+guarda como arreglo ordenado de enteros sin signo (8 bytes por persona);
+los siguientes clics se responden con búsqueda binaria, sin consultar.
+
+- Cada entrada vence a los CACHE_RED.ttl segundos y hay un máximo de
+  entradas (LRU), así que la memoria queda acotada.
+- Las redes de más de MAXIMO_DESCENDIENTES personas no se guardan: queda
+  una marca (RED_DEMASIADO_GRANDE) con el mismo TTL, y mientras dure cada
+  petición va directo a la búsqueda por clave primaria en usuario_red, sin
+  volver a leer la red.
+- invalidar_red() descarta las entradas afectadas al crear o reasignar
+  votantes en este proceso; en los demás workers las vence el TTL.
+"""
+
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Optional
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import UsuarioRed
+from app.utils.cache import CacheTTL
+
+MAXIMO_DESCENDIENTES = 100_000
+
+CACHE_RED = CacheTTL(ttl=60, maximo=64)
+
+# Valor guardado en CACHE_RED para las redes que no caben
+RED_DEMASIADO_GRANDE = "demasiado_grande"
+
+
+def codificar_id(identificacion: str) -> Optional[int]:
+    """
+    Convierte una cédula a entero conservando su longitud (para que
+    "0123456" y "123456" no coincidan)
+
+    Returns:
+        Entero codificado, o None si no es una cédula numérica válida
+    """
+    if not identificacion.isdigit() or len(identificacion) > 10:
+        return None
+    return int(identificacion) << 4 | len(identificacion)
+
+
+def _contiene(red: array, identificacion: str) -> bool:
+    """Búsqueda binaria en el arreglo ordenado de una red"""
+    codigo = codificar_id(identificacion)
+    if codigo is None:
+        return False
+    posicion = bisect_left(red, codigo)
+    return posicion < len(red) and red[posicion] == codigo
+
+
+async def obtener_red(sesion: AsyncSession, identificacion: str) -> Optional[array]:
+    """
+    Red descendente de un usuario como arreglo ordenado (desde la caché)
+
+    Args:
+        sesion: Sesión de base de datos
+        identificacion: ID del usuario raíz
+
+    Returns:
+        Arreglo ordenado de IDs codificados, o None si la red es demasiado
+        grande para guardarla
+    """
+    red = CACHE_RED.obtener(identificacion)
+    if red is RED_DEMASIADO_GRANDE:
+        return None
+    if red is not None:
+        return red
+
+    statement = (
+        sa.select(UsuarioRed.descendiente)
+        .where(UsuarioRed.ancestro == identificacion, UsuarioRed.profundidad > 0)
+        .limit(MAXIMO_DESCENDIENTES + 1)
+    )
+    resultado = await sesion.execute(statement)
+    ids = resultado.scalars().all()
+    if len(ids) > MAXIMO_DESCENDIENTES:
+        CACHE_RED.guardar(identificacion, RED_DEMASIADO_GRANDE)
+        return None
+
+    codigos = (codificar_id(i) for i in ids)
+    red = array("Q", sorted(c for c in codigos if c is not None))
+    CACHE_RED.guardar(identificacion, red)
+    return red
+
+
+async def puede_ver_perfil(
+    sesion: AsyncSession, identificacion_perfil: str, identificacion_autenticado: str
+) -> Optional[bool]:
+    """
+    Responde si el perfil es propio o de la red del usuario autenticado
+
+    Args:
+        sesion: Sesión de base de datos
+        identificacion_perfil: ID del perfil que se quiere ver
+        identificacion_autenticado: ID del usuario autenticado
+
+    Returns:
+        True/False, o None si la red no cabe en la caché (el llamador debe
+        verificar contra la base de datos)
+    """
+    if identificacion_perfil == identificacion_autenticado:
+        return True
+    red = await obtener_red(sesion, identificacion_autenticado)
+    if red is None:
+        return None
+    return _contiene(red, identificacion_perfil)
+
+
+def invalidar_red(identificaciones: Iterable[str]) -> None:
+    """
+    Descarta las redes guardadas que cambian cuando se agregan o quitan
+    personas debajo de los usuarios indicados: la de ellos mismos y la de
+    cualquier usuario que los tenga en su red.
+
+    Args:
+        identificaciones: Usuarios cuyo subárbol cambió (ej. el referente
+            de un votante nuevo, o el anterior y el nuevo en una reasignación)
+    """
+    identificaciones = set(identificaciones)
+    for raiz, red in CACHE_RED.items():
+        if raiz in identificaciones:
+            CACHE_RED.invalidar(raiz)
+        # Una red que no cabía sigue sin caber aunque cambie
+        elif red is not RED_DEMASIADO_GRANDE and any(
+            _contiene(red, i) for i in identificaciones
+        ):
+            CACHE_RED.invalidar(raiz)
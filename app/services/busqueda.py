@@ -0,0 +1,144 @@
+# ./app/services/busqueda.py
+
+"""
+Búsqueda de votantes insensible a tildes y mayúsculas
+
+Se apoya en los objetos creados por app/config/ddl.py:
+
+- urna_nombre_busqueda(nombres, apellidos): nombre completo normalizado,
+  indexado con GIN + pg_trgm para que LIKE '%texto%' no recorra la tabla
+- índices varchar_pattern_ops para buscar cédula y teléfono por prefijo
+
+Así "jose perez" encuentra "José Pérez" sin escanear toda la tabla usuario.
+"""
+
+from typing import Any, Optional
+import unicodedata
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from app.models import Usuario
+
+
+def normalizar(texto: Optional[str]) -> str:
+    """
+    Quita tildes y pasa a minúsculas (equivalente a normalize() en utils.js
+    y a urna_normalizar() en PostgreSQL)
+
+    Args:
+        texto: Texto a normalizar
+
+    Returns:
+        Texto sin diacríticos y en minúsculas
+    """
+    descompuesto = unicodedata.normalize("NFD", texto or "")
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+
+def escapar_like(valor: str) -> str:
+    """Escapa los comodines de LIKE para buscar el texto literal"""
+    return valor.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def expresion_nombre(modelo: Any = Usuario) -> Any:
+    """
+    Expresión indexada del nombre completo normalizado
+
+    Debe coincidir exactamente con la del índice ix_usuario_nombre_trgm.
+
+    Args:
+        modelo: Usuario o un alias de Usuario
+
+    Returns:
+        Expresión SQL urna_nombre_busqueda(nombres, apellidos)
+    """
+    return sa.func.urna_nombre_busqueda(modelo.nombres, modelo.apellidos)
+
+
+def condicion_nombre(texto: str, modelo: Any = Usuario) -> Any:
+    """
+    Todas las palabras del texto deben aparecer en el nombre completo
+
+    Args:
+        texto: Texto libre (se normaliza antes de comparar)
+        modelo: Usuario o un alias de Usuario
+
+    Returns:
+        Condición SQL
+    """
+    expresion = expresion_nombre(modelo)
+    palabras = normalizar(texto).split()
+    if not palabras:
+        return sa.true()
+    return sa.and_(
+        *[expresion.like(f"%{escapar_like(p)}%", escape="\\") for p in palabras]
+    )
+
+
+def condicion_texto(texto: str) -> Any:
+    """
+    Condición de búsqueda libre
+
+    - Solo dígitos: prefijo de cédula o teléfono
+    - Cualquier otro texto: palabras contenidas en el nombre completo
+
+    Args:
+        texto: Texto ingresado por el usuario
+
+    Returns:
+        Condición SQL
+    """
+    texto = texto.strip()
+    if texto.isdigit():
+        prefijo = f"{escapar_like(texto)}%"
+        return sa.or_(
+            Usuario.identificacion.like(prefijo, escape="\\"),
+            Usuario.telefono.like(prefijo, escape="\\"),
+        )
+    return condicion_nombre(texto)
+
+
+def relevancia(texto: str) -> Any:
+    """
+    Puntaje de relevancia para ordenar resultados (mayor es mejor)
+
+    Args:
+        texto: Texto ingresado por el usuario
+
+    Returns:
+        Expresión SQL numérica
+    """
+    texto = texto.strip()
+    if texto.isdigit():
+        # Coincidencia exacta de cédula primero, luego los prefijos
+        return sa.case((Usuario.identificacion == texto, 1.0), else_=0.0)
+    return sa.func.similarity(expresion_nombre(), normalizar(texto))
+
+
+async def buscar_votantes(
+    sesion: AsyncSession, texto: str, limite: int = 10
+) -> list[Usuario]:
+    """
+    Busca votantes y los ordena por relevancia
+
+    Args:
+        sesion: Sesión de base de datos
+        texto: Texto libre (nombre, cédula o teléfono)
+        limite: Máximo de resultados
+
+    Returns:
+        Lista de usuarios más relevantes
+    """
+    if not texto.strip():
+        return []
+
+    statement = (
+        select(Usuario)
+        .where(condicion_texto(texto))
+        .order_by(relevancia(texto).desc(), Usuario.identificacion)
+        .limit(limite)
+    )
+    resultado = await sesion.execute(statement)
+    return list(resultado.scalars().all())
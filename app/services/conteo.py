@@ -0,0 +1,95 @@
+# ./app/services/conteo.py
+
+"""
+Total de votantes del listado sin recorrer la tabla en cada petición
+
+- Sin filtros: se usa la estimación del planificador (pg_class.reltuples),
+  que se lee al instante. Si la tabla es pequeña o nunca se ha analizado,
+  se cuenta exacto.
+- Con filtros: COUNT(*) exacto, guardado por consulta normalizada hasta
+  que venza o se registre un votante (invalidar_conteos).
+"""
+
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Usuario
+from app.services.sugerencias import normalizar_consulta
+from app.utils.cache import CacheTTL
+
+# Por debajo de este tamaño el conteo exacto es barato
+UMBRAL_ESTIMACION = 100_000
+
+CACHE_CONTEOS = CacheTTL(ttl=300, maximo=256)
+
+
+@dataclass
+class Conteo:
+    """Total de registros y si es una estimación"""
+
+    total: int
+    aproximado: bool = False
+
+    @property
+    def texto(self) -> str:
+        """Texto para la interfaz: "1.234" exacto o "~1.2M" estimado"""
+        if not self.aproximado:
+            return f"{self.total:,}".replace(",", ".")
+        for divisor, sufijo in ((1_000_000, "M"), (1_000, "K")):
+            if self.total >= divisor:
+                return f"~{self.total / divisor:.1f}{sufijo}"
+        return f"~{self.total}"
+
+
+async def estimar_total(sesion: AsyncSession) -> int:
+    """
+    Filas estimadas de la tabla usuario según las estadísticas de PostgreSQL
+
+    Returns:
+        Estimación (-1 si la tabla nunca se ha analizado)
+    """
+    statement = sa.text(
+        "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:tabla)"
+    ).bindparams(tabla=Usuario.__tablename__)
+    resultado = await sesion.execute(statement)
+    return resultado.scalar() or -1
+
+
+async def contar_votantes(
+    sesion: AsyncSession, q: str = "", condiciones: Iterable[Any] = ()
+) -> Conteo:
+    """
+    Total de votantes que coinciden con la búsqueda del listado
+
+    Args:
+        sesion: Sesión de base de datos
+        q: Texto de búsqueda (clave de la caché)
+        condiciones: Condiciones WHERE compiladas a partir de q
+
+    Returns:
+        Conteo exacto o estimado
+    """
+    condiciones = list(condiciones)
+    if not condiciones:
+        estimado = await estimar_total(sesion)
+        if estimado >= UMBRAL_ESTIMACION:
+            return Conteo(total=estimado, aproximado=True)
+
+    clave = normalizar_consulta(q)
+    conteo = CACHE_CONTEOS.obtener(clave)
+    if conteo is None:
+        statement = sa.select(sa.func.count()).select_from(Usuario)
+        if condiciones:
+            statement = statement.where(*condiciones)
+        resultado = await sesion.execute(statement)
+        conteo = Conteo(total=resultado.scalar() or 0)
+        CACHE_CONTEOS.guardar(clave, conteo)
+    return conteo
+
+
+def invalidar_conteos() -> None:
+    """Descarta los conteos exactos guardados (llamar después de escribir)"""
+    CACHE_CONTEOS.limpiar()
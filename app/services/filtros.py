@@ -0,0 +1,192 @@
+# ./app/services/filtros.py
+
+"""
+Lenguaje de filtros de búsqueda de votantes del lado del servidor
+
+Interpreta la misma sintaxis que static/js/votantes/filters.js
+(pares "campo: valor" separados por comas y tokens libres) y la traduce
+a condiciones SQL que PostgreSQL puede resolver con índices:
+
+- igualdad en rol, mesa_votacion y sexo
+- prefijo en identificacion, telefono y asignado_a
+- trigramas sobre el nombre normalizado (ver app/services/busqueda.py)
+- coincidencia parcial en lugar de votación
+
+Los textos se comparan sin tildes ni mayúsculas (urna_normalizar), como
+en filters.js: "María" y "MARIA" dan los mismos resultados, y así
+comparten entrada en CACHE_SUGERENCIAS.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import sqlalchemy as sa
+from sqlalchemy.orm import aliased
+from sqlmodel import select
+
+from app.models import Usuario, RolUsuario, TipoSexo
+from app.services.busqueda import (
+    condicion_nombre,
+    condicion_texto,
+    escapar_like,
+    normalizar,
+)
+
+# Mapeo de claves de búsqueda a campos (igual que keyMap en filters.js)
+MAPA_CLAVES = {
+    "nombre": "name",
+    "nombres": "name",
+    "apellidos": "name",
+    "votante": "name",
+    "identificacion": "id",
+    "id": "id",
+    "cc": "id",
+    "telefono": "phone",
+    "puesto": "place",
+    "lugar": "place",
+    "lugar_votacion": "place",
+    "mesa": "table",
+    "mesa_votacion": "table",
+    "rol": "role",
+    "referido": "ref",
+    "asignado_a": "ref",
+    "referente": "ref",
+    "sexo": "sex",
+    "genero": "sex",
+}
+
+# Abreviaciones y sinónimos de sexo (igual que normalizeSexValue en filters.js)
+MAPA_SEXO = {
+    "m": "masculino",
+    "h": "masculino",
+    "hombre": "masculino",
+    "male": "masculino",
+    "masculino": "masculino",
+    "f": "femenino",
+    "mujer": "femenino",
+    "female": "femenino",
+    "femenino": "femenino",
+}
+
+
+@dataclass
+class ConsultaFiltros:
+    """Resultado de interpretar el texto de búsqueda"""
+
+    filtros: list[tuple[str, str]] = field(default_factory=list)
+    tokens: list[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def parsear_filtros(valor: Optional[str]) -> ConsultaFiltros:
+    """
+    Separa el texto de búsqueda en filtros "campo: valor" y tokens libres
+
+    Args:
+        valor: Texto ingresado en el buscador
+
+    Returns:
+        ConsultaFiltros con filtros, tokens y el error de sintaxis si lo hay
+    """
+    consulta = ConsultaFiltros()
+    crudo = (valor or "").strip()
+    if not crudo:
+        return consulta
+
+    limpio = crudo.replace("(", "").replace(")", "")
+    partes = [p.strip() for p in limpio.split(",") if p.strip()]
+
+    for parte in partes:
+        clave, separador, valor_filtro = parte.partition(":")
+        if not separador:
+            consulta.tokens.append(parte)
+            continue
+        valor_filtro = valor_filtro.strip()
+        if not valor_filtro:
+            consulta.error = "Sintaxis inválida: valor vacío"
+            continue
+        consulta.filtros.append((normalizar(clave.strip()), valor_filtro))
+
+    return consulta
+
+
+def _contiene(columna: Any, valor: str) -> Any:
+    return sa.func.urna_normalizar(columna).like(
+        f"%{escapar_like(normalizar(valor))}%", escape="\\"
+    )
+
+
+def _prefijo(columna: Any, valor: str) -> Any:
+    return columna.like(f"{escapar_like(valor)}%", escape="\\")
+
+
+def _condicion_filtro(campo: str, valor: str) -> Any:
+    """Traduce un filtro ya mapeado a su condición SQL"""
+    if campo == "name":
+        return condicion_nombre(valor)
+
+    if campo == "id":
+        if not valor.isdigit():
+            return sa.false()
+        return _prefijo(Usuario.identificacion, valor)
+
+    if campo == "phone":
+        if not valor.isdigit():
+            return sa.false()
+        return _prefijo(Usuario.telefono, valor)
+
+    if campo == "place":
+        return _contiene(Usuario.lugar_votacion, valor)
+
+    if campo == "table":
+        return sa.func.urna_normalizar(Usuario.mesa_votacion) == normalizar(valor)
+
+    if campo == "role":
+        buscado = normalizar(valor)
+        roles = [r for r in RolUsuario if buscado in normalizar(r.value)]
+        return Usuario.rol.in_(roles) if roles else sa.false()
+
+    if campo == "sex":
+        buscado = normalizar(valor)
+        buscado = MAPA_SEXO.get(buscado, buscado)
+        sexos = [s for s in TipoSexo if normalizar(s.value).startswith(buscado)]
+        return Usuario.sexo.in_(sexos) if sexos else sa.false()
+
+    if campo == "ref":
+        if valor.isdigit():
+            return _prefijo(Usuario.asignado_a, valor)
+        referente = aliased(Usuario)
+        ids_referentes = select(referente.identificacion).where(
+            condicion_nombre(valor, referente)
+        )
+        return Usuario.asignado_a.in_(ids_referentes)
+
+    return None
+
+
+def compilar_filtros(consulta: ConsultaFiltros) -> list:
+    """
+    Convierte una consulta interpretada en condiciones WHERE (unidas con AND)
+
+    Un campo desconocido deja la consulta sin resultados, igual que en el
+    filtrado del navegador, y se reporta en consulta.error.
+
+    Args:
+        consulta: Resultado de parsear_filtros
+
+    Returns:
+        Lista de condiciones SQLAlchemy
+    """
+    condiciones = []
+    for clave, valor in consulta.filtros:
+        campo = MAPA_CLAVES.get(clave, clave)
+        condicion = _condicion_filtro(campo, valor)
+        if condicion is None:
+            consulta.error = f"Campo desconocido: {clave}"
+            condicion = sa.false()
+        condiciones.append(condicion)
+
+    for token in consulta.tokens:
+        condiciones.append(condicion_texto(token))
+
+    return condiciones
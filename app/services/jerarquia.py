@@ -0,0 +1,549 @@
+# ./app/services/jerarquia.py
+
+"""
+Motor de jerarquía en memoria
+
+Todo URNA es un árbol por asignado_a. Este módulo carga una vez
+(identificacion, asignado_a, rol, calidad_score) y lo guarda en arreglos
+compactos indexados por entero, para responder preguntas del árbol sin
+consultar la base:
+
+- padre[i]: índice del referente (-1 en las raíces)
+- inicio_hijos / hijos: hijos en formato CSR (los de i están en
+  hijos[inicio_hijos[i]:inicio_hijos[i + 1]]); hijos_extra guarda los que
+  se agregan después de armar el grafo
+- profundidad[i] / altura[i]: nivel del nodo y niveles de su red
+- tamano[i], suma_calidad[i] y conteo_rol[c][i]: totales del subárbol de
+  i (sin contarlo a él), calculados de las hojas hacia arriba
+
+Ciclos: asignado_a se escribe también desde scripts e importaciones. Si
+una cadena de referentes vuelve sobre sí misma, el grafo la corta en un
+nodo (queda como raíz y se anota en GrafoJerarquia.ciclos), de modo que
+ningún recorrido queda girando. detectar_ciclos() busca lo mismo en la
+base con un recorrido acotado.
+
+Se usa array del módulo estándar (NumPy no es dependencia del proyecto):
+4-8 bytes por entero en vez de un objeto Python por valor.
+
+Actualización: las altas, cambios de rol y reasignaciones de usuarios sin
+red de este proceso se anotan con MOTOR_JERARQUIA.registrar() y se aplican
+en el lugar, recorriendo solo la cadena de ancestros. Mover una red
+completa (o un cambio que no se puede aplicar así) pide una recarga.
+Cada INTERVALO_RECARGA segundos se recarga todo desde la base (recoge
+cambios de otros workers). La recarga corre en segundo plano, fuera del
+event loop: las lecturas usan la versión anterior hasta que la nueva está
+lista.
+"""
+
+import asyncio
+import time
+from array import array
+from typing import Iterable, Optional
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import async_session_maker
+from app.config.ddl import PROFUNDIDAD_MAXIMA_RED
+from app.models import Usuario, RolUsuario
+
+INTERVALO_RECARGA = 300
+
+ROLES = list(RolUsuario)
+CODIGO_ROL = {rol: codigo for codigo, rol in enumerate(ROLES)}
+
+Fila = tuple[str, Optional[str], RolUsuario, int]
+
+
+def _romper_ciclos(padre: array) -> list[int]:
+    """
+    Corta los ciclos del arreglo de padres (lo modifica)
+
+    Sube desde cada nodo no visitado marcando la pasada; si el camino
+    llega a un nodo de la misma pasada, hay un ciclo y se corta ahí.
+
+    Returns:
+        Índices de los nodos que quedaron como raíz
+    """
+    # 0: sin visitar, -1: resuelto, k > 0: visto en la pasada k
+    estado = array("l", bytes(8 * len(padre)))
+    cortados = []
+    for inicio in range(len(padre)):
+        if estado[inicio]:
+            continue
+        pasada = inicio + 1
+        i = inicio
+        while i >= 0 and estado[i] == 0:
+            estado[i] = pasada
+            i = padre[i]
+        if i >= 0 and estado[i] == pasada:
+            padre[i] = -1
+            cortados.append(i)
+        i = inicio
+        while i >= 0 and estado[i] == pasada:
+            estado[i] = -1
+            i = padre[i]
+    return cortados
+
+
+class GrafoJerarquia:
+    """
+    Árbol de usuarios en arreglos (lo arma construir(); después solo lo
+    modifica aplicar())
+
+    Args:
+        ids: Identificación de cada nodo (el índice es la posición)
+        padre: Índice del referente de cada nodo, -1 si es raíz (los
+            ciclos se cortan aquí mismo)
+        rol: Código de rol de cada nodo (posición en RolUsuario)
+        calidad: calidad_score de cada nodo
+    """
+
+    def __init__(self, ids: list[str], padre: array, rol: array, calidad: array):
+        n = len(ids)
+        self.ids = ids
+        self.indice = {identificacion: i for i, identificacion in enumerate(ids)}
+        self.padre = padre
+        self.rol = rol
+        self.calidad = calidad
+        # Usuarios cuyo asignado_a cerraba un ciclo (tratados como raíz)
+        self.ciclos = [ids[i] for i in _romper_ciclos(padre)]
+
+        # Hijos en CSR: contar, acumular y repartir
+        inicio = array("l", bytes(8 * (n + 1)))
+        for p in padre:
+            if p >= 0:
+                inicio[p + 1] += 1
+        for i in range(n):
+            inicio[i + 1] += inicio[i]
+        hijos = array("l", bytes(8 * inicio[n]))
+        siguiente = array("l", inicio)
+        for i, p in enumerate(padre):
+            if p >= 0:
+                hijos[siguiente[p]] = i
+                siguiente[p] += 1
+        self.inicio_hijos = inicio
+        self.hijos = hijos
+        # Hijos agregados por aplicar(): el CSR no admite inserciones
+        self.hijos_extra: dict[int, list[int]] = {}
+
+        self._recorrer()
+
+    def _recorrer(self) -> None:
+        """Profundidad desde las raíces y totales de cada subárbol"""
+        n = len(self.ids)
+        padre, rol, calidad = self.padre, self.rol, self.calidad
+        inicio, hijos = self.inicio_hijos, self.hijos
+
+        # Orden en que cada nodo aparece después de su referente
+        profundidad = array("l", bytes(8 * n))
+        orden = array("l")
+        for raiz in range(n):
+            if padre[raiz] >= 0:
+                continue
+            orden.append(raiz)
+            pila = [raiz]
+            while pila:
+                nodo = pila.pop()
+                for k in range(inicio[nodo], inicio[nodo + 1]):
+                    hijo = hijos[k]
+                    profundidad[hijo] = profundidad[nodo] + 1
+                    orden.append(hijo)
+                    pila.append(hijo)
+
+        # Altura y totales de cada subárbol, de las hojas hacia arriba
+        altura = array("l", bytes(8 * n))
+        tamano = array("l", bytes(8 * n))
+        suma_calidad = array("q", bytes(8 * n))
+        conteo_rol = [array("l", bytes(8 * n)) for _ in ROLES]
+        for nodo in reversed(orden):
+            p = padre[nodo]
+            if p < 0:
+                continue
+            if altura[nodo] + 1 > altura[p]:
+                altura[p] = altura[nodo] + 1
+            tamano[p] += tamano[nodo] + 1
+            suma_calidad[p] += suma_calidad[nodo] + calidad[nodo]
+            conteo_rol[rol[nodo]][p] += 1
+            for conteo in conteo_rol:
+                if conteo[nodo]:
+                    conteo[p] += conteo[nodo]
+
+        self.profundidad = profundidad
+        self.altura = altura
+        self.tamano = tamano
+        self.suma_calidad = suma_calidad
+        self.conteo_rol = conteo_rol
+
+    @classmethod
+    def construir(cls, filas: Iterable[Fila]) -> "GrafoJerarquia":
+        """
+        Arma el grafo a partir de filas (identificacion, asignado_a, rol,
+        calidad_score). Un asignado_a que no existe se trata como raíz.
+
+        Args:
+            filas: Filas de la tabla usuario
+
+        Returns:
+            GrafoJerarquia listo para consultar
+        """
+        filas = list(filas)
+        ids = [f[0] for f in filas]
+        indice = {identificacion: i for i, identificacion in enumerate(ids)}
+        padre = array("l", (indice.get(f[1], -1) if f[1] else -1 for f in filas))
+        rol = array("b", (CODIGO_ROL.get(f[2], 0) for f in filas))
+        calidad = array("b", (f[3] or 0 for f in filas))
+        return cls(ids, padre, rol, calidad)
+
+    def filas(self) -> list[Fila]:
+        """Filas equivalentes a las usadas para construir el grafo"""
+        return [
+            (
+                identificacion,
+                self.ids[self.padre[i]] if self.padre[i] >= 0 else None,
+                ROLES[self.rol[i]],
+                self.calidad[i],
+            )
+            for i, identificacion in enumerate(self.ids)
+        ]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, identificacion: str) -> bool:
+        return identificacion in self.indice
+
+    def tamano_red(self, identificacion: str) -> int:
+        """Cantidad de descendientes (sin contar al usuario)"""
+        return self.tamano[self.indice[identificacion]]
+
+    def nivel(self, identificacion: str) -> int:
+        """Profundidad desde la raíz de su árbol (0 en las raíces)"""
+        return self.profundidad[self.indice[identificacion]]
+
+    def es_ancestro(self, ancestro: str, descendiente: str) -> bool:
+        """True si descendiente está en la red de ancestro (sin ser él mismo)"""
+        a = self.indice.get(ancestro)
+        d = self.indice.get(descendiente)
+        if a is None or d is None:
+            return False
+        i = self.padre[d]
+        while i >= 0:
+            if i == a:
+                return True
+            i = self.padre[i]
+        return False
+
+    def ancestros(self, identificacion: str, maximo: Optional[int] = None) -> list[str]:
+        """
+        Cadena de referentes desde el directo hacia la raíz
+
+        Args:
+            identificacion: ID del usuario
+            maximo: Máximo de niveles a subir (None: hasta la raíz)
+
+        Returns:
+            Identificaciones de los referentes, del más cercano al más lejano
+        """
+        cadena = []
+        i = self.padre[self.indice[identificacion]]
+        while i >= 0 and (maximo is None or len(cadena) < maximo):
+            cadena.append(self.ids[i])
+            i = self.padre[i]
+        return cadena
+
+    def _hijos(self, i: int) -> list[int]:
+        """Índices de los referidos directos (los que siguen teniendo a i de padre)"""
+        csr = self.hijos[self.inicio_hijos[i] : self.inicio_hijos[i + 1]]
+        extra = self.hijos_extra.get(i, ())
+        return [h for h in (*csr, *extra) if self.padre[h] == i]
+
+    def referidos(self, identificacion: str) -> list[str]:
+        """Referidos directos"""
+        return [self.ids[h] for h in self._hijos(self.indice[identificacion])]
+
+    def conteo_por_rol(self, identificacion: str) -> dict[RolUsuario, int]:
+        """Descendientes por rol (solo roles presentes)"""
+        i = self.indice[identificacion]
+        conteo = {rol: self.conteo_rol[c][i] for c, rol in enumerate(ROLES)}
+        return {rol: cantidad for rol, cantidad in conteo.items() if cantidad}
+
+    def calidad_promedio(self, identificacion: str) -> float:
+        """calidad_score promedio de la red (0 si no tiene red)"""
+        i = self.indice[identificacion]
+        total = self.tamano[i]
+        if not total:
+            return 0.0
+        return self.suma_calidad[i] / total
+
+    def niveles_red(self, identificacion: str) -> int:
+        """Niveles de profundidad de la red bajo el usuario"""
+        return self.altura[self.indice[identificacion]]
+
+    def aplicar(self, fila: Fila) -> bool:
+        """
+        Aplica en el lugar un alta, un cambio de rol o calidad, o la
+        reasignación de un usuario sin red; solo recorre la cadena de
+        ancestros afectada
+
+        Args:
+            fila: (identificacion, asignado_a, rol, calidad_score) nuevos
+
+        Returns:
+            False si el cambio mueve una red completa o cerraría un ciclo
+            (no se aplica: hay que reconstruir el grafo)
+        """
+        identificacion, asignado_a, rol, calidad = fila
+        codigo = CODIGO_ROL.get(rol, 0)
+        calidad = calidad or 0
+        p = self.indice.get(asignado_a, -1) if asignado_a else -1
+        i = self.indice.get(identificacion)
+
+        if i is None:
+            i = len(self.ids)
+            self.ids.append(identificacion)
+            self.indice[identificacion] = i
+            for arreglo, valor in (
+                (self.padre, -1),
+                (self.rol, codigo),
+                (self.calidad, calidad),
+                (self.profundidad, 0),
+                (self.altura, 0),
+                (self.tamano, 0),
+                (self.suma_calidad, 0),
+                (self.inicio_hijos, self.inicio_hijos[-1]),
+                *((conteo, 0) for conteo in self.conteo_rol),
+            ):
+                arreglo.append(valor)
+            self._conectar(i, p)
+            return True
+
+        if p == self.padre[i]:
+            # Solo cambia lo que el usuario aporta a sus ancestros
+            self._propagar(i, -1, -self.calidad[i], self.rol[i])
+            self.rol[i], self.calidad[i] = codigo, calidad
+            self._propagar(i, 1, calidad, codigo)
+            return True
+
+        if self.tamano[i] or p == i:
+            return False
+
+        # Usuario sin red: sale de la cadena anterior y entra en la nueva
+        anterior = self.padre[i]
+        self._propagar(i, -1, -self.calidad[i], self.rol[i])
+        self.padre[i] = -1
+        self._recalcular_altura(anterior)
+        self.rol[i], self.calidad[i] = codigo, calidad
+        self._conectar(i, p)
+        return True
+
+    def _propagar(self, i: int, cantidad: int, suma: int, codigo: int) -> None:
+        """Suma a cada ancestro de i una persona (cantidad ±1) con ese rol"""
+        a = self.padre[i]
+        while a >= 0:
+            self.tamano[a] += cantidad
+            self.suma_calidad[a] += suma
+            self.conteo_rol[codigo][a] += cantidad
+            a = self.padre[a]
+
+    def _conectar(self, i: int, p: int) -> None:
+        """Cuelga el nodo sin red i de p (-1: queda como raíz)"""
+        self.padre[i] = p
+        self.profundidad[i] = self.profundidad[p] + 1 if p >= 0 else 0
+        if p < 0:
+            return
+        csr = self.hijos[self.inicio_hijos[p] : self.inicio_hijos[p + 1]]
+        extra = self.hijos_extra.setdefault(p, [])
+        if i not in csr and i not in extra:
+            extra.append(i)
+        self._propagar(i, 1, self.calidad[i], self.rol[i])
+        # El nodo queda a d niveles de cada ancestro
+        a, d = p, 1
+        while a >= 0 and self.altura[a] < d:
+            self.altura[a] = d
+            a, d = self.padre[a], d + 1
+
+    def _recalcular_altura(self, a: int) -> None:
+        """Baja la altura de a y sus ancestros si perdieron su rama más larga"""
+        while a >= 0:
+            altura = max((self.altura[h] + 1 for h in self._hijos(a)), default=0)
+            if altura == self.altura[a]:
+                return
+            self.altura[a] = altura
+            a = self.padre[a]
+
+
+async def detectar_ciclos(
+    sesion: AsyncSession, maximo: int = PROFUNDIDAD_MAXIMA_RED
+) -> list[str]:
+    """
+    Usuarios cuya cadena de referentes vuelve a ellos mismos
+
+    Sube por asignado_a desde cada usuario guardando el camino recorrido
+    (no repite nodos) y con un tope de niveles, así que termina aunque la
+    tabla tenga ciclos. Es un diagnóstico de toda la tabla: pensado para
+    scripts (ver script/aplicar_ddl.py), no para peticiones.
+
+    Args:
+        sesion: Sesión de base de datos
+        maximo: Máximo de niveles a subir
+
+    Returns:
+        Identificaciones que forman parte de algún ciclo
+    """
+    statement = sa.text("""
+        WITH RECURSIVE cadena AS (
+            SELECT identificacion AS origen, asignado_a AS actual,
+                   1 AS profundidad, ARRAY[identificacion::text] AS camino
+            FROM usuario
+            WHERE asignado_a IS NOT NULL
+
+            UNION ALL
+
+            SELECT c.origen, u.asignado_a, c.profundidad + 1,
+                   c.camino || u.identificacion::text
+            FROM cadena c
+            INNER JOIN usuario u ON u.identificacion = c.actual
+            WHERE u.asignado_a IS NOT NULL
+              AND NOT u.identificacion::text = ANY(c.camino)
+              AND c.profundidad < :maximo
+        )
+        SELECT DISTINCT origen FROM cadena WHERE actual = origen ORDER BY origen
+        """).bindparams(maximo=maximo)
+    resultado = await sesion.execute(statement)
+    return list(resultado.scalars().all())
+
+
+class MotorJerarquia:
+    """
+    Mantiene el GrafoJerarquia vigente del proceso
+
+    Armar el grafo de toda la base toma segundos en Python puro, así que
+    nunca se hace en el event loop ni dentro de una petición (salvo la
+    primera carga): obtener() entrega la versión actual y, si venció o se
+    invalidó, arma la siguiente en segundo plano (lectura con su propia
+    sesión, construcción en un hilo) y la reemplaza de una vez. Los cambios
+    de este proceso se aplican en el lugar con registrar().
+
+    Args:
+        fabrica_sesiones: async_sessionmaker para las recargas en segundo plano
+        intervalo: Segundos entre recargas completas desde la base
+    """
+
+    def __init__(
+        self,
+        fabrica_sesiones: async_sessionmaker,
+        intervalo: float = INTERVALO_RECARGA,
+    ):
+        self.fabrica_sesiones = fabrica_sesiones
+        self.intervalo = intervalo
+        self._grafo: Optional[GrafoJerarquia] = None
+        self._cargado = 0.0
+        self._vigente = False
+        self._version = 0
+        # Cambios registrados mientras se arma una recarga (se repiten
+        # sobre el grafo nuevo: la lectura pudo ser anterior al commit)
+        self._cambios: dict[str, Fila] = {}
+        self._candado = asyncio.Lock()
+        self._tarea: Optional[asyncio.Task] = None
+
+    async def cargar(self, sesion: AsyncSession) -> GrafoJerarquia:
+        """Lee la tabla usuario completa y arma el grafo fuera del event loop"""
+        version = self._version
+        self._cambios.clear()
+        statement = sa.select(
+            Usuario.identificacion,
+            Usuario.asignado_a,
+            Usuario.rol,
+            Usuario.calidad_score,
+        )
+        resultado = await sesion.execute(statement)
+        filas = [tuple(fila) for fila in resultado.all()]
+        grafo = await asyncio.get_running_loop().run_in_executor(
+            None, GrafoJerarquia.construir, filas
+        )
+        # Un invalidar() durante la lectura obliga a otra recarga
+        vigente = version == self._version
+        for fila in self._cambios.values():
+            vigente = grafo.aplicar(fila) and vigente
+        self._cambios.clear()
+        self._grafo = grafo
+        self._cargado = time.monotonic()
+        self._vigente = vigente
+        return grafo
+
+    async def obtener(self, sesion: AsyncSession) -> GrafoJerarquia:
+        """
+        Grafo vigente, sin esperar recargas (salvo la primera)
+
+        Args:
+            sesion: Sesión de base de datos (solo para la primera carga)
+
+        Returns:
+            La versión actual del GrafoJerarquia
+        """
+        if self._grafo is None:
+            async with self._candado:
+                if self._grafo is None:
+                    return await self.cargar(sesion)
+
+        vencido = (
+            not self._vigente or time.monotonic() - self._cargado >= self.intervalo
+        )
+        if vencido and (self._tarea is None or self._tarea.done()):
+            self._tarea = asyncio.create_task(self.actualizar())
+        return self._grafo
+
+    async def actualizar(self) -> None:
+        """
+        Recarga el grafo desde la base. Un error deja la versión anterior y
+        fuerza otra recarga en el siguiente acceso.
+        """
+        async with self._candado:
+            try:
+                async with self.fabrica_sesiones() as sesion:
+                    await self.cargar(sesion)
+            except Exception as error:
+                self._vigente = False
+                print(f"⚠️  No se pudo actualizar el grafo de la jerarquía: {error}")
+
+    async def esperar(self) -> None:
+        """Espera la recarga en curso, si hay una"""
+        if self._tarea is not None:
+            await self._tarea
+
+    def registrar(
+        self,
+        identificacion: str,
+        asignado_a: Optional[str],
+        rol: RolUsuario,
+        calidad_score: int = 0,
+    ) -> None:
+        """
+        Aplica un alta o modificación hecha en este proceso (después del
+        commit). Si mueve una red completa, pide una recarga.
+
+        Args:
+            identificacion: ID del usuario
+            asignado_a: ID de su referente
+            rol: Rol del usuario
+            calidad_score: Score de calidad
+        """
+        if self._grafo is None:
+            return
+        fila = (identificacion, asignado_a, rol, calidad_score)
+        if self._candado.locked():
+            self._cambios[identificacion] = fila
+        if not self._grafo.aplicar(fila):
+            self._vigente = False
+
+    def invalidar(self) -> None:
+        """
+        Pide una recarga completa; mientras tanto se sigue entregando la
+        versión anterior
+        """
+        self._vigente = False
+        self._version += 1
+
+
+MOTOR_JERARQUIA = MotorJerarquia(async_session_maker)
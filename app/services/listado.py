@@ -0,0 +1,341 @@
+# ./app/services/listado.py
+
+"""
+Listado paginado de votantes usando paginación por cursor (keyset)
+
+En lugar de OFFSET, cada página se ubica a partir de la última fila vista
+sobre la clave ordenada (fecha_registro, identificacion). Así cada petición
+lee solo las filas de una página, sin importar el tamaño de la tabla.
+
+Las filas se leen con un SELECT de solo las columnas que se muestran y se
+envuelven en FilaVotante (con __slots__), sin hidratar modelos Usuario
+completos: no viaja el hash de la contraseña ni las columnas de auditoría,
+y se evita la validación de SQLModel/Pydantic por fila.
+
+El nombre del referente (columna "Referido de") se obtiene en la misma
+consulta con un LEFT JOIN de usuario consigo misma, de modo que cada página
+es un solo viaje a la base de datos y no hay listas IN con miles de IDs.
+
+transmitir_votantes entrega la misma página como iterador asíncrono sobre
+un cursor del servidor, para renderizar la tabla por partes con
+templates.TemplateStream sin acumular las filas en memoria.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Iterable, Optional, Sequence
+import base64
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models import Usuario
+
+TAMANO_PAGINA_DEFECTO = 25
+TAMANO_PAGINA_MAXIMO = 100
+
+# Columnas que muestra el listado (en el orden de FilaVotante.__slots__)
+COLUMNAS_LISTADO = (
+    Usuario.identificacion,
+    Usuario.nombres,
+    Usuario.apellidos,
+    Usuario.telefono,
+    Usuario.sexo,
+    Usuario.lugar_votacion,
+    Usuario.mesa_votacion,
+    Usuario.rol,
+    Usuario.asignado_a,
+    Usuario.fecha_registro,
+)
+
+
+# Alias de usuario para unir cada votante con su referente
+Referente = aliased(Usuario, name="referente")
+
+
+class FilaReferente:
+    """Nombre de un referente para la columna "Referido de" del listado"""
+
+    __slots__ = ("identificacion", "nombres", "apellidos")
+
+    def __init__(self, identificacion: str, nombres: str, apellidos: str):
+        self.identificacion = identificacion
+        self.nombres = nombres
+        self.apellidos = apellidos
+
+    @property
+    def nombre_completo(self) -> str:
+        """Retorna el nombre completo (nombres + apellidos)"""
+        return f"{self.nombres} {self.apellidos}"
+
+
+class FilaVotante:
+    """Fila de solo lectura con las columnas que muestra el listado"""
+
+    __slots__ = (
+        "identificacion",
+        "nombres",
+        "apellidos",
+        "telefono",
+        "sexo",
+        "lugar_votacion",
+        "mesa_votacion",
+        "rol",
+        "asignado_a",
+        "fecha_registro",
+        "referente",
+    )
+
+    def __init__(self, *valores: Any, referente: Optional[FilaReferente] = None):
+        for nombre, valor in zip(self.__slots__, valores):
+            setattr(self, nombre, valor)
+        self.referente = referente
+
+    @property
+    def nombre_completo(self) -> str:
+        """Retorna el nombre completo (nombres + apellidos)"""
+        return f"{self.nombres} {self.apellidos}"
+
+
+def construir_fila(fila: Sequence[Any]) -> FilaVotante:
+    """
+    Arma una FilaVotante a partir de una fila de la consulta del listado
+
+    Args:
+        fila: Columnas de COLUMNAS_LISTADO seguidas de nombres y apellidos
+            del referente (NULL si no tiene o no existe)
+
+    Returns:
+        FilaVotante con su referente resuelto
+    """
+    n = len(COLUMNAS_LISTADO)
+    votante = FilaVotante(*fila[:n])
+    nombres, apellidos = fila[n], fila[n + 1]
+    if votante.asignado_a and nombres is not None:
+        votante.referente = FilaReferente(votante.asignado_a, nombres, apellidos)
+    return votante
+
+
+@dataclass
+class PaginaVotantes:
+    """Una página del listado con los cursores para navegar"""
+
+    # Lista de FilaVotante, o iterador asíncrono en transmitir_votantes
+    votantes: Any = field(default_factory=list)
+    limite: int = TAMANO_PAGINA_DEFECTO
+    cursor_siguiente: Optional[str] = None
+    cursor_anterior: Optional[str] = None
+
+
+def codificar_cursor(fecha_registro: datetime, identificacion: str) -> str:
+    """
+    Codifica la clave de una fila como cursor opaco para la URL
+
+    Args:
+        fecha_registro: Fecha de registro de la fila
+        identificacion: Identificación de la fila
+
+    Returns:
+        Cursor en base64 url-safe sin relleno
+    """
+    crudo = f"{fecha_registro.isoformat()}|{identificacion}"
+    return base64.urlsafe_b64encode(crudo.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> tuple[datetime, str]:
+    """
+    Decodifica un cursor generado por codificar_cursor
+
+    Args:
+        cursor: Cursor recibido en la URL
+
+    Returns:
+        Tupla (fecha_registro, identificacion)
+
+    Raises:
+        ValueError: Si el cursor está mal formado
+    """
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        crudo = base64.urlsafe_b64decode(cursor + relleno).decode()
+        fecha, identificacion = crudo.split("|", 1)
+        return datetime.fromisoformat(fecha), identificacion
+    except ValueError as error:
+        raise ValueError("Cursor inválido") from error
+
+
+def normalizar_limite(
+    valor: Optional[str],
+    defecto: int = TAMANO_PAGINA_DEFECTO,
+    maximo: int = TAMANO_PAGINA_MAXIMO,
+) -> int:
+    """
+    Convierte el parámetro de tamaño de página a un entero acotado
+
+    Args:
+        valor: Valor recibido en la URL (puede ser None o inválido)
+        defecto: Valor a usar si no viene o es inválido
+        maximo: Tope superior permitido
+
+    Returns:
+        Tamaño de página entre 1 y maximo
+    """
+    try:
+        limite = int(valor) if valor else defecto
+    except ValueError:
+        limite = defecto
+    return max(1, min(limite, maximo))
+
+
+def _consulta_pagina(
+    condiciones: Iterable[Any],
+    after: Optional[str],
+    before: Optional[str],
+    limite: int,
+) -> sa.Select:
+    """
+    Arma el SELECT de una página (con una fila extra para detectar si hay más)
+
+    Raises:
+        ValueError: Si alguno de los cursores está mal formado
+    """
+    clave = sa.tuple_(Usuario.fecha_registro, Usuario.identificacion)
+    statement = sa.select(
+        *COLUMNAS_LISTADO, Referente.nombres, Referente.apellidos
+    ).outerjoin(Referente, Usuario.asignado_a == Referente.identificacion)
+    for condicion in condiciones:
+        statement = statement.where(condicion)
+
+    if before:
+        # Retroceder: leer en orden ascendente desde el cursor y luego invertir
+        fecha, identificacion = decodificar_cursor(before)
+        statement = statement.where(clave > sa.tuple_(fecha, identificacion)).order_by(
+            Usuario.fecha_registro.asc(), Usuario.identificacion.asc()
+        )
+    else:
+        if after:
+            fecha, identificacion = decodificar_cursor(after)
+            statement = statement.where(clave < sa.tuple_(fecha, identificacion))
+        statement = statement.order_by(
+            Usuario.fecha_registro.desc(), Usuario.identificacion.desc()
+        )
+
+    # Se pide una fila extra solo para saber si hay más páginas
+    return statement.limit(limite + 1)
+
+
+def _asignar_cursores(
+    pagina: PaginaVotantes,
+    primero: FilaVotante,
+    ultimo: FilaVotante,
+    hay_mas: bool,
+    after: Optional[str],
+    before: Optional[str],
+) -> None:
+    """Calcula los cursores de navegación a partir de la primera y última fila"""
+    if before:
+        pagina.cursor_siguiente = codificar_cursor(
+            ultimo.fecha_registro, ultimo.identificacion
+        )
+        if hay_mas:
+            pagina.cursor_anterior = codificar_cursor(
+                primero.fecha_registro, primero.identificacion
+            )
+    else:
+        if hay_mas:
+            pagina.cursor_siguiente = codificar_cursor(
+                ultimo.fecha_registro, ultimo.identificacion
+            )
+        if after:
+            pagina.cursor_anterior = codificar_cursor(
+                primero.fecha_registro, primero.identificacion
+            )
+
+
+async def paginar_votantes(
+    sesion: AsyncSession,
+    condiciones: Iterable[Any] = (),
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    limite: int = TAMANO_PAGINA_DEFECTO,
+) -> PaginaVotantes:
+    """
+    Obtiene una página de votantes ordenados del más reciente al más antiguo.
+
+    Args:
+        sesion: Sesión de base de datos
+        condiciones: Condiciones WHERE adicionales (búsqueda/filtros)
+        after: Cursor de la última fila de la página anterior (avanzar)
+        before: Cursor de la primera fila de la página siguiente (retroceder)
+        limite: Tamaño de página
+
+    Returns:
+        PaginaVotantes con las filas y los cursores de navegación
+
+    Raises:
+        ValueError: Si alguno de los cursores está mal formado
+    """
+    statement = _consulta_pagina(condiciones, after, before, limite)
+    resultado = await sesion.execute(statement)
+    filas = resultado.all()
+    hay_mas = len(filas) > limite
+    votantes = [construir_fila(fila) for fila in filas[:limite]]
+
+    pagina = PaginaVotantes(votantes=votantes, limite=limite)
+    if not votantes:
+        return pagina
+
+    if before:
+        votantes.reverse()
+    _asignar_cursores(pagina, votantes[0], votantes[-1], hay_mas, after, before)
+    return pagina
+
+
+def transmitir_votantes(
+    sesion: AsyncSession,
+    condiciones: Iterable[Any] = (),
+    after: Optional[str] = None,
+    limite: int = TAMANO_PAGINA_DEFECTO,
+) -> PaginaVotantes:
+    """
+    Igual que paginar_votantes (solo hacia adelante), pero sin cargar la página
+    en memoria: pagina.votantes es un iterador asíncrono que lee las filas de
+    un cursor del servidor a medida que la plantilla las consume.
+
+    Los cursores de navegación quedan disponibles cuando el iterador termina,
+    por eso la plantilla debe leerlos después del bucle de filas.
+
+    Args:
+        sesion: Sesión de base de datos (debe seguir abierta mientras se envía)
+        condiciones: Condiciones WHERE adicionales (búsqueda/filtros)
+        after: Cursor de la última fila de la página anterior
+        limite: Tamaño de página
+
+    Returns:
+        PaginaVotantes cuyas filas se leen bajo demanda
+
+    Raises:
+        ValueError: Si el cursor está mal formado (antes de tocar la base)
+    """
+    statement = _consulta_pagina(condiciones, after, None, limite)
+    pagina = PaginaVotantes(limite=limite)
+
+    async def filas() -> AsyncIterator[FilaVotante]:
+        resultado = await sesion.stream(statement)
+        primero = ultimo = None
+        leidas = 0
+        async for fila in resultado:
+            leidas += 1
+            if leidas > limite:
+                break
+            ultimo = construir_fila(fila)
+            if primero is None:
+                primero = ultimo
+            yield ultimo
+        await resultado.close()
+        if primero is not None:
+            _asignar_cursores(pagina, primero, ultimo, leidas > limite, after, None)
+
+    pagina.votantes = filas()
+    return pagina
@@ -0,0 +1,236 @@
+# ./app/services/perfil.py
+
+"""
+Carga de la vista de perfil en una sola consulta
+
+El perfil necesita el permiso de acceso, el usuario, su referente, la
+cadena de referentes hasta la raíz, sus referidos directos (con cuántos
+referidos tiene cada uno) y las métricas de su red. Contra una base
+remota, pedir cada cosa por separado suma un viaje de ida y vuelta por
+consulta. Aquí todo se compone en un único SELECT: los referidos y el
+conteo por rol llegan como JSON agregado.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSON, aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models import (
+    Usuario,
+    UsuarioRed,
+    UsuarioRedMetricas,
+    UsuarioRedRol,
+    RolUsuario,
+)
+from app.services.ancestros import guardar_ancestros, subconsulta_ancestros
+from app.services.listado import FilaReferente
+
+
+@dataclass
+class PerfilVotante:
+    """Datos de la vista de perfil"""
+
+    usuario: Usuario
+    permitido: bool
+    referente: Optional[FilaReferente] = None
+    referidos_agrupados: dict = field(default_factory=dict)
+    metricas: dict = field(default_factory=dict)
+    ancestros: list = field(default_factory=list)
+
+
+def _rol(nombre: Optional[str]) -> Optional[RolUsuario]:
+    """PostgreSQL guarda el nombre del miembro del enum (ej. JEFE_DE_ZONA)"""
+    return RolUsuario[nombre] if nombre else None
+
+
+def agrupar_referidos(referidos: list[dict[str, Any]]) -> dict:
+    """
+    Agrupa los referidos directos por rol en el formato de la vista
+
+    Args:
+        referidos: Filas ya ordenadas por rol y fecha de registro
+
+    Returns:
+        Diccionario rol -> lista de personas
+    """
+    agrupados = defaultdict(list)
+    for ref in referidos:
+        rol = _rol(ref["rol"]).value
+        agrupados[rol].append(
+            {
+                "identificacion": ref["identificacion"],
+                "nombre_completo": f"{ref['nombres']} {ref['apellidos']}",
+                "nombres": ref["nombres"],
+                "apellidos": ref["apellidos"],
+                "rol": rol,
+                "mesa_votacion": ref["mesa_votacion"],
+                "lugar_votacion": ref["lugar_votacion"],
+                "telefono": ref["telefono"],
+                "total_referidos": ref["total_referidos"],
+                "tiene_referidos": ref["total_referidos"] > 0,
+            }
+        )
+    return dict(agrupados)
+
+
+def consulta_perfil(
+    identificacion: str, identificacion_autenticado: Optional[str]
+) -> sa.Select:
+    """
+    Arma el SELECT compuesto del perfil
+
+    Args:
+        identificacion: ID del perfil
+        identificacion_autenticado: ID de quien consulta, o None si el
+            permiso ya se verificó (ver app/services/autorizacion.py)
+
+    Returns:
+        SELECT de una fila (o ninguna si el usuario no existe)
+    """
+    referente = aliased(Usuario, name="referente")
+    referido = aliased(Usuario, name="referido")
+    hijo = aliased(Usuario, name="hijo")
+
+    # Propio perfil o perfil de alguien de su red (tabla de cierre)
+    if identificacion_autenticado is None:
+        permitido = sa.true()
+    else:
+        permitido = sa.or_(
+            Usuario.identificacion == identificacion_autenticado,
+            sa.exists().where(
+                UsuarioRed.ancestro == identificacion_autenticado,
+                UsuarioRed.descendiente == Usuario.identificacion,
+                UsuarioRed.profundidad > 0,
+            ),
+        )
+
+    total_hijos = (
+        sa.select(sa.func.count())
+        .where(hijo.asignado_a == referido.identificacion)
+        .correlate(referido)
+        .scalar_subquery()
+    )
+    persona = sa.func.json_build_object(
+        "identificacion",
+        referido.identificacion,
+        "nombres",
+        referido.nombres,
+        "apellidos",
+        referido.apellidos,
+        "rol",
+        referido.rol,
+        "mesa_votacion",
+        referido.mesa_votacion,
+        "lugar_votacion",
+        referido.lugar_votacion,
+        "telefono",
+        referido.telefono,
+        "total_referidos",
+        total_hijos,
+    )
+    referidos = (
+        sa.select(
+            sa.func.json_agg(
+                aggregate_order_by(
+                    persona, referido.rol, referido.fecha_registro.desc()
+                ),
+                type_=JSON,
+            )
+        )
+        .where(referido.asignado_a == Usuario.identificacion)
+        .correlate(Usuario)
+        .scalar_subquery()
+    )
+
+    por_rol = (
+        sa.select(
+            sa.func.json_object_agg(
+                UsuarioRedRol.rol, UsuarioRedRol.cantidad, type_=JSON
+            )
+        )
+        .where(
+            UsuarioRedRol.ancestro == Usuario.identificacion,
+            UsuarioRedRol.cantidad > 0,
+        )
+        .correlate(Usuario)
+        .scalar_subquery()
+    )
+
+    return (
+        sa.select(
+            Usuario,
+            permitido.label("permitido"),
+            referente.identificacion.label("referente_identificacion"),
+            referente.nombres.label("referente_nombres"),
+            referente.apellidos.label("referente_apellidos"),
+            UsuarioRedMetricas.total_red,
+            UsuarioRedMetricas.niveles_profundidad,
+            por_rol.label("por_rol"),
+            referidos.label("referidos"),
+            subconsulta_ancestros(Usuario.identificacion).label("ancestros"),
+        )
+        .outerjoin(referente, referente.identificacion == Usuario.asignado_a)
+        .outerjoin(
+            UsuarioRedMetricas,
+            UsuarioRedMetricas.identificacion == Usuario.identificacion,
+        )
+        .where(Usuario.identificacion == identificacion)
+    )
+
+
+async def cargar_perfil(
+    sesion: AsyncSession,
+    identificacion: str,
+    identificacion_autenticado: str,
+    permitido: Optional[bool] = None,
+) -> Optional[PerfilVotante]:
+    """
+    Obtiene todo lo que muestra el perfil en un solo viaje a la base
+
+    Args:
+        sesion: Sesión de base de datos
+        identificacion: ID del perfil
+        identificacion_autenticado: ID de quien consulta
+        permitido: True si el permiso ya se verificó; None para
+            verificarlo dentro de la misma consulta
+
+    Returns:
+        PerfilVotante, o None si el usuario no existe
+    """
+    resultado = await sesion.execute(
+        consulta_perfil(
+            identificacion, None if permitido else identificacion_autenticado
+        )
+    )
+    fila = resultado.first()
+    if fila is None:
+        return None
+
+    perfil = PerfilVotante(usuario=fila.Usuario, permitido=bool(fila.permitido))
+    if not perfil.permitido:
+        return perfil
+
+    if fila.referente_identificacion:
+        perfil.referente = FilaReferente(
+            fila.referente_identificacion,
+            fila.referente_nombres,
+            fila.referente_apellidos,
+        )
+    perfil.referidos_agrupados = agrupar_referidos(fila.referidos or [])
+    perfil.ancestros = guardar_ancestros(perfil.usuario.identificacion, fila.ancestros)
+
+    # El orden del enum en Python es el de la jerarquía
+    por_rol = {
+        _rol(nombre): cantidad for nombre, cantidad in (fila.por_rol or {}).items()
+    }
+    perfil.metricas = {
+        "total_red": fila.total_red or 0,
+        "niveles_profundidad": fila.niveles_profundidad or 0,
+        "por_rol": {rol.value: por_rol[rol] for rol in RolUsuario if rol in por_rol},
+    }
+    return perfil
@@ -0,0 +1,152 @@
+# ./app/services/puestos.py
+
+"""
+Resumen de la red de un usuario por puesto y mesa de votación
+
+Cuántas personas de la red votan en cada puesto y mesa, y su
+calidad_score promedio. Se lee de la vista materializada
+usuario_red_puesto (app/config/ddl.py), una fila por (ancestro, puesto,
+mesa), así que cada petición es un rango del índice único del usuario y
+no un recorrido de su red.
+
+La vista se refresca con REFRESH MATERIALIZED VIEW CONCURRENTLY cada
+INTERVALO_REFRESCO segundos (tarea del lifespan en app/__init__.py): las
+lecturas no se bloquean mientras se recalcula. Cada worker corre esa
+tarea; la fila de usuario_red_puesto_refresco guarda cuándo fue el último
+refresco y el worker que despierta dentro del intervalo no la recalcula.
+Un candado consultivo evita además que dos refrescos se crucen.
+"""
+
+import asyncio
+from typing import Any
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+INTERVALO_REFRESCO = 300
+
+# Clave del candado consultivo de PostgreSQL para el refresco
+CANDADO_REFRESCO = 0x55524E41
+
+# La vista materializada no es un modelo: create_all no debe crearla
+usuario_red_puesto = sa.table(
+    "usuario_red_puesto",
+    sa.column("ancestro"),
+    sa.column("lugar_votacion"),
+    sa.column("mesa_votacion"),
+    sa.column("cantidad"),
+    sa.column("suma_calidad"),
+)
+
+
+def _promedio(suma: int, cantidad: int) -> float:
+    return round(suma / cantidad, 1) if cantidad else 0.0
+
+
+async def resumen_puestos(
+    sesion: AsyncSession, identificacion: str
+) -> list[dict[str, Any]]:
+    """
+    Personas de la red por puesto y mesa
+
+    Args:
+        sesion: Sesión de base de datos
+        identificacion: ID del usuario dueño de la red
+
+    Returns:
+        Puestos ordenados por cantidad, cada uno con sus mesas
+    """
+    v = usuario_red_puesto.c
+    statement = (
+        sa.select(v.lugar_votacion, v.mesa_votacion, v.cantidad, v.suma_calidad)
+        .where(v.ancestro == identificacion)
+        .order_by(v.lugar_votacion, v.mesa_votacion)
+    )
+    resultado = await sesion.execute(statement)
+
+    puestos: dict[str, dict[str, Any]] = {}
+    for fila in resultado.all():
+        puesto = puestos.setdefault(
+            fila.lugar_votacion,
+            {
+                "lugar_votacion": fila.lugar_votacion or None,
+                "cantidad": 0,
+                "suma_calidad": 0,
+                "mesas": [],
+            },
+        )
+        puesto["cantidad"] += fila.cantidad
+        puesto["suma_calidad"] += fila.suma_calidad
+        puesto["mesas"].append(
+            {
+                "mesa_votacion": fila.mesa_votacion or None,
+                "cantidad": fila.cantidad,
+                "calidad_promedio": _promedio(fila.suma_calidad, fila.cantidad),
+            }
+        )
+
+    resumen = []
+    for puesto in puestos.values():
+        suma = puesto.pop("suma_calidad")
+        puesto["calidad_promedio"] = _promedio(suma, puesto["cantidad"])
+        resumen.append(puesto)
+    resumen.sort(key=lambda p: p["cantidad"], reverse=True)
+    return resumen
+
+
+async def refrescar_puestos(
+    sesion: AsyncSession, intervalo: float = INTERVALO_REFRESCO
+) -> bool:
+    """
+    Recalcula la vista sin bloquear las lecturas
+
+    Args:
+        sesion: Sesión de base de datos
+        intervalo: Segundos que deben pasar desde el último refresco
+
+    Returns:
+        False si otro proceso la está refrescando o la refrescó hace menos
+        de intervalo segundos
+    """
+    resultado = await sesion.execute(
+        sa.select(sa.func.pg_try_advisory_xact_lock(CANDADO_REFRESCO))
+    )
+    if not resultado.scalar():
+        await sesion.rollback()
+        return False
+    # Bajo el candado: marcar el refresco solo si el último ya venció
+    resultado = await sesion.execute(
+        sa.text(
+            "UPDATE usuario_red_puesto_refresco SET refrescado_en = now() "
+            "WHERE refrescado_en <= now() - make_interval(secs => :intervalo) "
+            "RETURNING refrescado_en"
+        ).bindparams(intervalo=intervalo)
+    )
+    if resultado.scalar() is None:
+        await sesion.rollback()
+        return False
+    await sesion.execute(
+        sa.text("REFRESH MATERIALIZED VIEW CONCURRENTLY usuario_red_puesto")
+    )
+    await sesion.commit()
+    return True
+
+
+async def refrescar_periodicamente(
+    fabrica_sesiones: async_sessionmaker, intervalo: float = INTERVALO_REFRESCO
+) -> None:
+    """
+    Refresca la vista cada intervalo segundos (hasta que se cancele)
+
+    Args:
+        fabrica_sesiones: async_sessionmaker de la aplicación
+        intervalo: Segundos entre refrescos
+    """
+    while True:
+        await asyncio.sleep(intervalo)
+        try:
+            async with fabrica_sesiones() as sesion:
+                await refrescar_puestos(sesion, intervalo)
+        except Exception as error:
+            # Un fallo puntual no detiene los siguientes refrescos
+            print(f"⚠️  No se pudo refrescar usuario_red_puesto: {error}")
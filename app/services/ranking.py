@@ -0,0 +1,136 @@
+# ./app/services/ranking.py
+
+"""
+Ranking de reclutadores por tamaño y calidad de su red
+
+Calcular la red de cada candidato por separado repite el mismo subárbol
+una vez por cada jefe que lo contiene. Aquí sale del GrafoJerarquia en
+memoria (app/services/jerarquia.py): el tamaño y la calidad acumulada de
+cada subárbol ya se obtuvieron en un solo recorrido al armar el grafo,
+así que el ranking es una pasada lineal con selección de los K mejores
+(heapq.nlargest), que corre en un hilo sobre la última versión del grafo.
+El resultado se guarda unos minutos por criterio y se descarta cuando se
+mueve una red (app/services/reasignacion.py).
+"""
+
+import asyncio
+import heapq
+from functools import partial
+from typing import Any, Iterable
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Usuario, RolUsuario
+from app.services.jerarquia import CODIGO_ROL, GrafoJerarquia, MOTOR_JERARQUIA
+from app.utils.cache import CacheTTL
+
+TOP_RANKING = 20
+ROLES_RANKING = (RolUsuario.LIDER, RolUsuario.JEFE_DE_ZONA)
+CRITERIOS_RANKING = ("red", "calidad")
+# Por calidad solo compiten redes de este tamaño o más: un promedio de una
+# o dos personas no se compara con el de una red grande
+MINIMO_RED_CALIDAD = 10
+
+CACHE_RANKING = CacheTTL(ttl=300, maximo=16)
+
+
+def calcular_ranking(
+    grafo: GrafoJerarquia,
+    roles: Iterable[RolUsuario] = ROLES_RANKING,
+    k: int = TOP_RANKING,
+    criterio: str = "red",
+    minimo_calidad: int = MINIMO_RED_CALIDAD,
+) -> list[tuple[str, int, float]]:
+    """
+    Los k mejores usuarios de los roles indicados
+
+    Args:
+        grafo: Jerarquía en memoria
+        roles: Roles que compiten
+        k: Cantidad de puestos
+        criterio: "red" (tamaño, luego calidad) o "calidad" (promedio,
+            luego tamaño)
+        minimo_calidad: Tamaño mínimo de la red para competir por calidad
+
+    Returns:
+        Lista de (identificacion, total_red, calidad_promedio)
+    """
+    codigos = {CODIGO_ROL[rol] for rol in roles}
+    rol, tamano, suma_calidad = grafo.rol, grafo.tamano, grafo.suma_calidad
+    # Los nodos que se agreguen mientras tanto quedan fuera de esta pasada
+    n = len(rol)
+    minimo = minimo_calidad if criterio == "calidad" else 0
+
+    def candidatos():
+        for i in range(n):
+            if rol[i] not in codigos:
+                continue
+            total = tamano[i]
+            if total < minimo:
+                continue
+            yield i, total, suma_calidad[i] / total if total else 0.0
+
+    if criterio == "calidad":
+        clave = lambda c: (c[2], c[1])  # noqa: E731
+    else:
+        clave = lambda c: (c[1], c[2])  # noqa: E731
+
+    return [
+        (grafo.ids[i], total, round(calidad, 1))
+        for i, total, calidad in heapq.nlargest(k, candidatos(), key=clave)
+    ]
+
+
+async def obtener_ranking(
+    sesion: AsyncSession, k: int = TOP_RANKING, criterio: str = "red"
+) -> list[dict[str, Any]]:
+    """
+    Ranking de Líderes y Jefes de Zona (desde la caché si está)
+
+    Args:
+        sesion: Sesión de base de datos
+        k: Cantidad de puestos
+        criterio: "red" o "calidad"
+
+    Returns:
+        Lista ordenada de personas con su posición, rol y métricas de red
+    """
+    clave = (k, criterio)
+    ranking = CACHE_RANKING.obtener(clave)
+    if ranking is not None:
+        return ranking
+
+    # Última versión del grafo (se actualiza en segundo plano) y una pasada
+    # por todos sus nodos: fuera del event loop
+    grafo = await MOTOR_JERARQUIA.obtener(sesion)
+    mejores = await asyncio.get_running_loop().run_in_executor(
+        None, partial(calcular_ranking, grafo, k=k, criterio=criterio)
+    )
+
+    # Nombres solo de los k que se muestran
+    nombres = {}
+    if mejores:
+        statement = sa.select(
+            Usuario.identificacion, Usuario.nombres, Usuario.apellidos, Usuario.rol
+        ).where(Usuario.identificacion.in_([m[0] for m in mejores]))
+        resultado = await sesion.execute(statement)
+        nombres = {fila.identificacion: fila for fila in resultado.all()}
+
+    ranking = []
+    for posicion, (identificacion, total, calidad) in enumerate(mejores, start=1):
+        fila = nombres.get(identificacion)
+        if fila is None:
+            continue
+        ranking.append(
+            {
+                "posicion": posicion,
+                "identificacion": identificacion,
+                "nombre_completo": f"{fila.nombres} {fila.apellidos}",
+                "rol": fila.rol.value,
+                "total_red": total,
+                "calidad_promedio": calidad,
+            }
+        )
+    CACHE_RANKING.guardar(clave, ranking)
+    return ranking
@@ -0,0 +1,89 @@
+# ./app/services/reasignacion.py
+
+"""
+Reasignación en bloque de una red completa
+
+Cuando alguien sale de la campaña, toda su red pasa a otro referente. En
+vez de actualizar asignado_a fila por fila (y disparar el trigger de la
+tabla de cierre una vez por referido), urna_mover_red() en
+app/config/ddl.py mueve el conjunto con una sentencia por paso: tabla de
+cierre, métricas y conteos por rol quedan consistentes en la misma
+transacción. Si se indica quién hace el cambio, la función también
+revisa que origen y destino sean de su red, bajo el mismo candado que
+serializa los cambios de la jerarquía. Después se descartan las cachés de este proceso que
+dependen de la jerarquía, incluida la de usuarios autenticados.
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.exc import IntegrityError, ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.ancestros import invalidar_ancestros
+from app.services.autorizacion import invalidar_red
+from app.services.conteo import invalidar_conteos
+from app.services.jerarquia import MOTOR_JERARQUIA
+from app.services.ranking import CACHE_RANKING
+from app.services.sugerencias import CACHE_SUGERENCIAS
+from app.utils.auth import invalidar_usuario
+
+# SQLSTATE de insufficient_privilege (solicitante sin permiso)
+SIN_PRIVILEGIO = "42501"
+
+
+async def mover_red(
+    sesion: AsyncSession,
+    origen: str,
+    destino: str,
+    incluir_origen: bool = False,
+    solicitante: str | None = None,
+) -> int:
+    """
+    Mueve una red bajo otro referente en una sola transacción
+
+    Args:
+        sesion: Sesión de base de datos
+        origen: Usuario cuya red se mueve
+        destino: Nuevo referente
+        incluir_origen: True para mover al usuario con su red; False para
+            mover solo sus referidos directos (con sus redes)
+        solicitante: Usuario que hace el cambio; origen y destino deben
+            pertenecer a su red. None para no revisarlo
+
+    Returns:
+        Cantidad de personas movidas
+
+    Raises:
+        ValueError: Si el destino no existe o pertenece a la red que se mueve
+        PermissionError: Si origen o destino no son de la red del solicitante
+    """
+    statement = sa.select(
+        sa.func.urna_mover_red(origen, destino, incluir_origen, solicitante)
+    )
+    try:
+        resultado = await sesion.execute(statement)
+        movidos = resultado.scalar() or 0
+        await sesion.commit()
+    except IntegrityError as error:
+        # check_violation / foreign_key_violation de urna_mover_red
+        await sesion.rollback()
+        raise ValueError(
+            "El nuevo referente no existe o pertenece a la red que se mueve"
+        ) from error
+    except ProgrammingError as error:
+        await sesion.rollback()
+        if getattr(error.orig, "sqlstate", None) != SIN_PRIVILEGIO:
+            raise
+        raise PermissionError(
+            "El usuario o el nuevo referente no son de la red de quien hace el cambio"
+        ) from error
+
+    invalidar_red([origen, destino])
+    invalidar_ancestros()
+    MOTOR_JERARQUIA.invalidar()
+    # Cambió asignado_a de los movidos (no se sabe cuáles sin consultar)
+    invalidar_usuario()
+    # Listados, sugerencias y ranking se calculan sobre la red de cada uno
+    invalidar_conteos()
+    CACHE_SUGERENCIAS.limpiar()
+    CACHE_RANKING.limpiar()
+    return movidos
@@ -0,0 +1,105 @@
+# ./app/services/sugerencias.py
+
+"""
+Sugerencias de votantes mientras se escribe en el buscador
+
+Acepta la misma sintaxis que el listado ("campo: valor" y tokens libres),
+retorna solo las columnas que se muestran y limita la cantidad de
+resultados. Las respuestas se guardan unos segundos por
+(usuario, consulta normalizada, límite): al escribir "mar", "mari",
+"maria" y volver a "mari", la repetición no llega a PostgreSQL. La clave
+va sin tildes ni mayúsculas, igual que la comparación en SQL, así que
+"María", "maria" y "MARIA" comparten entrada.
+"""
+
+from typing import Any, Optional
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Usuario
+from app.services.busqueda import normalizar, relevancia
+from app.services.filtros import parsear_filtros, compilar_filtros
+from app.utils.cache import CacheTTL
+
+LIMITE_SUGERENCIAS_DEFECTO = 10
+LIMITE_SUGERENCIAS_MAXIMO = 50
+
+# Respuestas recientes; se limpia al crear votantes
+CACHE_SUGERENCIAS = CacheTTL(ttl=30, maximo=512)
+
+COLUMNAS_SUGERENCIA = (
+    Usuario.identificacion,
+    Usuario.nombres,
+    Usuario.apellidos,
+    Usuario.telefono,
+    Usuario.rol,
+    Usuario.lugar_votacion,
+    Usuario.mesa_votacion,
+)
+
+
+def normalizar_consulta(q: Optional[str]) -> str:
+    """Colapsa espacios para que variantes del mismo texto compartan caché"""
+    return " ".join((q or "").split())
+
+
+async def sugerir_votantes(
+    sesion: AsyncSession,
+    q: str,
+    limite: int = LIMITE_SUGERENCIAS_DEFECTO,
+    usuario_id: Optional[str] = None,
+) -> dict[str, Any]:
+    """
+    Busca los votantes más relevantes para el texto escrito
+
+    Args:
+        sesion: Sesión de base de datos
+        q: Texto del buscador (admite la sintaxis "campo: valor")
+        limite: Máximo de resultados
+        usuario_id: Usuario que consulta (parte de la clave de caché)
+
+    Returns:
+        Diccionario con q, error de sintaxis (o None) y resultados
+    """
+    q = normalizar_consulta(q)
+    clave = (usuario_id, normalizar(q), limite)
+    guardado = CACHE_SUGERENCIAS.obtener(clave)
+    if guardado is not None:
+        error, resultados = guardado
+        return {"q": q, "error": error, "resultados": resultados}
+
+    consulta = parsear_filtros(q)
+    condiciones = compilar_filtros(consulta)
+    resultados = []
+
+    if condiciones:
+        texto = " ".join(consulta.tokens)
+        orden = (
+            [relevancia(texto).desc(), Usuario.identificacion]
+            if texto
+            else [Usuario.fecha_registro.desc(), Usuario.identificacion.desc()]
+        )
+        statement = (
+            sa.select(*COLUMNAS_SUGERENCIA)
+            .where(*condiciones)
+            .order_by(*orden)
+            .limit(limite)
+        )
+        resultado = await sesion.execute(statement)
+        resultados = [
+            {
+                "identificacion": fila.identificacion,
+                "nombre_completo": f"{fila.nombres} {fila.apellidos}",
+                "nombres": fila.nombres,
+                "apellidos": fila.apellidos,
+                "telefono": fila.telefono,
+                "rol": fila.rol.value if fila.rol else None,
+                "lugar_votacion": fila.lugar_votacion,
+                "mesa_votacion": fila.mesa_votacion,
+            }
+            for fila in resultado.all()
+        ]
+
+    CACHE_SUGERENCIAS.guardar(clave, (consulta.error, resultados))
+    return {"q": q, "error": consulta.error, "resultados": resultados}
@@ -3,7 +3,6 @@
  */
 
 import { parseFilters, renderBadges, applyFilters, keyMap } from './filters.js';
-import { Pagination } from './pagination.js';
 import { renderShortNames, renderShortRefNames } from './nameUtils.js';
 import { wireCopyIds } from './idBadge.js';
 
@@ -15,10 +14,6 @@ const noResults = document.getElementById('no-results');
 const countEl = document.getElementById('search-count');
 const badgesEl = document.getElementById('filter-badges');
 const errorEl = document.getElementById('filter-error');
-const paginationEl = document.getElementById('pagination');
-
-// Inicializar paginación
-const pagination = new Pagination(paginationEl);
 
 // Timer para debounce
 let timer = null;
@@ -26,9 +21,9 @@ let timer = null;
 /**
  * Aplica filtros y actualiza la vista
  */
-function applyFilter(skipResetPage) {
+function applyFilter() {
     const parsed = parseFilters(input.value);
-    errorEl.textContent = parsed.error || '';
+    errorEl.textContent = parsed.error || errorEl.dataset.servidor || '';
     renderBadges(parsed, badgesEl);
 
     const visible = applyFilters(parsed, rows, keyMap);
@@ -38,10 +33,6 @@ function applyFilter(skipResetPage) {
         else noResults.classList.add('hidden');
     }
 
-    if (!skipResetPage) pagination.reset();
-    pagination.render(visible);
-    pagination.applyPagination(rows);
-
     if (countEl) {
         countEl.textContent = visible ? `${visible} resultado(s)` : '0 resultados';
     }
@@ -55,9 +46,6 @@ function debouncedFilter() {
     timer = setTimeout(applyFilter, 200);
 }
 
-// Configurar callback de paginación
-pagination.onPageChange = applyFilter;
-
 // Inicialización
 renderShortNames();
 renderShortRefNames();
@@ -7,8 +7,14 @@ Módulo de utilidades para la aplicación
 from .auth import (
     hashear_password,
     verificar_password,
+    hashear_password_async,
+    verificar_password_async,
+    tiene_credenciales,
+    asignar_credenciales,
     guardar_usuario_en_sesion,
     obtener_usuario_desde_sesion,
+    obtener_usuario_actual,
+    invalidar_usuario,
     limpiar_sesion,
     requerir_autenticacion,
 )
@@ -16,8 +22,14 @@ from .auth import (
 __all__ = [
     "hashear_password",
     "verificar_password",
+    "hashear_password_async",
+    "verificar_password_async",
+    "tiene_credenciales",
+    "asignar_credenciales",
     "guardar_usuario_en_sesion",
     "obtener_usuario_desde_sesion",
+    "obtener_usuario_actual",
+    "invalidar_usuario",
     "limpiar_sesion",
     "requerir_autenticacion",
 ]
@@ -2,21 +2,57 @@
 
 """
 Utilidades de autenticación para gestión de sesiones y contraseñas
+
+El usuario autenticado se guarda entre peticiones en CACHE_USUARIOS
+(copia desligada de la fila, por identificación): la navegación normal
+no vuelve a leerlo de PostgreSQL. Cada petición recibe su propia copia
+unida a su sesión con merge(load=False), sin consulta. Los cambios hechos
+por la aplicación llaman a invalidar_usuario(); los que hacen los scripts
+(otro proceso) se ven al vencer el TTL.
+
+bcrypt tarda cientos de milisegundos por operación: en las rutas async se
+usan hashear_password_async y verificar_password_async, que lo ejecutan
+en un pool de hilos acotado para no detener el event loop. Las versiones
+síncronas quedan para los scripts.
 """
 
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+import asyncio
+import os
+import secrets
 import time
 from fastapi import Request, Depends, HTTPException
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 from sqlmodel import select
 from passlib.context import CryptContext
 
 from app.config import obtener_sesion
 from app.models import Usuario
+from app.utils.cache import CacheTTL
 
 # Configuración de bcrypt para hashing de contraseñas
 contexto_password = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Hilos para bcrypt (libera el GIL): es también el máximo de operaciones
+# simultáneas; las demás esperan en cola sin bloquear el event loop
+HILOS_PASSWORD = int(os.getenv("PASSWORD_HILOS", str(min(4, os.cpu_count() or 1))))
+ejecutor_password = ThreadPoolExecutor(
+    max_workers=HILOS_PASSWORD, thread_name_prefix="bcrypt"
+)
+limite_password = asyncio.Semaphore(HILOS_PASSWORD)
+metricas_password = {
+    "en_cola": 0,
+    "en_ejecucion": 0,
+    "maximo_en_cola": 0,
+    "completadas": 0,
+}
+
+# Usuarios autenticados por identificación
+CACHE_USUARIOS = CacheTTL(ttl=300, maximo=1024)
+
 
 def hashear_password(password: str) -> str:
     """
@@ -45,6 +81,100 @@ def verificar_password(password: str, hash_password: str) -> bool:
     return contexto_password.verify(password, hash_password)
 
 
+async def _ejecutar_password(funcion: Callable[..., Any], *args: Any) -> Any:
+    """
+    Ejecuta una operación de bcrypt en ejecutor_password
+
+    Args:
+        funcion: Operación síncrona (hash o verificación)
+        *args: Argumentos de la operación
+
+    Returns:
+        Resultado de la operación
+    """
+    metricas_password["en_cola"] += 1
+    metricas_password["maximo_en_cola"] = max(
+        metricas_password["maximo_en_cola"], metricas_password["en_cola"]
+    )
+    try:
+        await limite_password.acquire()
+    finally:
+        metricas_password["en_cola"] -= 1
+
+    metricas_password["en_ejecucion"] += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(ejecutor_password, funcion, *args)
+    finally:
+        metricas_password["en_ejecucion"] -= 1
+        metricas_password["completadas"] += 1
+        limite_password.release()
+
+
+async def hashear_password_async(password: str) -> str:
+    """
+    Hashea una contraseña sin bloquear el event loop
+
+    Args:
+        password: Contraseña en texto plano
+
+    Returns:
+        Hash de la contraseña
+    """
+    return await _ejecutar_password(hashear_password, password)
+
+
+async def verificar_password_async(password: str, hash_password: str) -> bool:
+    """
+    Verifica una contraseña contra su hash sin bloquear el event loop
+
+    Args:
+        password: Contraseña en texto plano
+        hash_password: Hash de la contraseña almacenada
+
+    Returns:
+        True si la contraseña coincide, False en caso contrario
+    """
+    return await _ejecutar_password(verificar_password, password, hash_password)
+
+
+def tiene_credenciales(usuario: Optional[Usuario]) -> bool:
+    """
+    Indica si el usuario puede iniciar sesión
+
+    Args:
+        usuario: Usuario o None
+
+    Returns:
+        False si no existe o se registró sin credenciales
+    """
+    return usuario is not None and bool(usuario.password)
+
+
+async def asignar_credenciales(
+    sesion: AsyncSession, usuario: Usuario, password: Optional[str] = None
+) -> str:
+    """
+    Asigna la contraseña de un usuario (al ascenderlo o invitarlo a
+    iniciar sesión) y guarda el cambio
+
+    Args:
+        sesion: Sesión de base de datos
+        usuario: Usuario al que se le asignan credenciales
+        password: Contraseña en texto plano; None genera una aleatoria
+
+    Returns:
+        Contraseña en texto plano, para entregársela al usuario
+    """
+    if password is None:
+        password = secrets.token_urlsafe(12)
+    usuario.password = await hashear_password_async(password)
+    sesion.add(usuario)
+    await sesion.commit()
+    invalidar_usuario(usuario.identificacion)
+    return password
+
+
 def guardar_usuario_en_sesion(request: Request, usuario: Usuario) -> None:
     """
     Guarda los datos del usuario en la sesión
@@ -57,6 +187,8 @@ def guardar_usuario_en_sesion(request: Request, usuario: Usuario) -> None:
     request.session["usuario_rol"] = usuario.rol.value if usuario.rol else None
     request.session["usuario_nombre"] = usuario.nombre_completo
     request.session["ultimo_uso"] = int(time.time())
+    # Un nuevo inicio de sesión vuelve a leer el usuario
+    invalidar_usuario(usuario.identificacion)
 
 
 async def obtener_usuario_desde_sesion(
@@ -77,11 +209,92 @@ async def obtener_usuario_desde_sesion(
     if not usuario_id:
         return None
 
+    instantanea = CACHE_USUARIOS.obtener(usuario_id)
+    if instantanea is not None:
+        # Copia unida a la sesión de esta petición, sin leer la BD
+        return await sesion.merge(instantanea, load=False)
+
     # Obtener usuario completo desde base de datos
     statement = select(Usuario).where(Usuario.identificacion == usuario_id)
     resultado = await sesion.execute(statement)
     usuario = resultado.scalar_one_or_none()
 
+    if usuario is not None:
+        CACHE_USUARIOS.guardar(usuario_id, copiar_usuario(usuario))
+
+    return usuario
+
+
+def copiar_usuario(usuario: Usuario) -> Usuario:
+    """
+    Copia desligada de un usuario, independiente de cualquier sesión
+
+    Args:
+        usuario: Usuario leído de la base de datos
+
+    Returns:
+        Usuario en estado detached con los mismos valores de columna
+    """
+    copia = Usuario(
+        **{
+            columna: getattr(usuario, columna)
+            for columna in Usuario.__table__.columns.keys()
+        }
+    )
+    make_transient_to_detached(copia)
+    return copia
+
+
+def invalidar_usuario(identificacion: Optional[str] = None) -> None:
+    """
+    Descarta el usuario guardado (llamar después de modificarlo)
+
+    Args:
+        identificacion: ID del usuario; None descarta todos (ej. después
+            de reasignar una red completa)
+    """
+    if identificacion is None:
+        CACHE_USUARIOS.limpiar()
+    else:
+        CACHE_USUARIOS.invalidar(identificacion)
+
+
+async def obtener_usuario_actual(
+    request: Request, sesion: AsyncSession = Depends(obtener_sesion)
+) -> Optional[Usuario]:
+    """
+    Resuelve el usuario de la petición una sola vez y lo deja en
+    request.state.usuario (para los templates y las demás dependencias)
+
+    Se registra como dependencia global de la aplicación: FastAPI reutiliza
+    la misma sesión de base de datos para esta dependencia y para las de
+    la ruta, así que cada petición hace a lo sumo una consulta de usuario
+    y un solo checkout del pool. Sin usuario_id en la sesión no consulta.
+
+    Args:
+        request: Request de FastAPI
+        sesion: Sesión de base de datos de la petición
+
+    Returns:
+        Usuario autenticado o None
+    """
+    if getattr(request.state, "usuario_resuelto", False):
+        return request.state.usuario
+
+    # /static y /salud no pasan por la sesión (UsuarioContextMiddleware)
+    if "session" not in request.scope:
+        return None
+
+    try:
+        usuario = await obtener_usuario_desde_sesion(request, sesion)
+    except SQLAlchemyError:
+        # Un error de BD no debe romper las páginas públicas; la sesión es
+        # la de la ruta y no puede quedar con la transacción fallida
+        await sesion.rollback()
+        usuario = None
+
+    request.state.usuario = usuario
+    request.state.usuario_resuelto = True
     return usuario
 
 
@@ -112,7 +325,8 @@ async def requerir_autenticacion(
     Raises:
         HTTPException: Redirige a login si no está autenticado
     """
-    usuario = await obtener_usuario_desde_sesion(request, sesion)
+    # Ya resuelto por la dependencia global: no vuelve a consultar
+    usuario = await obtener_usuario_actual(request, sesion)
 
     if not usuario:
         # Redirigir a login si no está autenticado
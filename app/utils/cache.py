@@ -0,0 +1,82 @@
+# ./app/utils/cache.py
+
+"""
+Caché en memoria con expiración (TTL) y tamaño acotado
+
+Pensada para resultados que pueden quedar unos segundos desactualizados
+(ej. sugerencias de búsqueda mientras se escribe). Es local a cada proceso:
+con varios workers cada uno tiene su propia copia.
+"""
+
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+import time
+
+
+class CacheTTL:
+    """
+    Diccionario con vencimiento por entrada y desalojo LRU
+
+    Args:
+        ttl: Segundos que vive cada entrada
+        maximo: Número máximo de entradas (se desaloja la menos usada)
+    """
+
+    def __init__(self, ttl: float, maximo: int = 1024):
+        self.ttl = ttl
+        self.maximo = maximo
+        self._entradas: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def obtener(self, clave: Hashable, defecto: Optional[Any] = None) -> Any:
+        """
+        Retorna el valor guardado si no ha vencido
+
+        Args:
+            clave: Clave de la entrada
+            defecto: Valor a retornar si no existe o venció
+
+        Returns:
+            Valor guardado o defecto
+        """
+        entrada = self._entradas.get(clave)
+        if entrada is None:
+            return defecto
+        vence, valor = entrada
+        if vence <= time.monotonic():
+            del self._entradas[clave]
+            return defecto
+        self._entradas.move_to_end(clave)
+        return valor
+
+    def guardar(self, clave: Hashable, valor: Any) -> None:
+        """
+        Guarda un valor con el TTL de la caché
+
+        Args:
+            clave: Clave de la entrada
+            valor: Valor a guardar
+        """
+        self._entradas[clave] = (time.monotonic() + self.ttl, valor)
+        self._entradas.move_to_end(clave)
+        while len(self._entradas) > self.maximo:
+            self._entradas.popitem(last=False)
+
+    def items(self) -> list[tuple[Hashable, Any]]:
+        """Copia de las entradas vigentes como pares (clave, valor)"""
+        ahora = time.monotonic()
+        return [
+            (clave, valor)
+            for clave, (vence, valor) in self._entradas.items()
+            if vence > ahora
+        ]
+
+    def invalidar(self, clave: Hashable) -> None:
+        """Elimina una entrada si existe"""
+        self._entradas.pop(clave, None)
+
+    def limpiar(self) -> None:
+        """Elimina todas las entradas"""
+        self._entradas.clear()
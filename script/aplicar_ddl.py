@@ -0,0 +1,44 @@
+# ./script/aplicar_ddl.py
+
+"""
+Script para crear las tablas que falten y aplicar las extensiones,
+funciones e índices de PostgreSQL
+En producción las tablas no se crean al iniciar, así que este script
+debe ejecutarse después de cada despliegue que agregue modelos o
+modifique app/config/ddl.py
+"""
+
+import sys
+from pathlib import Path
+
+# Agregar el directorio raíz del proyecto al path
+proyecto_raiz = Path(__file__).parent.parent
+sys.path.insert(0, str(proyecto_raiz))
+
+import asyncio  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+import app.models  # noqa: E402,F401  (registra las tablas en SQLModel.metadata)
+from app.config import motor_async, async_session_maker  # noqa: E402
+from app.config.ddl import aplicar_ddl, SENTENCIAS_DDL  # noqa: E402
+from app.services.jerarquia import detectar_ciclos  # noqa: E402
+
+
+async def main():
+    """Crea las tablas nuevas y aplica el DDL en una sola transacción"""
+    print(f"🔧 Aplicando {len(SENTENCIAS_DDL)} sentencias DDL...")
+    async with motor_async.begin() as conexion:
+        # usuario_red y sus resúmenes deben existir antes de los triggers
+        await conexion.run_sync(SQLModel.metadata.create_all)
+        await aplicar_ddl(conexion)
+
+    # La carga inicial de usuario_red omite las aristas que cierran ciclos
+    async with async_session_maker() as sesion:
+        ciclos = await detectar_ciclos(sesion)
+    if ciclos:
+        print(f"⚠️  Usuarios en ciclos de asignado_a: {', '.join(ciclos)}")
+    await motor_async.dispose()
+    print("✅ DDL aplicado correctamente")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
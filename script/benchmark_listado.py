@@ -0,0 +1,97 @@
+# ./script/benchmark_listado.py
+
+"""
+Benchmark del costo por fila del listado de votantes
+
+Compara cargar modelos Usuario completos (select(Usuario) + ORM) contra la
+proyección de columnas del listado envuelta en FilaVotante. Usa SQLite en
+memoria para aislar el costo de hidratación del costo de red.
+
+Uso:
+    python script/benchmark_listado.py [filas] [repeticiones]
+"""
+
+import sys
+from pathlib import Path
+
+# Agregar el directorio raíz del proyecto al path
+proyecto_raiz = Path(__file__).parent.parent
+sys.path.insert(0, str(proyecto_raiz))
+
+import time  # noqa: E402
+from datetime import datetime, timedelta  # noqa: E402
+
+import sqlalchemy as sa  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from sqlmodel import select  # noqa: E402
+
+from app.models.usuario import Usuario, RolUsuario, TipoSexo  # noqa: E402
+from app.services.listado import COLUMNAS_LISTADO, FilaVotante  # noqa: E402
+
+
+def preparar_motor(filas: int) -> sa.Engine:
+    """Crea la tabla usuario en SQLite en memoria con datos sintéticos"""
+    motor = sa.create_engine("sqlite://")
+    Usuario.__table__.create(motor)
+    base = datetime(2024, 1, 1)
+    datos = [
+        {
+            "identificacion": str(10000000 + i),
+            "nombres": "María Fernanda",
+            "apellidos": "Rodríguez López",
+            "telefono": f"3{i:09d}",
+            "edad": 30,
+            "sexo": TipoSexo.FEMENINO,
+            "correoelectronico": "maria@ejemplo.com",
+            "barrio_vereda": "Centro",
+            "lugar_votacion": "Escuela Central",
+            "mesa_votacion": str(i % 50),
+            "rol": RolUsuario.VOTANTE,
+            "asignado_a": None,
+            "password": "$2b$12$" + "x" * 53,
+            "calidad_score": 50,
+            "fecha_registro": base - timedelta(seconds=i),
+            "fecha_actualizacion": base,
+        }
+        for i in range(filas)
+    ]
+    with motor.begin() as conexion:
+        conexion.execute(sa.insert(Usuario.__table__), datos)
+    return motor
+
+
+def medir(funcion, repeticiones: int) -> float:
+    """Retorna el mejor tiempo (segundos) de varias repeticiones"""
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    motor = preparar_motor(filas)
+
+    def con_modelos():
+        with Session(motor) as sesion:
+            sesion.execute(select(Usuario)).scalars().all()
+
+    def con_proyeccion():
+        with motor.connect() as conexion:
+            resultado = conexion.execute(sa.select(*COLUMNAS_LISTADO))
+            [FilaVotante(*fila) for fila in resultado.all()]
+
+    t_modelos = medir(con_modelos, repeticiones)
+    t_proyeccion = medir(con_proyeccion, repeticiones)
+
+    print(f"Filas: {filas}")
+    print(f"  Usuario completo : {t_modelos / filas * 1e6:8.2f} µs/fila")
+    print(f"  FilaVotante      : {t_proyeccion / filas * 1e6:8.2f} µs/fila")
+    print(f"  Mejora           : {t_modelos / t_proyeccion:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# ./script/benchmark_middleware.py
+
+"""
+Benchmark de peticiones por segundo del middleware de sesión
+
+Compara el UsuarioContextMiddleware anterior (BaseHTTPMiddleware detrás
+de SessionMiddleware) contra el actual (ASGI puro que salta /static y
+/salud). Llama a la aplicación ASGI directamente, sin servidor ni red,
+con una cookie de sesión válida, para medir solo el costo del middleware.
+Las rutas no tocan la base de datos.
+
+Uso:
+    python script/benchmark_middleware.py [peticiones]
+"""
+
+import sys
+from pathlib import Path
+
+# Agregar el directorio raíz del proyecto al path
+proyecto_raiz = Path(__file__).parent.parent
+sys.path.insert(0, str(proyecto_raiz))
+
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import os  # noqa: E402
+import time  # noqa: E402
+from base64 import b64encode  # noqa: E402
+
+import itsdangerous  # noqa: E402
+from starlette.applications import Starlette  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+from starlette.middleware.sessions import SessionMiddleware  # noqa: E402
+from starlette.responses import (  # noqa: E402
+    JSONResponse,
+    PlainTextResponse,
+    RedirectResponse,
+    StreamingResponse,
+)
+from starlette.routing import Route  # noqa: E402
+
+from app.middleware import UsuarioContextMiddleware  # noqa: E402
+
+SECRETO = "benchmark"
+COOKIE = "urna_session"
+
+
+class ContextoAnterior(BaseHTTPMiddleware):
+    """UsuarioContextMiddleware anterior, sin la consulta a la base de datos"""
+
+    async def dispatch(self, request, call_next):
+        request.state.usuario = None
+        idle_timeout = int(os.getenv("SESSION_IDLE_TIMEOUT_SECONDS", "2700"))
+        path = request.url.path
+        excluded = path.startswith("/static") or path.startswith("/auth/login")
+        now = int(time.time())
+        last = request.session.get("ultimo_uso")
+
+        if last and now - last > idle_timeout:
+            request.session.clear()
+            if not excluded:
+                return RedirectResponse(url="/auth/login", status_code=303)
+
+        if request.session.get("usuario_id"):
+            request.session["ultimo_uso"] = now
+
+        return await call_next(request)
+
+
+async def estatico(request):
+    return PlainTextResponse("body{}" * 200)
+
+
+async def salud(request):
+    return JSONResponse({"estado": "saludable"})
+
+
+async def pagina(request):
+    return JSONResponse({"usuario": request.session.get("usuario_id")})
+
+
+async def flujo(request):
+    async def partes():
+        for _ in range(8):
+            yield b"<tr><td>fila</td></tr>" * 200
+
+    return StreamingResponse(partes(), media_type="text/html")
+
+
+RUTAS = [
+    Route("/static/app.css", estatico),
+    Route("/salud", salud),
+    Route("/votantes", pagina),
+    Route("/votantes/stream", flujo),
+]
+
+
+def app_anterior() -> Starlette:
+    app = Starlette(routes=RUTAS)
+    app.add_middleware(ContextoAnterior)
+    app.add_middleware(SessionMiddleware, secret_key=SECRETO, session_cookie=COOKIE)
+    return app
+
+
+def app_actual() -> Starlette:
+    app = Starlette(routes=RUTAS)
+    app.add_middleware(
+        UsuarioContextMiddleware, secret_key=SECRETO, session_cookie=COOKIE
+    )
+    return app
+
+
+def cookie_sesion() -> bytes:
+    """Cookie firmada como la que deja el login"""
+    datos = {
+        "usuario_id": "1234567890",
+        "usuario_rol": "Líder",
+        "usuario_nombre": "María Fernanda Rodríguez López",
+        "ultimo_uso": int(time.time()),
+    }
+    valor = b64encode(json.dumps(datos).encode("utf-8"))
+    firmado = itsdangerous.TimestampSigner(SECRETO).sign(valor)
+    return COOKIE.encode() + b"=" + firmado
+
+
+async def medir(app, path: str, peticiones: int, cookie: bytes) -> float:
+    """Retorna las peticiones por segundo sobre una ruta"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost"), (b"cookie", cookie)],
+        "server": ("localhost", 80),
+        "client": ("127.0.0.1", 50000),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(mensaje):
+        pass
+
+    # Calentamiento (arma la pila de middlewares)
+    for _ in range(100):
+        await app(dict(scope), receive, send)
+
+    inicio = time.perf_counter()
+    for _ in range(peticiones):
+        await app(dict(scope), receive, send)
+    return peticiones / (time.perf_counter() - inicio)
+
+
+async def comparar(peticiones: int) -> None:
+    cookie = cookie_sesion()
+    anterior, actual = app_anterior(), app_actual()
+
+    print(f"Peticiones por ruta: {peticiones}")
+    print(f"  {'Ruta':<18}{'Anterior':>12}{'Actual':>12}{'Mejora':>9}")
+    for path in [ruta.path for ruta in RUTAS]:
+        antes = await medir(anterior, path, peticiones, cookie)
+        despues = await medir(actual, path, peticiones, cookie)
+        print(
+            f"  {path:<18}{antes:>9.0f} rps{despues:>8.0f} rps"
+            f"{despues / antes:>8.2f}x"
+        )
+
+
+def main():
+    peticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    asyncio.run(comparar(peticiones))
+
+
+if __name__ == "__main__":
+    main()
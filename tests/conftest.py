@@ -0,0 +1,106 @@
+import os
+
+import pytest
+
+# app/__init__.py exige SECRET_KEY al importarse
+os.environ.setdefault("SECRET_KEY", "pruebas")
+
+from app import app  # noqa: E402
+
+
+class FakeResult:
+    """
+    Resultado de sesion.execute()/stream() con filas fijas
+
+    Args:
+        filas: Filas (o escalares) que devuelven all(), first() y la
+            iteración asíncrona
+        escalar: Valor de scalar() y scalar_one_or_none()
+    """
+
+    def __init__(self, filas=(), escalar=None):
+        self._filas = list(filas)
+        self._escalar = escalar
+
+    def all(self):
+        return list(self._filas)
+
+    def first(self):
+        return self._filas[0] if self._filas else None
+
+    def scalar(self):
+        return self._escalar
+
+    def scalar_one_or_none(self):
+        return self._escalar
+
+    def scalars(self):
+        return self
+
+    def __aiter__(self):
+        return self._iterar()
+
+    async def _iterar(self):
+        for fila in self._filas:
+            yield fila
+
+    async def close(self):
+        pass
+
+
+class FakeSession:
+    """
+    AsyncSession falsa que registra lo que se le pide
+
+    Args:
+        resultado: FakeResult de cada execute(); una lista para responder
+            en orden (la última se repite); o una función
+            statement -> FakeResult
+        error: Excepción que lanza execute()
+    """
+
+    def __init__(self, resultado=None, error=None):
+        self.resultado = FakeResult() if resultado is None else resultado
+        self.error = error
+        self.statements = []
+        self.agregados = []
+        self.unidos = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def _responder(self, statement):
+        if callable(self.resultado):
+            return self.resultado(statement)
+        if isinstance(self.resultado, list):
+            indice = min(len(self.statements), len(self.resultado)) - 1
+            return self.resultado[indice]
+        return self.resultado
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        if self.error:
+            raise self.error
+        return self._responder(statement)
+
+    async def stream(self, statement):
+        return await self.execute(statement)
+
+    def add(self, instancia):
+        self.agregados.append(instancia)
+
+    async def merge(self, instancia, load=True):
+        self.unidos.append(instancia)
+        return instancia
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture(autouse=True)
+def limpiar_overrides():
+    """Cada prueba empieza sin dependencias sustituidas"""
+    yield
+    app.dependency_overrides.clear()
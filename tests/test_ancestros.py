@@ -0,0 +1,43 @@
+import asyncio
+
+from sqlalchemy.dialects import postgresql
+
+from app.models import RolUsuario
+from app.services.ancestros import (
+    CACHE_ANCESTROS,
+    consulta_ancestros,
+    invalidar_ancestros,
+    obtener_ancestros,
+)
+
+from conftest import FakeResult, FakeSession
+
+
+class Fila:
+    def __init__(self, identificacion, rol, profundidad):
+        self.identificacion = identificacion
+        self.nombres = "N" + identificacion
+        self.apellidos = "A"
+        self.rol = rol
+        self.profundidad = profundidad
+
+
+def test_consulta_usa_tabla_de_cierre():
+    sql = str(consulta_ancestros("9").compile(dialect=postgresql.dialect()))
+    assert "RECURSIVE" not in sql
+    assert "usuario_red.descendiente = " in sql
+    assert "ORDER BY usuario_red.profundidad DESC" in sql
+
+
+def test_cadena_se_consulta_una_vez():
+    invalidar_ancestros()
+    sesion = FakeSession(
+        FakeResult([Fila("1", RolUsuario.ESTRATEGA, 2), Fila("2", RolUsuario.LIDER, 1)])
+    )
+    cadena = asyncio.run(obtener_ancestros(sesion, "3"))
+    assert [a["rol"] for a in cadena] == ["Estratega", "Líder"]
+    assert asyncio.run(obtener_ancestros(sesion, "3")) == cadena
+    assert len(sesion.statements) == 1
+
+    invalidar_ancestros()
+    assert len(CACHE_ANCESTROS) == 0
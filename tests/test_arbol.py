@@ -0,0 +1,89 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+
+from app import app
+from app.config import obtener_sesion
+from app.models.usuario import Usuario, RolUsuario
+from app.services.arbol import cargar_subarbol, consulta_subarbol
+from app.utils.auth import requerir_autenticacion
+
+from conftest import FakeResult, FakeSession
+
+V, A = RolUsuario.VOTANTE, RolUsuario.ACTIVISTA
+
+
+class Fila:
+    def __init__(self, profundidad, identificacion, asignado_a, rol, hijos):
+        self.profundidad = profundidad
+        self.identificacion = identificacion
+        self.asignado_a = asignado_a
+        self.nombres = "N" + identificacion
+        self.apellidos = "A"
+        self.rol = rol
+        self.mesa_votacion = None
+        self.lugar_votacion = None
+        self.telefono = None
+        self.total_referidos = hijos
+        self.total_red = hijos
+
+
+# 1 -> (2 -> (4, 5), 3); el nivel 3 (hijos de 4) quedó fuera por el tope
+FILAS = [
+    Fila(0, "1", None, RolUsuario.LIDER, 2),
+    Fila(1, "3", "1", V, 0),
+    Fila(1, "2", "1", A, 2),
+    Fila(2, "4", "2", V, 1),
+    Fila(2, "5", "2", V, 0),
+]
+
+
+def test_consulta_acotada_sin_recursion():
+    sql = str(consulta_subarbol("1", 3, 100).compile(dialect=postgresql.dialect()))
+    assert "RECURSIVE" not in sql
+    # El corte sale de los conteos por nivel, no de contar a las personas
+    assert (
+        "sum(usuario_red_nivel.cantidad) OVER (ORDER BY usuario_red_nivel.profundidad)"
+        in sql
+    )
+    assert "OVER (ORDER BY usuario_red.profundidad)" not in sql
+    assert "usuario_red.profundidad <= least(" in sql
+
+
+def test_subarbol_anidado():
+    datos = asyncio.run(cargar_subarbol(FakeSession(FakeResult(FILAS)), "1", 3))
+    assert datos["total_referidos_directos"] == 2
+    assert list(datos["referidos_por_rol"]) == ["Votante", "Activista"]
+    dos = datos["referidos_por_rol"]["Activista"][0]
+    assert [p["identificacion"] for p in dos["referidos_por_rol"]["Votante"]] == [
+        "4",
+        "5",
+    ]
+    # Último nivel cargado: sus referidos se piden al expandir
+    cuatro = dos["referidos_por_rol"]["Votante"][0]
+    assert cuatro["referidos_por_rol"] is None
+    assert datos["profundidad"] == 2
+    assert datos["truncado"] is True
+
+
+def test_subarbol_inexistente():
+    assert asyncio.run(cargar_subarbol(FakeSession(FakeResult([])), "1", 3)) is None
+
+
+def test_api_depth_en_una_consulta():
+    sesion = FakeSession(FakeResult(FILAS))
+
+    async def fake_sesion():
+        yield sesion
+
+    app.dependency_overrides[obtener_sesion] = fake_sesion
+    app.dependency_overrides[requerir_autenticacion] = lambda: Usuario(
+        identificacion="1", nombres="Ana", apellidos="Ruiz", password="x"
+    )
+    cliente = TestClient(app)
+    r = cliente.get("/votantes/1/referidos?depth=3")
+    assert r.status_code == 200
+    assert r.json()["referidos_por_rol"]["Activista"][0]["referidos_por_rol"]
+    # Propio perfil: sin consulta de permiso, solo el subárbol
+    assert len(sesion.statements) == 1
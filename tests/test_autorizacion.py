@@ -0,0 +1,49 @@
+import asyncio
+
+from app.services import autorizacion
+from app.services.autorizacion import (
+    CACHE_RED,
+    RED_DEMASIADO_GRANDE,
+    codificar_id,
+    invalidar_red,
+    puede_ver_perfil,
+)
+
+from conftest import FakeResult, FakeSession
+
+
+def test_codificar_id_distingue_ceros_iniciales():
+    assert codificar_id("0123456") != codificar_id("123456")
+    assert codificar_id("12a") is None
+    assert codificar_id("12345678901") is None
+
+
+def test_red_se_consulta_una_vez():
+    CACHE_RED.limpiar()
+    sesion = FakeSession(FakeResult(["30", "10", "20"]))
+    assert asyncio.run(puede_ver_perfil(sesion, "20", "1")) is True
+    assert asyncio.run(puede_ver_perfil(sesion, "40", "1")) is False
+    assert asyncio.run(puede_ver_perfil(sesion, "1", "1")) is True
+    assert len(sesion.statements) == 1
+
+
+def test_red_demasiado_grande_se_lee_una_sola_vez(monkeypatch):
+    CACHE_RED.limpiar()
+    monkeypatch.setattr(autorizacion, "MAXIMO_DESCENDIENTES", 2)
+    sesion = FakeSession(FakeResult(["10", "20", "30"]))
+    assert asyncio.run(puede_ver_perfil(sesion, "20", "1")) is None
+    # Solo queda la marca: los siguientes clics no vuelven a leer la red
+    assert CACHE_RED.obtener("1") is RED_DEMASIADO_GRANDE
+    assert asyncio.run(puede_ver_perfil(sesion, "30", "1")) is None
+    assert len(sesion.statements) == 1
+    invalidar_red(["20"])
+    assert CACHE_RED.obtener("1") is RED_DEMASIADO_GRANDE
+
+
+def test_invalidar_red_descarta_ancestros():
+    CACHE_RED.limpiar()
+    asyncio.run(puede_ver_perfil(FakeSession(FakeResult(["10", "20"])), "20", "1"))
+    asyncio.run(puede_ver_perfil(FakeSession(FakeResult(["30"])), "30", "2"))
+    invalidar_red(["20"])
+    assert CACHE_RED.obtener("1") is None
+    assert CACHE_RED.obtener("2") is not None
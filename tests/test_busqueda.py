@@ -0,0 +1,53 @@
+import asyncio
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.busqueda import (
+    buscar_votantes,
+    condicion_texto,
+    normalizar,
+)
+
+
+def _compilar(expresion):
+    compilado = expresion.compile(dialect=postgresql.dialect())
+    return str(compilado), list(compilado.params.values())
+
+
+def test_normalizar_quita_tildes_y_mayusculas():
+    assert normalizar("José PÉREZ Ñuñez") == "jose perez nunez"
+
+
+def test_texto_usa_expresion_indexada_normalizada():
+    sql, params = _compilar(condicion_texto("José Pérez"))
+    assert sql.count("urna_nombre_busqueda(usuario.nombres, usuario.apellidos)") == 2
+    assert params == ["%jose%", "%perez%"]
+
+
+def test_digitos_buscan_prefijo_de_cedula_y_telefono():
+    sql, params = _compilar(condicion_texto("3001"))
+    assert "usuario.identificacion LIKE" in sql
+    assert "usuario.telefono LIKE" in sql
+    assert params == ["3001%", "3001%"]
+
+
+def test_buscar_ordena_por_relevancia_y_limita():
+    class FakeResult:
+        def scalars(self):
+            return self
+
+        def all(self):
+            return []
+
+    class FakeSession:
+        statement = None
+
+        async def execute(self, statement):
+            FakeSession.statement = statement
+            return FakeResult()
+
+    assert asyncio.run(buscar_votantes(FakeSession(), "  ")) == []
+    asyncio.run(buscar_votantes(FakeSession(), "maria", limite=5))
+    sql, params = _compilar(FakeSession.statement)
+    assert "ORDER BY similarity(" in sql
+    assert 5 in params
@@ -0,0 +1,61 @@
+import asyncio
+
+import sqlalchemy as sa
+
+from app.services.conteo import (
+    CACHE_CONTEOS,
+    UMBRAL_ESTIMACION,
+    Conteo,
+    contar_votantes,
+    invalidar_conteos,
+)
+from app.models.usuario import Usuario
+
+from conftest import FakeResult, FakeSession
+
+
+def _sesion(estimado, exacto=7):
+    """Responde pg_class con el estimado y count(*) con el exacto"""
+
+    def responder(statement):
+        if "pg_class" in str(statement):
+            return FakeResult(escalar=estimado)
+        return FakeResult(escalar=exacto)
+
+    return FakeSession(responder)
+
+
+def test_texto_de_conteo_exacto_y_aproximado():
+    assert Conteo(1234).texto == "1.234"
+    assert Conteo(1_234_567, aproximado=True).texto == "~1.2M"
+    assert Conteo(45_300, aproximado=True).texto == "~45.3K"
+
+
+def test_sin_filtros_en_tabla_grande_usa_estimacion():
+    invalidar_conteos()
+    sesion = _sesion(estimado=2_000_000)
+    conteo = asyncio.run(contar_votantes(sesion))
+    assert conteo == Conteo(2_000_000, aproximado=True)
+    assert len(sesion.statements) == 1
+
+
+def test_tabla_pequena_o_sin_analizar_cuenta_exacto():
+    invalidar_conteos()
+    sesion = _sesion(estimado=-1)
+    assert asyncio.run(contar_votantes(sesion)) == Conteo(7)
+    assert "count(*)" in str(sesion.statements[-1])
+
+
+def test_conteo_filtrado_se_cachea_hasta_invalidar():
+    invalidar_conteos()
+    sesion = _sesion(estimado=UMBRAL_ESTIMACION * 10)
+    condiciones = [Usuario.mesa_votacion == "3"]
+    asyncio.run(contar_votantes(sesion, "mesa: 3", condiciones))
+    asyncio.run(contar_votantes(sesion, " mesa:  3", condiciones))
+    assert len(sesion.statements) == 1
+    assert "pg_class" not in str(sesion.statements[0])
+    assert len(CACHE_CONTEOS) == 1
+
+    invalidar_conteos()
+    asyncio.run(contar_votantes(sesion, "mesa: 3", [sa.true()]))
+    assert len(sesion.statements) == 2
@@ -0,0 +1,60 @@
+from sqlalchemy.dialects import postgresql
+
+from app.models.usuario import RolUsuario, TipoSexo
+from app.services.filtros import compilar_filtros, parsear_filtros
+
+
+def _sql(condicion):
+    return str(
+        condicion.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+
+
+def _parametros(condicion):
+    return list(condicion.compile(dialect=postgresql.dialect()).params.values())
+
+
+def test_parsear_separa_filtros_y_tokens():
+    consulta = parsear_filtros("(Mesa: 12), rol:Líder, juan")
+    assert consulta.filtros == [("mesa", "12"), ("rol", "Líder")]
+    assert consulta.tokens == ["juan"]
+    assert consulta.error is None
+
+
+def test_parsear_reporta_valor_vacio():
+    consulta = parsear_filtros("mesa:, pedro")
+    assert consulta.filtros == []
+    assert consulta.error == "Sintaxis inválida: valor vacío"
+
+
+def test_compilar_usa_igualdad_y_prefijo_indexables():
+    consulta = parsear_filtros("mesa: 12, cc: 1020, rol: lider, sexo: f")
+    condiciones = compilar_filtros(consulta)
+    mesa, cc, rol, sexo = [_sql(c) for c in condiciones]
+    assert mesa == "urna_normalizar(usuario.mesa_votacion) = '12'"
+    assert cc.startswith("usuario.identificacion LIKE")
+    assert _parametros(condiciones[1]) == ["1020%"]
+    assert RolUsuario.LIDER.name in rol and "IN" in rol
+    assert TipoSexo.FEMENINO.name in sexo
+
+
+def test_compilar_escapa_comodines_like():
+    consulta = parsear_filtros("lugar: 100%_real")
+    (condicion,) = compilar_filtros(consulta)
+    assert _parametros(condicion) == ["%100\\%\\_real%"]
+
+
+def test_campo_desconocido_no_retorna_resultados():
+    consulta = parsear_filtros("color: rojo")
+    (condicion,) = compilar_filtros(consulta)
+    assert _sql(condicion) == "false"
+    assert consulta.error == "Campo desconocido: color"
+
+
+def test_referente_por_nombre_usa_subconsulta():
+    consulta = parsear_filtros("referido: maria")
+    (condicion,) = compilar_filtros(consulta)
+    sql = _sql(condicion)
+    assert "usuario.asignado_a IN (SELECT" in sql
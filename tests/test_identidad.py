@@ -0,0 +1,104 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.models import Usuario, RolUsuario
+from app.utils.auth import (
+    CACHE_USUARIOS,
+    invalidar_usuario,
+    obtener_usuario_actual,
+    requerir_autenticacion,
+)
+
+from conftest import FakeResult, FakeSession
+
+
+def _request(usuario_id=None):
+    sesion = {"usuario_id": usuario_id} if usuario_id else {}
+    return SimpleNamespace(
+        scope={"session": sesion}, session=sesion, state=SimpleNamespace()
+    )
+
+
+def _usuario():
+    return Usuario(
+        identificacion="1",
+        nombres="Ana",
+        apellidos="Gómez",
+        rol=RolUsuario.LIDER,
+        password="x",
+    )
+
+
+def test_usuario_se_consulta_una_vez_por_peticion():
+    CACHE_USUARIOS.limpiar()
+    usuario = _usuario()
+    sesion = FakeSession(FakeResult(escalar=usuario))
+    request = _request("1")
+
+    async def peticion():
+        # Dependencia global y luego la de la ruta, con la misma sesión
+        await obtener_usuario_actual(request, sesion)
+        return await requerir_autenticacion(request, sesion)
+
+    assert asyncio.run(peticion()) is usuario
+    assert request.state.usuario is usuario
+    assert len(sesion.statements) == 1
+
+
+def test_sin_usuario_id_no_consulta():
+    sesion = FakeSession()
+    request = _request()
+    assert asyncio.run(obtener_usuario_actual(request, sesion)) is None
+    assert request.state.usuario is None
+    assert sesion.statements == []
+
+
+def test_error_de_bd_deja_usuario_vacio_y_revierte():
+    CACHE_USUARIOS.limpiar()
+    error = OperationalError("SELECT", {}, Exception("sin conexión"))
+    sesion = FakeSession(error=error)
+    request = _request("1")
+    assert asyncio.run(obtener_usuario_actual(request, sesion)) is None
+    assert request.state.usuario is None
+    assert sesion.rollbacks == 1
+
+
+def test_error_que_no_es_de_bd_no_se_oculta():
+    CACHE_USUARIOS.limpiar()
+    sesion = FakeSession(error=RuntimeError("fallo del código"))
+    with pytest.raises(RuntimeError):
+        asyncio.run(obtener_usuario_actual(_request("1"), sesion))
+
+
+def test_usuario_se_reutiliza_entre_peticiones():
+    CACHE_USUARIOS.limpiar()
+    sesion = FakeSession(FakeResult(escalar=_usuario()))
+    asyncio.run(obtener_usuario_actual(_request("1"), sesion))
+
+    otra = FakeSession(error=RuntimeError("no debe consultar"))
+    usuario = asyncio.run(obtener_usuario_actual(_request("1"), otra))
+    assert usuario.nombres == "Ana"
+    assert usuario.rol == RolUsuario.LIDER
+    assert otra.statements == []
+    # Cada petición une la copia guardada a su propia sesión
+    assert otra.unidos == [CACHE_USUARIOS.obtener("1")]
+
+
+def test_invalidar_usuario_vuelve_a_consultar():
+    CACHE_USUARIOS.limpiar()
+    asyncio.run(
+        obtener_usuario_actual(
+            _request("1"), FakeSession(FakeResult(escalar=_usuario()))
+        )
+    )
+    invalidar_usuario("1")
+
+    sesion = FakeSession(FakeResult(escalar=_usuario()))
+    asyncio.run(obtener_usuario_actual(_request("1"), sesion))
+    assert len(sesion.statements) == 1
+
+    invalidar_usuario()
+    assert len(CACHE_USUARIOS) == 0
@@ -0,0 +1,129 @@
+import asyncio
+
+from sqlalchemy.dialects import postgresql
+
+from app.config.ddl import CANDADO_JERARQUIA, SENTENCIAS_DDL
+from app.models import RolUsuario
+from app.services.autorizacion import CACHE_RED
+from app.routes.votantes import (
+    obtener_metricas_red_completa,
+    obtener_referidos_directos_agrupados,
+    verificar_permiso_ver_perfil,
+)
+
+from conftest import FakeResult, FakeSession
+
+
+def _sql(statement):
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def test_permiso_propio_no_consulta():
+    sesion = FakeSession(FakeResult())
+    assert asyncio.run(verificar_permiso_ver_perfil(sesion, "1", "1")) is True
+    assert sesion.statements == []
+
+
+def test_permiso_descendiente_usa_tabla_de_cierre():
+    CACHE_RED.limpiar()
+    sesion = FakeSession(FakeResult(["2"]))
+    assert asyncio.run(verificar_permiso_ver_perfil(sesion, "2", "1")) is True
+    assert asyncio.run(verificar_permiso_ver_perfil(sesion, "3", "1")) is False
+    assert len(sesion.statements) == 1
+    sql = _sql(sesion.statements[0])
+    assert "FROM usuario_red" in sql
+    assert "RECURSIVE" not in sql
+
+
+def test_metricas_leen_agregados_guardados():
+    class Fila:
+        def __init__(self, rol, cantidad):
+            self.total_red = 7
+            self.niveles_profundidad = 3
+            self.rol = rol
+            self.cantidad = cantidad
+
+    sesion = FakeSession(
+        FakeResult([Fila(RolUsuario.LIDER, 2), Fila(RolUsuario.VOTANTE, 5)])
+    )
+    metricas = asyncio.run(obtener_metricas_red_completa(sesion, "1"))
+    assert metricas == {
+        "total_red": 7,
+        "niveles_profundidad": 3,
+        "por_rol": {"Líder": 2, "Votante": 5},
+    }
+    sql = _sql(sesion.statements[0])
+    assert "FROM usuario_red_metricas LEFT OUTER JOIN usuario_red_rol" in sql
+    assert "usuario_red.ancestro" not in sql
+
+
+def test_metricas_sin_red_ni_fila():
+    class Fila:
+        total_red = 0
+        niveles_profundidad = 0
+        rol = None
+        cantidad = None
+
+    sesion = FakeSession(FakeResult([Fila()]))
+    metricas = asyncio.run(obtener_metricas_red_completa(sesion, "1"))
+    assert metricas == {"total_red": 0, "niveles_profundidad": 0, "por_rol": {}}
+    sesion = FakeSession(FakeResult([]))
+    assert asyncio.run(obtener_metricas_red_completa(sesion, "1"))["total_red"] == 0
+
+
+def test_ddl_mantiene_la_tabla_de_cierre_con_triggers():
+    ddl = "\n".join(SENTENCIAS_DDL)
+    assert "AFTER INSERT ON usuario" in ddl
+    assert "AFTER UPDATE OF asignado_a ON usuario" in ddl
+    assert "AFTER UPDATE OF rol ON usuario" in ddl
+    assert "BEFORE DELETE ON usuario" in ddl
+    assert "INSERT INTO usuario_red_metricas" in ddl
+    assert "INSERT INTO usuario_red" in ddl
+
+
+def test_ddl_serializa_los_cambios_de_la_jerarquia():
+    ddl = "\n".join(SENTENCIAS_DDL)
+    assert f"pg_advisory_xact_lock({CANDADO_JERARQUIA})" in ddl
+    # Los cinco triggers y urna_mover_red toman el candado
+    assert ddl.count("PERFORM urna_bloquear_jerarquia();") == 5
+
+
+def test_ddl_recalcula_la_profundidad_con_conteos_por_nivel():
+    ddl = "\n".join(SENTENCIAS_DDL)
+    assert "INSERT INTO usuario_red_nivel" in ddl
+    assert "SELECT max(n.profundidad) FROM usuario_red_nivel n" in ddl
+    # Ningún trigger recorre la red completa de un ancestro
+    assert "SELECT max(r.profundidad) FROM usuario_red r" not in ddl
+
+
+def test_referidos_agrupados_cuentan_hijos_en_una_consulta():
+    class Fila:
+        identificacion = "2"
+        nombres = "Ana"
+        apellidos = "Ruiz"
+        rol = RolUsuario.LIDER
+        mesa_votacion = None
+        lugar_votacion = None
+        telefono = None
+        total_referidos = 4
+
+    sesion = FakeSession(FakeResult([Fila()]))
+    agrupados = asyncio.run(obtener_referidos_directos_agrupados(sesion, "1"))
+    assert len(sesion.statements) == 1
+    persona = agrupados["Líder"][0]
+    assert persona["tiene_referidos"] is True
+    assert persona["total_referidos"] == 4
+    sql = _sql(sesion.statements[0])
+    assert "(SELECT count(*) AS count_1 \nFROM usuario AS hijo" in sql
+    assert "hijo.asignado_a = usuario.identificacion" in sql
+
+
+def test_ddl_crea_el_indice_de_referidos_en_tablas_existentes():
+    ddl = "\n".join(SENTENCIAS_DDL)
+    assert "CREATE INDEX IF NOT EXISTS ix_usuario_asignado_a ON usuario" in ddl
+
+
+def test_ddl_acota_recorridos_y_rechaza_autoasignacion():
+    ddl = "\n".join(SENTENCIAS_DDL)
+    assert "ck_usuario_no_autoasignado" in ddl
+    assert "r.profundidad < 64" in ddl
@@ -0,0 +1,182 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import app
+from app.config import obtener_sesion
+from app.config.ddl import SENTENCIAS_DDL
+from app.models.usuario import RolUsuario, Usuario
+from app.services.listado import (
+    COLUMNAS_LISTADO,
+    FilaVotante,
+    codificar_cursor,
+    construir_fila,
+    decodificar_cursor,
+    normalizar_limite,
+    paginar_votantes,
+    transmitir_votantes,
+)
+
+from conftest import FakeResult, FakeSession
+
+
+def _sesion(filas=()):
+    """Filas del listado; scalar() responde el conteo"""
+    return FakeSession(FakeResult(filas, escalar=len(filas)))
+
+
+def _filas(n):
+    base = datetime(2024, 1, 1)
+    return [
+        (
+            str(1000000 + i),
+            "N",
+            "A",
+            None,
+            None,
+            None,
+            None,
+            RolUsuario.VOTANTE,
+            None,
+            base - timedelta(minutes=i),
+            None,
+            None,
+        )
+        for i in range(n)
+    ]
+
+
+def test_cursor_ida_y_vuelta():
+    fecha = datetime(2024, 5, 17, 10, 30, 15, 123456)
+    cursor = codificar_cursor(fecha, "1234567")
+    assert "=" not in cursor
+    assert decodificar_cursor(cursor) == (fecha, "1234567")
+
+
+def test_cursor_invalido_lanza_value_error():
+    with pytest.raises(ValueError):
+        decodificar_cursor("no-es-un-cursor")
+
+
+def test_ddl_crea_el_indice_del_cursor_en_tablas_existentes():
+    ddl = "\n".join(SENTENCIAS_DDL)
+    assert "CREATE INDEX IF NOT EXISTS ix_usuario_fecha_registro_identificacion" in ddl
+
+
+def test_indice_del_cursor_igual_en_el_modelo_y_el_ddl():
+    # create_all y el DDL deben dejar la misma definición bajo el mismo nombre
+    indice = next(
+        i
+        for i in Usuario.__table__.indexes
+        if i.name == "ix_usuario_fecha_registro_identificacion"
+    )
+    columnas = ", ".join(columna.name for columna in indice.columns)
+    assert columnas == "fecha_registro, identificacion"
+    assert f"ON usuario ({columnas})" in "\n".join(SENTENCIAS_DDL)
+
+
+def test_normalizar_limite_acota_valores():
+    assert normalizar_limite(None) == 25
+    assert normalizar_limite("abc") == 25
+    assert normalizar_limite("0") == 1
+    assert normalizar_limite("100000") == 100
+
+
+def test_paginar_detecta_pagina_siguiente_con_fila_extra():
+    sesion = _sesion(_filas(11))
+    pagina = asyncio.run(paginar_votantes(sesion, limite=10))
+    assert len(pagina.votantes) == 10
+    assert pagina.cursor_anterior is None
+    ultimo = pagina.votantes[-1]
+    assert decodificar_cursor(pagina.cursor_siguiente) == (
+        ultimo.fecha_registro,
+        ultimo.identificacion,
+    )
+    sql = str(sesion.statements[0])
+    assert "password" not in sql
+    assert "LEFT OUTER JOIN usuario AS referente" in sql
+    assert "LIMIT" in sql
+    assert "ORDER BY usuario.fecha_registro DESC, usuario.identificacion DESC" in sql
+
+
+def test_fila_votante_proyecta_columnas_del_listado():
+    assert len(FilaVotante.__slots__) == len(COLUMNAS_LISTADO) + 1
+    fila = construir_fila(_filas(1)[0])
+    assert fila.nombre_completo == "N A"
+    assert fila.rol.value == "Votante"
+    assert fila.referente is None
+    assert not hasattr(fila, "__dict__")
+
+
+def test_construir_fila_resuelve_referente_del_join():
+    crudo = list(_filas(1)[0])
+    crudo[8] = "7654321"
+    crudo[-2:] = ["Ana", "Gómez"]
+    fila = construir_fila(crudo)
+    assert fila.referente.identificacion == "7654321"
+    assert fila.referente.nombre_completo == "Ana Gómez"
+
+
+def test_paginar_hacia_atras_invierte_el_orden():
+    filas = list(reversed(_filas(3)))
+    sesion = _sesion(filas)
+    cursor = codificar_cursor(datetime(2023, 1, 1), "9999999")
+    pagina = asyncio.run(paginar_votantes(sesion, before=cursor, limite=10))
+    assert [v.identificacion for v in pagina.votantes] == [
+        fila[0] for fila in _filas(3)
+    ]
+    assert pagina.cursor_anterior is None
+    assert pagina.cursor_siguiente is not None
+
+
+def test_transmitir_lee_filas_bajo_demanda_y_luego_cursores():
+    sesion = _sesion(_filas(11))
+    pagina = transmitir_votantes(sesion, limite=10)
+    assert sesion.statements == []
+    assert pagina.cursor_siguiente is None
+
+    async def consumir():
+        return [v async for v in pagina.votantes]
+
+    votantes = asyncio.run(consumir())
+    assert len(votantes) == 10
+    assert decodificar_cursor(pagina.cursor_siguiente) == (
+        votantes[-1].fecha_registro,
+        votantes[-1].identificacion,
+    )
+    assert pagina.cursor_anterior is None
+
+
+def test_transmitir_con_cursor_invalido_falla_antes_de_consultar():
+    sesion = _sesion()
+    with pytest.raises(ValueError):
+        transmitir_votantes(sesion, after="basura")
+    assert sesion.statements == []
+
+
+def test_listar_transmite_filas_y_paginacion():
+    async def fake_sesion():
+        yield _sesion(_filas(3))
+
+    app.dependency_overrides[obtener_sesion] = fake_sesion
+    client = TestClient(app)
+    r = client.get("/votantes/?limite=2")
+    assert r.status_code == 200
+    assert "content-length" not in r.headers
+    assert r.text.count('href="/votantes/1000000"') == 1
+    assert 'href="/votantes/1000002"' not in r.text
+    assert "after=" in r.text
+    assert 'id="total-registros"' in r.text
+
+
+def test_listar_con_cursor_invalido_responde_primera_pagina():
+    async def fake_sesion():
+        yield _sesion()
+
+    app.dependency_overrides[obtener_sesion] = fake_sesion
+    client = TestClient(app)
+    r = client.get("/votantes/?after=basura&limite=10")
+    assert r.status_code == 200
+    assert 'id="pagination"' in r.text
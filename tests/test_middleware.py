@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.middleware import UsuarioContextMiddleware
+
+
+async def estado(request):
+    return JSONResponse(
+        {
+            "con_sesion": "session" in request.scope,
+            "usuario_id": (
+                request.session.get("usuario_id")
+                if "session" in request.scope
+                else None
+            ),
+        }
+    )
+
+
+async def entrar(request):
+    request.session["usuario_id"] = "1"
+    request.session["ultimo_uso"] = int(time.time()) - int(
+        request.query_params.get("hace", 0)
+    )
+    return JSONResponse({})
+
+
+async def flujo(request):
+    async def partes():
+        for parte in (b"uno", b"dos", b"tres"):
+            yield parte
+
+    return StreamingResponse(partes())
+
+
+def _app():
+    app = Starlette(
+        routes=[
+            Route("/estado", estado),
+            Route("/salud", estado),
+            Route("/static/app.css", estado),
+            Route("/entrar", entrar),
+            Route("/flujo", flujo),
+        ]
+    )
+    app.add_middleware(UsuarioContextMiddleware, secret_key="x")
+    return app
+
+
+def test_static_y_salud_no_decodifican_la_sesion():
+    cliente = TestClient(_app())
+    cliente.get("/entrar")
+    assert cliente.get("/estado").json() == {"con_sesion": True, "usuario_id": "1"}
+    assert cliente.get("/static/app.css").json()["con_sesion"] is False
+    assert cliente.get("/salud").json()["con_sesion"] is False
+
+
+def test_sesion_inactiva_redirige_a_login():
+    cliente = TestClient(_app(), follow_redirects=False)
+    cliente.get("/entrar", params={"hace": 100000})
+    respuesta = cliente.get("/estado")
+    assert respuesta.status_code == 303
+    assert respuesta.headers["location"] == "/auth/login"
+    assert cliente.get("/estado").json()["usuario_id"] is None
+
+
+def test_streaming_pasa_sin_agrupar():
+    mensajes = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(mensaje):
+        mensajes.append(mensaje)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "method": "GET",
+        "path": "/flujo",
+        "raw_path": b"/flujo",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "scheme": "http",
+        "server": ("test", 80),
+    }
+    asyncio.run(_app()(scope, receive, send))
+    cuerpos = [m["body"] for m in mensajes if m["type"] == "http.response.body"]
+    assert cuerpos[:3] == [b"uno", b"dos", b"tres"]
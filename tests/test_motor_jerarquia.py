@@ -0,0 +1,189 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from app.models import RolUsuario
+from app.services.jerarquia import GrafoJerarquia, MotorJerarquia
+
+from conftest import FakeResult, FakeSession
+
+V, A, L = RolUsuario.VOTANTE, RolUsuario.ACTIVISTA, RolUsuario.LIDER
+
+#        1
+#      /   \
+#     2     3
+#    / \
+#   4   5
+#   |
+#   6
+FILAS = [
+    ("1", None, L, 90),
+    ("2", "1", A, 80),
+    ("3", "1", V, 40),
+    ("4", "2", V, 60),
+    ("5", "2", V, 20),
+    ("6", "4", V, 100),
+    ("7", "99", V, 0),  # referente inexistente: raíz
+]
+
+
+def test_subarbol_profundidad_y_ancestros():
+    g = GrafoJerarquia.construir(FILAS)
+    assert g.tamano_red("1") == 5
+    assert g.tamano_red("2") == 3
+    assert g.tamano_red("6") == 0
+    assert g.tamano_red("7") == 0
+    assert g.nivel("6") == 3
+    assert g.niveles_red("1") == 3
+    assert g.ancestros("6") == ["4", "2", "1"]
+    assert g.referidos("2") == ["4", "5"]
+    assert g.es_ancestro("1", "6")
+    assert not g.es_ancestro("6", "1")
+    assert not g.es_ancestro("3", "3")
+
+
+def test_conteo_por_rol_y_calidad():
+    g = GrafoJerarquia.construir(FILAS)
+    assert g.conteo_por_rol("1") == {A: 1, V: 4}
+    assert g.conteo_por_rol("2") == {V: 3}
+    assert g.calidad_promedio("2") == 60.0
+    assert g.calidad_promedio("6") == 0.0
+
+
+def _motor(sesion, intervalo):
+    @asynccontextmanager
+    async def fabrica_sesiones():
+        yield sesion
+
+    return MotorJerarquia(fabrica_sesiones, intervalo=intervalo)
+
+
+def _resumen(g):
+    """Todo lo que se puede consultar del grafo, por usuario"""
+    return {
+        i: (
+            g.tamano_red(i),
+            g.nivel(i),
+            g.niveles_red(i),
+            g.ancestros(i),
+            sorted(g.referidos(i)),
+            g.conteo_por_rol(i),
+            g.calidad_promedio(i),
+        )
+        for i in g.ids
+    }
+
+
+def test_aplicar_en_el_lugar_equivale_a_reconstruir():
+    g = GrafoJerarquia.construir(FILAS)
+    filas = {fila[0]: fila for fila in FILAS}
+    cambios = [
+        ("8", "6", V, 50),  # alta debajo de la rama más profunda
+        ("9", None, L, 0),  # alta sin referente
+        ("3", "9", A, 70),  # usuario sin red cambia de referente y de rol
+        ("8", "5", V, 50),  # la rama más profunda se acorta
+        ("2", "1", L, 10),  # cambio de rol de alguien con red
+        ("10", "8", V, 30),
+    ]
+    for fila in cambios:
+        assert g.aplicar(fila)
+        filas[fila[0]] = fila
+        assert _resumen(g) == _resumen(GrafoJerarquia.construir(filas.values()))
+
+
+def test_aplicar_rechaza_mover_una_red():
+    g = GrafoJerarquia.construir(FILAS)
+    assert not g.aplicar(("2", "3", A, 80))
+    assert g.ancestros("4") == ["2", "1"]
+    assert not g.aplicar(("6", "6", V, 100))
+
+
+def test_motor_aplica_cambios_en_el_lugar_sin_recargar():
+    async def flujo():
+        sesion = FakeSession(FakeResult(FILAS))
+        motor = _motor(sesion, 3600)
+        anterior = await motor.obtener(sesion)
+        motor.registrar("8", "6", V, 50)
+        g = await motor.obtener(sesion)
+        await motor.esperar()
+        return sesion, anterior, g
+
+    sesion, anterior, g = asyncio.run(flujo())
+    assert g is anterior
+    assert len(sesion.statements) == 1
+    assert g.ancestros("8") == ["6", "4", "2", "1"]
+    assert g.tamano_red("1") == 6
+
+
+def test_motor_recarga_si_se_mueve_una_red():
+    async def flujo():
+        sesion = FakeSession(FakeResult(FILAS))
+        motor = _motor(sesion, 3600)
+        anterior = await motor.obtener(sesion)
+        motor.registrar("2", "3", A, 80)
+        assert await motor.obtener(sesion) is anterior
+        await motor.esperar()
+        return sesion
+
+    assert len(asyncio.run(flujo()).statements) == 2
+
+
+def test_motor_recarga_al_vencer_sin_bloquear_la_lectura():
+    async def flujo():
+        sesion = FakeSession(FakeResult(FILAS))
+        motor = _motor(sesion, 0)
+        anterior = await motor.obtener(sesion)
+        assert await motor.obtener(sesion) is anterior
+        await motor.esperar()
+        motor.intervalo = 3600
+        assert await motor.obtener(sesion) is not anterior
+        return sesion
+
+    assert len(asyncio.run(flujo()).statements) == 2
+
+
+def test_motor_invalidado_recarga_en_segundo_plano():
+    async def flujo():
+        sesion = FakeSession(FakeResult(FILAS))
+        motor = _motor(sesion, 3600)
+        anterior = await motor.obtener(sesion)
+        motor.invalidar()
+        assert await motor.obtener(sesion) is anterior
+        await motor.esperar()
+        await motor.obtener(sesion)
+        await motor.esperar()
+        return sesion
+
+    assert len(asyncio.run(flujo()).statements) == 2
+
+
+def test_motor_conserva_la_version_anterior_si_falla():
+    async def flujo():
+        sesion = FakeSession(FakeResult(FILAS))
+        motor = _motor(sesion, 3600)
+        anterior = await motor.obtener(sesion)
+        motor.invalidar()
+        sesion.error = RuntimeError("sin conexión")
+        await motor.obtener(sesion)
+        await motor.esperar()
+        return anterior, await motor.obtener(sesion)
+
+    anterior, actual = asyncio.run(flujo())
+    assert actual is anterior
+
+
+def test_ciclos_se_cortan_y_no_cuelgan():
+    filas = FILAS + [("8", "10", V, 0), ("9", "8", V, 0), ("10", "9", V, 0)]
+    g = GrafoJerarquia.construir(filas)
+    assert len(g.ciclos) == 1
+    assert set(g.ciclos) <= {"8", "9", "10"}
+    assert g.tamano_red(g.ciclos[0]) == 2
+    assert len(g.ancestros("9")) <= 2
+    # El resto del árbol no cambia
+    assert g.tamano_red("1") == 5
+
+
+def test_autoasignado_y_ancestros_acotados():
+    g = GrafoJerarquia.construir(FILAS + [("8", "8", V, 0)])
+    assert g.ciclos == ["8"]
+    assert g.ancestros("8") == []
+    assert g.ancestros("6", maximo=2) == ["4", "2"]
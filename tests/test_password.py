@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from app import app
+from app.models import RolUsuario, Usuario
+from app.utils import auth
+from app.utils.auth import (
+    CACHE_USUARIOS,
+    asignar_credenciales,
+    hashear_password_async,
+    metricas_password,
+    requerir_autenticacion,
+    tiene_credenciales,
+    verificar_password,
+    verificar_password_async,
+)
+
+from conftest import FakeSession
+
+
+def test_hash_y_verificacion_async():
+    async def flujo():
+        hash_password = await hashear_password_async("clave")
+        return (
+            await verificar_password_async("clave", hash_password),
+            await verificar_password_async("otra", hash_password),
+        )
+
+    assert asyncio.run(flujo()) == (True, False)
+
+
+def test_bcrypt_no_bloquea_el_event_loop(monkeypatch):
+    monkeypatch.setattr(auth, "limite_password", asyncio.Semaphore(1))
+    monkeypatch.setitem(metricas_password, "maximo_en_cola", 0)
+    latidos = []
+
+    async def latir():
+        for _ in range(5):
+            latidos.append(time.monotonic())
+            await asyncio.sleep(0.01)
+
+    async def flujo():
+        lentas = [auth._ejecutar_password(time.sleep, 0.05) for _ in range(3)]
+        await asyncio.gather(latir(), *lentas)
+
+    asyncio.run(flujo())
+    # El event loop siguió atendiendo mientras corrían las operaciones
+    assert len(latidos) == 5
+    assert latidos[-1] - latidos[0] < 0.1
+    # Con un solo cupo, las otras dos esperaron en cola
+    assert metricas_password["maximo_en_cola"] == 2
+    assert metricas_password["en_cola"] == 0
+    assert metricas_password["en_ejecucion"] == 0
+
+
+def test_votante_sin_credenciales_no_puede_iniciar_sesion():
+    votante = Usuario(identificacion="1", nombres="Ana", apellidos="Gómez")
+    assert votante.password is None
+    assert tiene_credenciales(votante) is False
+    assert tiene_credenciales(None) is False
+
+
+def test_asignar_credenciales_al_invitar():
+    CACHE_USUARIOS.guardar("1", "anterior")
+    votante = Usuario(identificacion="1", nombres="Ana", apellidos="Gómez")
+    sesion = FakeSession()
+
+    clave = asyncio.run(asignar_credenciales(sesion, votante))
+    assert tiene_credenciales(votante)
+    assert verificar_password(clave, votante.password)
+    assert sesion.agregados == [votante] and sesion.commits == 1
+    assert CACHE_USUARIOS.obtener("1") is None
+
+
+def test_metricas_de_la_cola_solo_para_el_estratega():
+    cliente = TestClient(app)
+    # /salud es pública: no muestra la cola de login
+    assert "password" not in cliente.get("/salud").json()
+
+    for rol, codigo in ((RolUsuario.COORDINADOR, 403), (RolUsuario.ESTRATEGA, 200)):
+        app.dependency_overrides[requerir_autenticacion] = lambda rol=rol: Usuario(
+            identificacion="1", nombres="Ana", apellidos="Gómez", rol=rol
+        )
+        r = cliente.get("/metricas")
+        assert r.status_code == codigo
+    assert r.json()["password"].keys() == metricas_password.keys()
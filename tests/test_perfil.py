@@ -0,0 +1,181 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+
+from app import app
+from app.config import obtener_sesion
+from app.models.usuario import Usuario, RolUsuario
+from app.services.ancestros import CACHE_ANCESTROS
+from app.services import autorizacion
+from app.services.autorizacion import CACHE_RED
+from app.services.perfil import consulta_perfil
+from app.utils.auth import requerir_autenticacion
+
+from conftest import FakeResult, FakeSession
+
+
+def _usuario(identificacion, rol=RolUsuario.COORDINADOR):
+    return Usuario(
+        identificacion=identificacion,
+        nombres="Ana",
+        apellidos="Ruiz",
+        rol=rol,
+        password="x",
+    )
+
+
+class Fila:
+    def __init__(self, permitido=True):
+        self.Usuario = _usuario("2222222", RolUsuario.LIDER)
+        self.permitido = permitido
+        self.referente_identificacion = "1111111"
+        self.referente_nombres = "Luis"
+        self.referente_apellidos = "Gómez"
+        self.ancestros = [
+            {
+                "identificacion": "1111111",
+                "nombres": "Luis",
+                "apellidos": "Gómez",
+                "rol": "JEFE_DE_ZONA",
+                "nivel": 1,
+            }
+        ]
+        self.total_red = 3
+        self.niveles_profundidad = 2
+        self.por_rol = {"VOTANTE": 2, "ACTIVISTA": 1}
+        self.referidos = [
+            {
+                "identificacion": "3333333",
+                "nombres": "Eva",
+                "apellidos": "Mora",
+                "rol": "ACTIVISTA",
+                "mesa_votacion": None,
+                "lugar_votacion": None,
+                "telefono": None,
+                "total_referidos": 2,
+            }
+        ]
+
+
+def _sesion(fila, red=("2222222", "3333333")):
+    """Cuenta los viajes a la base de datos de una petición"""
+
+    def responder(statement):
+        # Red del usuario (caché de permisos): una sola columna
+        if len(statement.selected_columns) == 1:
+            return FakeResult(red)
+        return FakeResult([fila] if fila else [])
+
+    return FakeSession(responder)
+
+
+def _cliente(sesion):
+    CACHE_RED.limpiar()
+
+    async def fake_sesion():
+        yield sesion
+
+    app.dependency_overrides[obtener_sesion] = fake_sesion
+    app.dependency_overrides[requerir_autenticacion] = lambda: _usuario("1111111")
+    return TestClient(app)
+
+
+def test_perfil_se_arma_en_una_sola_consulta():
+    sesion = _sesion(Fila())
+    cliente = _cliente(sesion)
+    r = cliente.get("/votantes/2222222")
+    assert r.status_code == 200
+    # Primer clic: red del usuario (caché de permisos) + perfil
+    assert len(sesion.statements) == 2
+    assert "Eva Mora" in r.text
+    assert "Luis Gómez" in r.text
+    assert 'id="cadena-referentes"' in r.text
+
+    # Con la red en caché, el permiso no consulta la base
+    r = cliente.get("/votantes/3333333")
+    assert r.status_code == 200
+    assert len(sesion.statements) == 3
+    assert "EXISTS" not in str(sesion.statements[-1])
+
+
+def test_api_referidos_en_una_sola_consulta():
+    sesion = _sesion(Fila())
+    cliente = _cliente(sesion)
+    cliente.get("/votantes/2222222/referidos")
+    r = cliente.get("/votantes/2222222/referidos")
+    assert r.status_code == 200
+    assert len(sesion.statements) == 3
+    datos = r.json()
+    persona = datos["referidos_por_rol"]["Activista"][0]
+    assert persona["tiene_referidos"] is True
+    assert datos["total_referidos_directos"] == 1
+    assert datos["total_red_completa"] == 3
+
+
+def test_fuera_de_la_red_no_consulta_el_perfil():
+    sesion = _sesion(Fila(), red=("4444444",))
+    r = _cliente(sesion).get("/votantes/2222222/referidos")
+    assert r.status_code == 403
+    assert len(sesion.statements) == 1
+
+
+def test_sin_permiso_no_muestra_datos():
+    sesion = _sesion(Fila(permitido=False))
+    r = _cliente(sesion).get("/votantes/2222222/referidos")
+    assert r.status_code == 403
+    assert len(sesion.statements) == 2
+
+
+def test_inexistente_dentro_de_la_red_es_404():
+    sesion = _sesion(None)
+    cliente = _cliente(sesion)
+    r = cliente.get("/votantes/2222222/referidos")
+    assert r.status_code == 404
+    assert r.json()["detail"] == "Usuario no encontrado"
+
+    r = cliente.get("/votantes/2222222", follow_redirects=False)
+    assert r.status_code == 303
+
+
+def test_inexistente_sin_red_en_cache_es_403(monkeypatch):
+    # Sin la red en caché el permiso se verifica en la misma consulta: sin
+    # fila no se distingue de un usuario ajeno
+    monkeypatch.setattr(autorizacion, "MAXIMO_DESCENDIENTES", 1)
+    sesion = _sesion(None)
+    r = _cliente(sesion).get("/votantes/2222222/referidos")
+    assert r.status_code == 403
+
+
+def test_consulta_compone_todo_en_un_select():
+    sql = str(consulta_perfil("2", "1").compile(dialect=postgresql.dialect()))
+    assert sql.count("SELECT") == 6
+    assert "json_agg(json_build_object(" in sql
+    assert "FROM usuario_red_rol" in sql
+    assert "LEFT OUTER JOIN usuario AS referente" in sql
+    assert "RECURSIVE" not in sql
+
+
+def test_perfil_deja_la_cadena_en_cache_para_la_api():
+    CACHE_ANCESTROS.limpiar()
+    sesion = _sesion(Fila())
+    cliente = _cliente(sesion)
+    cliente.get("/votantes/2222222")
+    antes = len(sesion.statements)
+    r = cliente.get("/votantes/2222222/ancestros")
+    assert r.status_code == 200
+    assert len(sesion.statements) == antes
+    assert r.json()["ancestros"] == [
+        {
+            "identificacion": "1111111",
+            "nombre_completo": "Luis Gómez",
+            "nombres": "Luis",
+            "apellidos": "Gómez",
+            "rol": "Jefe de Zona",
+            "nivel": 1,
+        }
+    ]
+
+
+def test_api_ancestros_fuera_de_la_red():
+    sesion = _sesion(Fila(), red=("4444444",))
+    r = _cliente(sesion).get("/votantes/2222222/ancestros")
+    assert r.status_code == 403
@@ -0,0 +1,109 @@
+import asyncio
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+
+from app import app
+from app.config import obtener_sesion
+from app.config.ddl import SENTENCIAS_DDL
+from app.models.usuario import Usuario, RolUsuario
+from app.services.puestos import refrescar_puestos, resumen_puestos
+from app.utils.auth import requerir_autenticacion
+
+from conftest import FakeResult, FakeSession
+
+
+class Fila:
+    def __init__(self, lugar, mesa, cantidad, suma):
+        self.lugar_votacion = lugar
+        self.mesa_votacion = mesa
+        self.cantidad = cantidad
+        self.suma_calidad = suma
+
+
+FILAS = [
+    Fila("", "", 1, 0),
+    Fila("Colegio A", "1", 2, 100),
+    Fila("Colegio A", "2", 2, 60),
+    Fila("Escuela B", "1", 3, 300),
+]
+
+
+def test_resumen_agrupa_por_puesto_y_mesa():
+    sesion = FakeSession(FakeResult(FILAS))
+    puestos = asyncio.run(resumen_puestos(sesion, "1"))
+    assert [p["lugar_votacion"] for p in puestos] == ["Colegio A", "Escuela B", None]
+    colegio = puestos[0]
+    assert colegio["cantidad"] == 4
+    assert colegio["calidad_promedio"] == 40.0
+    assert colegio["mesas"][1] == {
+        "mesa_votacion": "2",
+        "cantidad": 2,
+        "calidad_promedio": 30.0,
+    }
+    sql = str(sesion.statements[0].compile(dialect=postgresql.dialect()))
+    assert "FROM usuario_red_puesto" in sql
+    assert "usuario_red " not in sql
+
+
+def _sesion_refresco(candado=True, vencido=True):
+    """Responde al candado y a la marca del último refresco"""
+
+    def responder(statement):
+        sql = str(statement)
+        if "pg_try_advisory_xact_lock" in sql:
+            return FakeResult(escalar=candado)
+        if "usuario_red_puesto_refresco" in sql:
+            return FakeResult(escalar=datetime.now() if vencido else None)
+        return FakeResult()
+
+    return FakeSession(responder)
+
+
+def test_refresco_concurrente_con_candado():
+    sesion = _sesion_refresco()
+    assert asyncio.run(refrescar_puestos(sesion)) is True
+    assert "CONCURRENTLY" in str(sesion.statements[-1])
+    assert sesion.commits == 1
+
+    ocupado = _sesion_refresco(candado=False)
+    assert asyncio.run(refrescar_puestos(ocupado)) is False
+    assert len(ocupado.statements) == 1
+    assert ocupado.rollbacks == 1
+
+
+def test_refresco_reciente_de_otro_worker_se_salta():
+    sesion = _sesion_refresco(vencido=False)
+    assert asyncio.run(refrescar_puestos(sesion, 300)) is False
+    assert len(sesion.statements) == 2
+    assert not any("CONCURRENTLY" in str(s) for s in sesion.statements)
+    assert sesion.rollbacks == 1
+    assert sesion.commits == 0
+
+
+def test_ddl_vista_materializada_con_indice_unico():
+    ddl = "\n".join(SENTENCIAS_DDL)
+    assert "CREATE MATERIALIZED VIEW IF NOT EXISTS usuario_red_puesto" in ddl
+    assert "CREATE UNIQUE INDEX IF NOT EXISTS ux_usuario_red_puesto" in ddl
+    assert "CREATE TABLE IF NOT EXISTS usuario_red_puesto_refresco" in ddl
+
+
+def test_vista_puestos():
+    sesion = FakeSession(FakeResult(FILAS))
+
+    async def fake_sesion():
+        yield sesion
+
+    app.dependency_overrides[obtener_sesion] = fake_sesion
+    app.dependency_overrides[requerir_autenticacion] = lambda: Usuario(
+        identificacion="1111111",
+        nombres="Ana",
+        apellidos="Ruiz",
+        rol=RolUsuario.COORDINADOR,
+        password="x",
+    )
+    r = TestClient(app).get("/votantes/puestos")
+    assert r.status_code == 200
+    assert "Colegio A" in r.text
+    assert "Puesto no registrado" in r.text
@@ -0,0 +1,81 @@
+import asyncio
+
+from app.models import RolUsuario
+from app.services import ranking as modulo
+from app.services.jerarquia import GrafoJerarquia, MotorJerarquia
+from app.services.ranking import CACHE_RANKING, calcular_ranking, obtener_ranking
+
+from conftest import FakeResult, FakeSession
+
+E, J, L, V = (
+    RolUsuario.ESTRATEGA,
+    RolUsuario.JEFE_DE_ZONA,
+    RolUsuario.LIDER,
+    RolUsuario.VOTANTE,
+)
+
+FILAS = [
+    ("1", None, E, 0),
+    ("2", "1", J, 0),
+    ("3", "2", L, 0),
+    ("4", "3", V, 20),
+    ("5", "3", V, 40),
+    ("6", "2", L, 0),
+    ("7", "6", V, 100),
+]
+
+
+class Fila:
+    def __init__(self, identificacion, rol):
+        self.identificacion = identificacion
+        self.nombres = "N" + identificacion
+        self.apellidos = "A"
+        self.rol = rol
+
+
+def test_ranking_por_red_y_por_calidad():
+    g = GrafoJerarquia.construir(FILAS)
+    assert calcular_ranking(g, k=2) == [("2", 5, 32.0), ("3", 2, 30.0)]
+    assert calcular_ranking(g, k=1, criterio="calidad", minimo_calidad=1) == [
+        ("6", 1, 100.0)
+    ]
+    # Con el mínimo, la red de una persona no compite por calidad
+    assert calcular_ranking(g, k=1, criterio="calidad", minimo_calidad=2) == [
+        ("2", 5, 32.0)
+    ]
+    assert calcular_ranking(g, criterio="calidad", minimo_calidad=6) == []
+    # El mínimo no aplica al ranking por tamaño
+    assert len(calcular_ranking(g, k=10, minimo_calidad=6)) == 3
+    # Los Estrategas y votantes no compiten
+    assert "1" not in [r[0] for r in calcular_ranking(g, k=10)]
+
+
+def test_ranking_se_guarda_en_cache(monkeypatch):
+    CACHE_RANKING.limpiar()
+    # Sin recargas en segundo plano: solo la primera carga con la sesión
+    monkeypatch.setattr(modulo, "MOTOR_JERARQUIA", MotorJerarquia(None))
+    sesion = FakeSession([FakeResult(FILAS), FakeResult([Fila("2", J), Fila("3", L)])])
+    ranking = asyncio.run(obtener_ranking(sesion, k=2))
+    assert [r["posicion"] for r in ranking] == [1, 2]
+    assert ranking[0]["rol"] == "Jefe de Zona"
+    asyncio.run(obtener_ranking(sesion, k=2))
+    assert len(sesion.statements) == 2
+
+
+def test_ranking_ve_los_cambios_sin_recargar_el_grafo(monkeypatch):
+    CACHE_RANKING.limpiar()
+    motor = MotorJerarquia(None)
+    monkeypatch.setattr(modulo, "MOTOR_JERARQUIA", motor)
+    sesion = FakeSession([FakeResult(FILAS), FakeResult([Fila("2", J), Fila("3", L)])])
+
+    async def flujo():
+        await obtener_ranking(sesion, k=2)
+        CACHE_RANKING.limpiar()
+        # 7 (sin red) pasa a la red de 3: se aplica en el grafo actual
+        motor.registrar("7", "3", V, 100)
+        return await obtener_ranking(sesion, k=2)
+
+    ranking = asyncio.run(flujo())
+    assert ranking[1]["total_red"] == 3
+    # Carga del grafo y dos consultas de nombres: ninguna recarga
+    assert len(sesion.statements) == 3
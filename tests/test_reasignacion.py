@@ -0,0 +1,119 @@
+import asyncio
+import re
+from array import array
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError, ProgrammingError
+
+from app import app
+from app.config import obtener_sesion
+from app.config.ddl import SENTENCIAS_DDL
+from app.models.usuario import Usuario, RolUsuario
+from app.services.ancestros import CACHE_ANCESTROS
+from app.services.autorizacion import CACHE_RED
+from app.services.conteo import CACHE_CONTEOS
+from app.services.ranking import CACHE_RANKING
+from app.services.sugerencias import CACHE_SUGERENCIAS
+from app.services.reasignacion import mover_red
+from app.utils.auth import requerir_autenticacion
+
+from conftest import FakeResult, FakeSession
+
+
+def _sesion(movidos=0, error=None, red=()):
+    """urna_mover_red responde movidos (o falla); lo demás, la red"""
+
+    def responder(statement):
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        if "urna_mover_red" not in sql:
+            return FakeResult(red)
+        if error:
+            raise error
+        return FakeResult(escalar=movidos)
+
+    return FakeSession(responder)
+
+
+def test_mover_red_una_sentencia_e_invalida_caches():
+    CACHE_RED.guardar("3", array("Q"))
+    CACHE_ANCESTROS.guardar("5", [])
+    CACHE_CONTEOS.guardar("3", 10)
+    CACHE_SUGERENCIAS.guardar("3", (None, []))
+    CACHE_RANKING.guardar("red", [])
+    sesion = _sesion(movidos=50_000)
+    assert asyncio.run(mover_red(sesion, "2", "3")) == 50_000
+    assert len(sesion.statements) == 1
+    assert sesion.commits == 1
+    assert CACHE_ANCESTROS.obtener("5") is None
+    assert CACHE_RED.obtener("3") is None
+    assert CACHE_CONTEOS.obtener("3") is None
+    assert CACHE_SUGERENCIAS.obtener("3") is None
+    assert CACHE_RANKING.obtener("red") is None
+
+
+def test_mover_red_invalida_revierte():
+    error = IntegrityError("SELECT", {}, Exception("check_violation"))
+    sesion = _sesion(error=error)
+    with pytest.raises(ValueError):
+        asyncio.run(mover_red(sesion, "2", "4"))
+    assert sesion.rollbacks == 1
+
+
+class _SinPrivilegio(Exception):
+    sqlstate = "42501"
+
+
+def test_mover_red_sin_permiso_del_solicitante():
+    error = ProgrammingError("SELECT", {}, _SinPrivilegio())
+    sesion = _sesion(error=error)
+    with pytest.raises(PermissionError):
+        asyncio.run(mover_red(sesion, "2", "4", solicitante="1"))
+    assert sesion.rollbacks == 1
+    assert sesion.commits == 0
+
+
+def test_ddl_mueve_en_bloque_y_salta_el_trigger():
+    ddl = "\n".join(SENTENCIAS_DDL)
+    assert "FUNCTION urna_mover_red(" in ddl
+    assert "current_setting('urna.mover_red', true) = 'on'" in ddl
+
+
+def _cliente(sesion, rol):
+    async def fake_sesion():
+        yield sesion
+
+    app.dependency_overrides[obtener_sesion] = fake_sesion
+    app.dependency_overrides[requerir_autenticacion] = lambda: Usuario(
+        identificacion="1111111", nombres="Ana", apellidos="Ruiz", rol=rol, password="x"
+    )
+    return TestClient(app)
+
+
+def test_api_requiere_rol_y_csrf():
+    CACHE_RED.limpiar()
+    sesion = _sesion(movidos=3, red=("2222222", "3333333"))
+    cliente = _cliente(sesion, RolUsuario.LIDER)
+    datos = {"destino": "3333333", "csrf_token": "x"}
+    assert cliente.post("/votantes/2222222/reasignar", data=datos).status_code == 403
+
+    cliente = _cliente(sesion, RolUsuario.COORDINADOR)
+    assert cliente.post("/votantes/2222222/reasignar", data=datos).status_code == 400
+
+
+def test_api_revisa_la_red_en_la_transaccion_del_cambio():
+    # La caché de redes del proceso no cuenta: la revisión es de urna_mover_red
+    CACHE_RED.guardar("1111111", array("Q", [2222222, 3333333]))
+    error = ProgrammingError("SELECT", {}, _SinPrivilegio())
+    sesion = _sesion(error=error)
+    cliente = _cliente(sesion, RolUsuario.COORDINADOR)
+    r = cliente.get("/votantes/nuevo")
+    token = re.search(r'name="csrf_token" value="([^"]+)"', r.text).group(1)
+    datos = {"destino": "3333333", "csrf_token": token}
+
+    r = cliente.post("/votantes/2222222/reasignar", data=datos)
+    assert r.status_code == 403
+    sql = sesion.statements[-1].compile(dialect=postgresql.dialect())
+    assert "1111111" in sql.params.values()
+    assert sesion.rollbacks == 1
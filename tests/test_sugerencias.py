@@ -0,0 +1,93 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+
+from app import app
+from app.config import obtener_sesion
+from app.models.usuario import RolUsuario
+from app.services.sugerencias import (
+    CACHE_SUGERENCIAS,
+    normalizar_consulta,
+    sugerir_votantes,
+)
+from app.utils.cache import CacheTTL
+
+from conftest import FakeResult, FakeSession
+
+
+class Fila:
+    identificacion = "1234567"
+    nombres = "María"
+    apellidos = "Pérez"
+    telefono = None
+    rol = RolUsuario.LIDER
+    lugar_votacion = None
+    mesa_votacion = "3"
+
+
+def _sql(statement):
+    compilado = statement.compile(dialect=postgresql.dialect())
+    return str(compilado), list(compilado.params.values())
+
+
+def test_cache_ttl_vence_y_desaloja():
+    cache = CacheTTL(ttl=60, maximo=2)
+    cache.guardar("a", 1)
+    cache.guardar("b", 2)
+    assert cache.obtener("a") == 1
+    cache.guardar("c", 3)
+    assert cache.obtener("b") is None
+    assert len(cache) == 2
+
+    vencida = CacheTTL(ttl=0)
+    vencida.guardar("a", [])
+    assert vencida.obtener("a", "nada") == "nada"
+
+
+def test_normalizar_consulta_colapsa_espacios():
+    assert normalizar_consulta("  maria   perez ") == "maria perez"
+
+
+def test_sugerir_proyecta_columnas_limita_y_cachea():
+    CACHE_SUGERENCIAS.limpiar()
+    sesion = FakeSession(FakeResult([Fila()]))
+    respuesta = asyncio.run(sugerir_votantes(sesion, "maria, rol: lider", limite=5))
+    assert respuesta["resultados"][0]["nombre_completo"] == "María Pérez"
+    assert respuesta["resultados"][0]["rol"] == "Líder"
+    sql, params = _sql(sesion.statements[0])
+    assert "password" not in sql
+    assert "ORDER BY similarity(" in sql
+    assert 5 in params
+
+    asyncio.run(sugerir_votantes(sesion, " maria,  rol: lider ", limite=5))
+    assert len(sesion.statements) == 1
+    # Tildes y mayúsculas comparten entrada (la respuesta conserva el texto)
+    respuesta = asyncio.run(sugerir_votantes(sesion, "MARÍA, Rol: Líder", limite=5))
+    assert len(sesion.statements) == 1
+    assert respuesta["q"] == "MARÍA, Rol: Líder"
+    asyncio.run(sugerir_votantes(sesion, "maria, rol: lider", 5, usuario_id="1"))
+    assert len(sesion.statements) == 2
+
+
+def test_sugerir_sin_texto_no_consulta():
+    CACHE_SUGERENCIAS.limpiar()
+    sesion = FakeSession(FakeResult([Fila()]))
+    respuesta = asyncio.run(sugerir_votantes(sesion, "   "))
+    assert respuesta["resultados"] == []
+    assert sesion.statements == []
+
+
+def test_endpoint_buscar_acota_limite():
+    CACHE_SUGERENCIAS.limpiar()
+    sesion = FakeSession(FakeResult([Fila()]))
+
+    async def fake_sesion():
+        yield sesion
+
+    app.dependency_overrides[obtener_sesion] = fake_sesion
+    client = TestClient(app)
+    r = client.get("/votantes/buscar?q=maria&limite=9999")
+    assert r.status_code == 200
+    assert r.json()["resultados"][0]["identificacion"] == "1234567"
+    assert 50 in _sql(sesion.statements[0])[1]
@@ -11,6 +11,9 @@ class FakeResult:
     def scalar_one_or_none(self):
         return None
 
+    def scalar(self):
+        return 0
+
     class _Scalars:
         def all(self):
             return []
@@ -18,11 +21,26 @@ class FakeResult:
     def scalars(self):
         return self._Scalars()
 
+    def all(self):
+        return []
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        raise StopAsyncIteration
+
+    async def close(self):
+        pass
+
 
 class FakeSession:
     async def execute(self, statement):
         return FakeResult()
 
+    async def stream(self, statement):
+        return FakeResult()
+
     def add(self, obj):
         pass
 